@@ -93,8 +93,7 @@ Company Legal Profile:
             if kb_exists.data:
                 kb_id = kb_exists.data[0]['id']
                 supabase.table('knowledge_base').update(kb_item_data).eq('id', kb_id).execute()
-                matcher.remove_item(kb_id)
-                matcher.add_item(kb_id, kb_content, {'title': kb_item_data['title'], 'category': kb_item_data['category']})
+                matcher.update_item(kb_id, kb_content, {'title': kb_item_data['title'], 'category': kb_item_data['category']})
             else:
                 kb_res = supabase.table('knowledge_base').insert(kb_item_data).execute()
                 if kb_res.data:
@@ -120,8 +119,7 @@ Company Legal Profile:
                 if cert_kb_exists.data:
                     ckb_id = cert_kb_exists.data[0]['id']
                     supabase.table('knowledge_base').update(cert_kb_data).eq('id', ckb_id).execute()
-                    matcher.remove_item(ckb_id)
-                    matcher.add_item(ckb_id, cert_content, {'title': cert_kb_data['title'], 'category': 'Certifications'})
+                    matcher.update_item(ckb_id, cert_content, {'title': cert_kb_data['title'], 'category': 'Certifications'})
                 else:
                     ckb_res = supabase.table('knowledge_base').insert(cert_kb_data).execute()
                     if ckb_res.data:
@@ -21,7 +21,7 @@ from app.schemas import (
     MatchSummary,
     MatchBreakdown,
 )
-from app.services.exporter import get_exporter, CompanyProfile
+from app.services.exporter import get_exporter, CompanyProfile, KB_CATEGORIES
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
 
@@ -406,13 +406,11 @@ async def export_document(
     
     # --- Load Knowledge Base for dynamic content ---
     knowledge_base = []
-    kb_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'knowledge_base.json')
-    if os.path.exists(kb_path):
-        try:
-            with open(kb_path, 'r', encoding='utf-8') as f:
-                knowledge_base = json.load(f)
-        except Exception:
-            pass
+    try:
+        from app.services.kb_store import get_kb_store
+        knowledge_base = get_kb_store().items(tenant_id, KB_CATEGORIES)
+    except Exception:
+        pass
     
     # --- Load Match Summary for compliance snapshot ---
     match_summary = None
@@ -1,12 +1,13 @@
 """
 Knowledge Base API Routes
 """
+from dataclasses import asdict
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from app.core.supabase import get_supabase_client
 from app.core.security import get_current_user
-from app.schemas import KnowledgeBaseCreate, KnowledgeBaseUpdate, KnowledgeBaseResponse
-from app.services.matcher import get_matcher
+from app.schemas import KnowledgeBaseCreate, KnowledgeBaseUpdate, KnowledgeBaseResponse, KnowledgeBaseSearch
+from app.services.matcher import get_matcher, is_matcher_ready, matcher_status
 
 router = APIRouter(prefix="/api/knowledge-base", tags=["knowledge-base"])
 
@@ -35,10 +36,29 @@ async def create_item(item: KnowledgeBaseCreate, user: dict = Depends(get_curren
     }).execute()
     new_item = result.data[0]
     matcher = get_matcher()
-    matcher.add_item(item_id=new_item['id'], content=item.content, metadata={'title': item.title, 'category': item.category, 'tenant_id': tenant_id})
+    matcher.add_item(item_id=new_item['id'], content=item.content, metadata={'title': item.title, 'category': item.category, 'tags': item.tags, 'updated_at': new_item.get('updated_at'), 'tenant_id': tenant_id})
     return new_item
 
 
+@router.post("/search")
+async def search_knowledge_base(search: KnowledgeBaseSearch, user: dict = Depends(get_current_user)):
+    """Semantic KB search restricted to the caller's tenant and optional metadata filters."""
+    filters = {
+        'category': search.category,
+        'tags': search.tags,
+        'source': search.source,
+        'updated_after': search.updated_after.isoformat() if search.updated_after else None,
+    }
+    results = await get_matcher().search(
+        search.query,
+        top_k=search.top_k,
+        min_score=search.min_score,
+        tenant_id=user.get('tenant_id'),
+        filters=filters
+    )
+    return [asdict(r) for r in results]
+
+
 @router.put("/{item_id}", response_model=KnowledgeBaseResponse)
 async def update_item(item_id: str, update: KnowledgeBaseUpdate, user: dict = Depends(get_current_user), supabase = Depends(get_supabase_client)):
     tenant_id = user.get('tenant_id')
@@ -55,14 +75,16 @@ async def update_item(item_id: str, update: KnowledgeBaseUpdate, user: dict = De
         update_data['title'] = update.title
     if update.category is not None:
         update_data['category'] = update.category
+    if update.tags is not None:
+        update_data['tags'] = update.tags
     if update_data:
         update_data['version'] = existing.data['version'] + 1
         result = supabase.table('knowledge_base').update(update_data).eq('id', item_id).execute()
-        if update.content:
-            matcher = get_matcher()
-            matcher.remove_item(item_id)
-            matcher.add_item(item_id=item_id, content=update.content, metadata={'title': update.title or existing.data['title'], 'tenant_id': existing.data.get('tenant_id')})
-        return result.data[0]
+        # Metadata-only changes are cheap (no re-encode) and keep search filters current
+        updated = result.data[0]
+        matcher = get_matcher()
+        matcher.update_item(item_id=item_id, content=updated['content'], metadata={'title': updated.get('title'), 'category': updated.get('category'), 'tags': updated.get('tags'), 'updated_at': updated.get('updated_at'), 'tenant_id': existing.data.get('tenant_id')})
+        return updated
     return existing.data
 
 
@@ -80,6 +102,14 @@ async def delete_item(item_id: str, user: dict = Depends(get_current_user), supa
     return {"message": "Item deleted"}
 
 
+@router.get("/stats")
+async def get_index_stats(user: dict = Depends(get_current_user)):
+    """Vector index size and embedding cache hit/miss counters."""
+    if not is_matcher_ready():
+        return {"warmup": matcher_status()}
+    return get_matcher().stats()
+
+
 @router.post("/sync")
 async def sync_knowledge_base(user: dict = Depends(get_current_user), supabase = Depends(get_supabase_client)):
     """Sync FAISS index with all active items across ALL tenants in database to preserve multi-tenancy."""
@@ -88,5 +118,5 @@ async def sync_knowledge_base(user: dict = Depends(get_current_user), supabase =
     
     result = query.execute()
     matcher = get_matcher()
-    matcher.sync_with_database(result.data)
-    return {"message": "Global knowledge base synced", "count": len(result.data)}
+    stats = matcher.sync_with_database(result.data)
+    return {"message": "Global knowledge base synced", "count": len(result.data), **stats}
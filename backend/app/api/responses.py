@@ -192,16 +192,18 @@ async def process_response_generation(
         try:
             matches = req.get('match_results', [])
             
-            # Convert to MatchResult objects
+            # Convert to MatchResult objects (best first: the composer reads matches[0])
             from app.services.matcher import MatchResult
             match_objects = [
                 MatchResult(
                     kb_item_id=m['kb_item_id'],
                     content=m['matched_content'],
                     score=m['match_percentage'] / 100,
-                    rank=m['rank']
+                    rank=m['rank'],
+                    passages=m.get('passages') or [],
+                    lexical_coverage=m.get('lexical_coverage') or 0.0
                 )
-                for m in matches
+                for m in sorted(matches, key=lambda m: m['rank'])
             ]
             
             # Compose response
@@ -214,7 +216,8 @@ async def process_response_generation(
                 priority=req.get('priority', 'Optional'),
                 company_profile=company_profile,
                 past_performance=past_performance,
-                team_profiles=team_profiles
+                team_profiles=team_profiles,
+                language=req.get('language')
             )
             
             # Check if response already exists for this requirement
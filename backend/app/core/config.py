@@ -14,9 +14,65 @@ class Settings(BaseSettings):
     llm_api_key: Optional[str] = None
     llm_model: str = "llama-3.1-70b-versatile"
     
+    # Extraction: mean local confidence below which the LLM extractor is used
+    extraction_confidence_threshold: float = 0.6
+    
     # FAISS
     faiss_index_path: str = "./data/faiss.index"
-    knowledge_base_path: str = "./data/knowledge_base.json"
+    knowledge_base_path: str = "./data/knowledge_base.json"  # legacy, migrated into kb_store_path
+    kb_store_path: str = "./data/kb_store.sqlite3"
+    embeddings_path: str = "./data/embeddings.npy"
+    index_flush_interval_seconds: float = 2.0
+    index_flush_max_pending: int = 100
+    index_reload_interval_seconds: float = 2.0  # poll for other processes' KB writes (0 = off)
+    embedding_batch_size: int = 64
+    
+    # KB items are indexed as sentence-aligned passages; search over-fetches
+    # passages (top_k * fanout) and keeps the best-scoring passage per item
+    kb_passage_max_chars: int = 400
+    kb_passage_fanout: int = 4
+    
+    # Hybrid retrieval: BM25 over KB passages fused with vector ranks (RRF).
+    # A match whose best passage covers this share of the query's words
+    # (IDF-weighted) is treated as exact and skips LLM disambiguation
+    hybrid_search: bool = True
+    hybrid_rrf_k: int = 60
+    lexical_exact_coverage: float = 0.9
+    
+    # Embedding backend: torch (SentenceTransformer) or onnx (int8 onnxruntime export)
+    embedding_backend: str = "torch"
+    onnx_model_dir: str = "./data/onnx/paraphrase-multilingual-MiniLM-L12-v2"
+    onnx_threads: int = 0  # 0 = onnxruntime default
+    
+    # Query embedding cache: in-process LRU (0 disables) plus optional shared Redis tier
+    embedding_cache_size: int = 50000
+    embedding_cache_redis_url: Optional[str] = None
+    embedding_cache_ttl_seconds: int = 604800
+    
+    # Micro-batching: wait this long for concurrent encode requests to join a batch
+    embedding_batch_wait_ms: float = 5.0
+    embedding_queue_size: int = 1024
+    embedding_queue_timeout_seconds: float = 2.0
+    
+    # Load the embedding model and index in the background at API startup
+    matcher_warmup: bool = True
+    
+    # Retrieval sidecar: when set, processes use the model/index served on this Unix socket
+    retrieval_socket: Optional[str] = None
+    retrieval_timeout_seconds: float = 30.0
+    
+    # ANN index: auto picks flat / ivf_flat / ivf_pq by KB size on rebuild
+    ann_index_type: str = "auto"  # auto, flat, hnsw, ivf_flat, ivf_pq
+    ann_nprobe: int = 16
+    ann_ef_search: int = 64
+    ann_hnsw_m: int = 32
+    
+    # Discovery: scrapers run concurrently; a portal's listing scan and each
+    # detail page have their own timeouts, and detail pages are fetched
+    # concurrently up to this many per portal
+    discovery_scraper_timeout_seconds: float = 600.0
+    discovery_detail_timeout_seconds: float = 60.0
+    discovery_detail_concurrency: int = 4
     
     # Server
     host: str = "0.0.0.0"
@@ -1,7 +1,9 @@
 import sys
 import asyncio
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import requests as http_requests
 
 if sys.platform == 'win32':
@@ -10,6 +12,7 @@ if sys.platform == 'win32':
 from app.api import documents, responses, knowledge_base, humanize, discovery, admin
 from app.api.company import routes as company_routes
 from app.core.config import get_settings
+from app.services.matcher import warm_up_matcher, matcher_status, is_matcher_ready
 
 settings = get_settings()
 
@@ -88,8 +91,10 @@ def run_schema_migration():
 
 @app.on_event("startup")
 async def startup_event():
-    """Run migrations on startup."""
-    run_schema_migration()
+    """Run migrations and model warm-up in the background so the API serves immediately."""
+    threading.Thread(target=run_schema_migration, name="schema-check", daemon=True).start()
+    if settings.matcher_warmup:
+        warm_up_matcher()
 
 
 @app.get("/health")
@@ -97,6 +102,13 @@ async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Ready once the embedding model and vector index are loaded."""
+    status = matcher_status()
+    return JSONResponse(status_code=200 if is_matcher_ready() else 503, content=status)
+
+
 @app.get("/")
 async def root():
     return {"message": "Tender Analysis API", "docs": "/docs"}
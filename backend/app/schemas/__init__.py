@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -87,6 +87,7 @@ class RequirementResponse(RequirementBase):
     id: str
     document_id: str
     extraction_order: Optional[int]
+    duplicate_refs: Optional[List[Dict]] = None
     created_at: datetime
 
     class Config:
@@ -181,6 +182,17 @@ class KnowledgeBaseUpdate(BaseModel):
     tags: Optional[List[str]] = None
 
 
+class KnowledgeBaseSearch(BaseModel):
+    query: str
+    top_k: int = 5
+    min_score: float = 0.0
+    # Filters: category in (...), tags contains (all), source in (...), updated after
+    category: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    source: Optional[List[str]] = None
+    updated_after: Optional[datetime] = None
+
+
 class KnowledgeBaseResponse(BaseModel):
     id: str
     title: Optional[str]
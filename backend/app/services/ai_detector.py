@@ -11,8 +11,7 @@ import re
 import random
 import httpx
 from typing import Tuple, List, Dict
-from langdetect import detect, DetectorFactory
-DetectorFactory.seed = 0
+from app.services.language import detect_language, language_name
 
 
 # ============ SYNONYM DATABASE ============
@@ -393,9 +392,10 @@ def remove_ai_markers(text: str) -> Tuple[str, int]:
     return result, count
 
 
-def humanize_text(text: str, intensity: str = "balanced") -> Tuple[str, float, float, List[str]]:
+def humanize_text(text: str, intensity: str = "balanced", lang: str = None) -> Tuple[str, float, float, List[str]]:
     """
     Full humanization pipeline with Multilingual support.
+    Pass `lang` when the caller already knows the text's language.
     Returns: (humanized_text, original_ai_score, new_ai_score, techniques_applied)
     """
     from app.core.config import get_settings
@@ -403,11 +403,8 @@ def humanize_text(text: str, intensity: str = "balanced") -> Tuple[str, float, f
     
     techniques = []
     
-    # 1. Detect Language
-    try:
-        lang = detect(text)
-    except:
-        lang = "en"
+    # 1. Detect Language (memoized; skipped when the caller passes it)
+    lang = lang or detect_language(text)
         
     # Calculate original score (Note: Scoring is primarily English-optimized currently)
     original_score, _ = calculate_ai_score(text)
@@ -418,12 +415,7 @@ def humanize_text(text: str, intensity: str = "balanced") -> Tuple[str, float, f
         try:
             headers = {"Authorization": f"Bearer {settings.llm_api_key}"}
             
-            # Map language codes to names for the prompt
-            lang_map = {
-                "hi": "Hindi", "es": "Spanish", "fr": "French", 
-                "ar": "Arabic", "de": "German", "pt": "Portuguese"
-            }
-            lang_name = lang_map.get(lang, "its original language")
+            lang_name = language_name(lang, "its original language")
             
             prompt = f"""You are a professional editor. Rewrite the following {lang_name} text to sound more human and less like AI. 
 Maintain the exact same meaning and language ({lang_name}). 
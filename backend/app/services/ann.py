@@ -0,0 +1,170 @@
+"""
+ANN Index Factory
+Builds the FAISS index behind VectorMatcher. Small KBs use an exact flat
+scan; larger ones switch to IVF (and IVF-PQ past ~1M vectors) on rebuild.
+IVF-PQ ranks on lossy codes, so `search` re-scores its candidates exactly.
+HNSW is available on request but cannot remove vectors, so removals are
+left to the matcher's tombstone mask until the next rebuild.
+"""
+import math
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import faiss
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Auto-selection thresholds on the number of vectors
+IVF_MIN_VECTORS = 50_000
+PQ_MIN_VECTORS = 1_000_000
+
+# FAISS wants >= 39 training points per centroid; cap the sample at 256
+MIN_POINTS_PER_LIST = 39
+MAX_POINTS_PER_LIST = 256
+
+# IVF-PQ over-fetch: k * factor candidates are re-scored against the stored vectors
+PQ_REFINE_FACTOR = 10
+
+DEFAULT_PARAMS = {"nprobe": 16, "ef_search": 64, "hnsw_m": 32, "pq_m": 48}
+
+
+def _nlist(ntotal: int) -> int:
+    return int(min(65536, max(16, 4 * math.sqrt(ntotal))))
+
+
+def _trainable(ntotal: int) -> bool:
+    return ntotal >= _nlist(ntotal) * MIN_POINTS_PER_LIST
+
+
+def choose_index_type(ntotal: int, configured: str = "auto") -> str:
+    """
+    Resolve the index type for a KB of `ntotal` vectors.
+    IVF types fall back to flat when there are too few vectors to train.
+    """
+    if configured == "auto":
+        if ntotal >= PQ_MIN_VECTORS:
+            configured = "ivf_pq"
+        elif ntotal >= IVF_MIN_VECTORS:
+            configured = "ivf_flat"
+        else:
+            configured = "flat"
+    elif configured not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {configured}")
+
+    if configured.startswith("ivf") and not _trainable(ntotal):
+        return "flat"
+    return configured
+
+
+def build_index(
+    kind: str,
+    dimension: int,
+    embeddings: np.ndarray,
+    labels: Optional[np.ndarray] = None,
+    params: Optional[Dict] = None
+) -> "faiss.IndexIDMap2":
+    """Create, train and fill an index of the given type."""
+    import faiss
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    ntotal = len(embeddings)
+    kind = choose_index_type(ntotal, kind)
+
+    if kind == "hnsw":
+        base = faiss.IndexHNSWFlat(dimension, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+    elif kind in ("ivf_flat", "ivf_pq"):
+        nlist = _nlist(ntotal)
+        quantizer = faiss.IndexFlatIP(dimension)
+        if kind == "ivf_pq":
+            base = faiss.IndexIVFPQ(quantizer, dimension, nlist, params["pq_m"], 8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            base = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+
+        sample = embeddings
+        max_train = nlist * MAX_POINTS_PER_LIST
+        if ntotal > max_train:
+            rows = np.random.default_rng(0).choice(ntotal, max_train, replace=False)
+            sample = embeddings[np.sort(rows)]
+        base.train(np.ascontiguousarray(sample, dtype=np.float32))
+    else:
+        base = faiss.IndexFlatIP(dimension)
+
+    index = faiss.IndexIDMap2(base)
+
+    if ntotal:
+        if labels is None:
+            labels = np.arange(ntotal, dtype=np.int64)
+        index.add_with_ids(np.ascontiguousarray(embeddings, dtype=np.float32), labels)
+
+    apply_search_params(index, params)
+    return index
+
+
+def index_type(index: "faiss.Index") -> str:
+    """Identify the type of a (possibly ID-mapped) index."""
+    import faiss
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def supports_removal(index: "faiss.Index") -> bool:
+    return index_type(index) != "hnsw"
+
+
+def apply_search_params(index: "faiss.Index", params: Dict):
+    """Set query-time knobs (nprobe for IVF, efSearch for HNSW)."""
+    import faiss
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexIVF) and params.get("nprobe"):
+        base.nprobe = int(params["nprobe"])
+    elif isinstance(base, faiss.IndexHNSW) and params.get("ef_search"):
+        base.hnsw.efSearch = int(params["ef_search"])
+
+
+def search(
+    index: "faiss.Index",
+    queries: np.ndarray,
+    k: int,
+    embeddings: np.ndarray,
+    params: Optional["faiss.SearchParameters"] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k (scores, labels) from `index`. For IVF-PQ the top k * PQ_REFINE_FACTOR
+    candidates are re-ranked by exact inner product with `embeddings` (indexed
+    by label); other index types already return exact scores.
+    """
+    if index_type(index) != "ivf_pq":
+        return index.search(queries, k, params=params)
+    _, labels = index.search(queries, min(k * PQ_REFINE_FACTOR, index.ntotal), params=params)
+    return refine(queries, labels, embeddings, k)
+
+
+def refine(queries: np.ndarray, labels: np.ndarray, embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Re-score candidate labels (-1 = none) exactly and keep the top k per query."""
+    found = labels >= 0
+    vectors = np.asarray(embeddings[np.where(found, labels, 0)], dtype=np.float32)
+    scores = np.einsum("nd,nkd->nk", queries, vectors)
+    scores[~found] = -np.inf
+    top = np.argsort(-scores, axis=1)[:, :k]
+    scores = np.take_along_axis(scores, top, axis=1)
+    labels = np.take_along_axis(labels, top, axis=1)
+    labels[np.isneginf(scores)] = -1
+    return scores, labels
+
+
+def search_parameters(index: "faiss.Index", params: Dict, selector=None) -> "faiss.SearchParameters":
+    """Per-call search parameters: the index's query knobs plus an optional ID selector."""
+    import faiss
+    kind = index_type(index)
+    if kind in ("ivf_flat", "ivf_pq"):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=int(params["nprobe"]))
+    if kind == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=int(params["ef_search"]))
+    return faiss.SearchParameters(sel=selector)
@@ -0,0 +1,49 @@
+"""
+KB Passage Chunking
+Splits KB item content into sentence-aligned passages that fit the
+embedding model's input window. Passages are (start, end) character spans
+into the original content, so the text itself is stored only once.
+"""
+import re
+from typing import List, Tuple
+
+# Same sentence boundary the composer uses, plus blank-line paragraph breaks
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    spans, start = [], 0
+    for match in SENTENCE_BREAK.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+    return [(s, e) for s, e in spans if text[s:e].strip()]
+
+
+def split_passages(text: str, max_chars: int = 400) -> List[Tuple[int, int]]:
+    """
+    Greedily pack consecutive sentences into passages of at most max_chars.
+    Sentences longer than that are cut at the last space before the limit.
+    Always returns at least one span, so every item gets a vector.
+    """
+    text = text or ""
+    pieces = []
+    for start, end in _sentence_spans(text):
+        while end - start > max_chars:
+            cut = text.rfind(' ', start + 1, start + max_chars)
+            if cut == -1:
+                cut = start + max_chars
+            pieces.append((start, cut))
+            start = cut
+            while start < end and text[start].isspace():
+                start += 1
+        if start < end:
+            pieces.append((start, end))
+
+    passages: List[Tuple[int, int]] = []
+    for start, end in pieces:
+        if passages and end - passages[-1][0] <= max_chars:
+            passages[-1] = (passages[-1][0], end)
+        else:
+            passages.append((start, end))
+    return passages or [(0, len(text))]
@@ -5,13 +5,13 @@ Enforces AI content percentage limits using advanced detection
 """
 import re
 import httpx
-from langdetect import detect, DetectorFactory
-DetectorFactory.seed = 0 # Consistent detection
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 
 from app.core.config import get_settings
 from app.services.matcher import get_matcher, MatchResult
+from app.services.language import detect_language, language_name
+from app.services.lexical import is_exact_match
 from app.services.ai_detector import (
     calculate_ai_score,
     humanize_text,
@@ -101,7 +101,8 @@ class ResponseComposer:
         priority: str = "Optional",
         company_profile: Dict = None,
         past_performance: List[Dict] = [],
-        team_profiles: List[Dict] = []
+        team_profiles: List[Dict] = [],
+        language: Optional[str] = None
     ) -> ComposedResponse:
         """Compose professional tender response from matched KB content."""
         
@@ -120,12 +121,22 @@ class ResponseComposer:
             print("[COMPOSER] No KB content after selection, using minimal")
             return await self._generate_minimal_response(requirement)
         
-        # Extract only the most relevant sentences from KB content
-        relevant_text = self._extract_relevant_content(requirement, kb_content)
+        # Use the passages the matcher found; keyword overlap is only the
+        # fallback for matches without passages (e.g. saved before they were stored)
+        relevant_text = self._matched_passages(kb_content) or self._extract_relevant_content(requirement, kb_content)
         print(f"[COMPOSER] Extracted relevant text: {len(relevant_text)} chars")
         
+        # Exact-token match (e.g. the certificate or level the requirement
+        # names): the KB text answers it as-is, no LLM round-trip needed
+        exact = (
+            matches[0].lexical_coverage >= settings.lexical_exact_coverage
+            or is_exact_match(requirement, relevant_text)
+        )
+        if exact:
+            print("[COMPOSER] Exact KB match, skipping LLM refinement")
+        
         # If we have good KB content, try LLM refinement first
-        if len(relevant_text) >= 30:
+        if len(relevant_text) >= 30 and not exact:
             # Try to refine with LLM if available (keeping under 30% AI)
             refined = await self._refine_for_tender(
                 requirement, 
@@ -135,7 +146,8 @@ class ResponseComposer:
                 priority=priority,
                 company_profile=company_profile,
                 past_performance=past_performance,
-                team_profiles=team_profiles
+                team_profiles=team_profiles,
+                language=language
             )
             if refined:
                 print("[COMPOSER] Using LLM-refined response")
@@ -152,11 +164,11 @@ class ResponseComposer:
                 kb_percentage=100,
                 ai_percentage=0
             )
-            return self._humanize(composed, mode=mode)
+            return self._humanize(composed, mode=mode, language=language)
         
         # Final fallback: KB-only response (first 2 sentences)
         kb_only = self._compose_kb_only(kb_content, matches)
-        return self._humanize(kb_only, mode=mode)
+        return self._humanize(kb_only, mode=mode, language=language)
     
     def _select_kb_content(self, matches: List[MatchResult]) -> List[Dict]:
         """Select best KB content for response - focused and minimal."""
@@ -168,7 +180,8 @@ class ResponseComposer:
                 selected.append({
                     'id': match.kb_item_id,
                     'content': match.content,
-                    'score': match.score
+                    'score': match.score,
+                    'passages': match.passages
                 })
         
         return selected
@@ -402,6 +415,12 @@ Transition:"""
         
         return kb_pct, ai_pct
     
+    def _matched_passages(self, kb_content: List[Dict]) -> str:
+        """Join the top 2 matched passages of the best KB item for concise responses."""
+        if not kb_content:
+            return ""
+        return ' '.join(p.strip() for p in kb_content[0].get('passages', [])[:2])
+    
     def _extract_relevant_content(self, requirement: str, kb_content: List[Dict]) -> str:
         """Extract only the most relevant sentences from KB content for the requirement."""
         # Split KB content into sentences and score by keyword overlap
@@ -445,7 +464,8 @@ Transition:"""
         priority: str = "Optional",
         company_profile: Dict = None,
         past_performance: List[Dict] = [],
-        team_profiles: List[Dict] = []
+        team_profiles: List[Dict] = [],
+        language: Optional[str] = None
     ) -> Optional[ComposedResponse]:
         """Refine KB content into a professional tender response."""
         
@@ -474,19 +494,10 @@ Transition:"""
             "academic": "Scholarly, precise, and objective with formal vocabulary."
         }.get(tone, "Direct, business-like, and authoritative.")
 
-        # Detect language of the requirement
-        try:
-            req_lang = detect(requirement)
-            lang_map = {
-                "en": "English", "hi": "Hindi", "es": "Spanish", 
-                "fr": "French", "ar": "Arabic", "de": "German",
-                "pt": "Portuguese", "zh-cn": "Chinese (Simplified)"
-            }
-            lang_name = lang_map.get(req_lang, "the same language as the requirement")
-            lang_instr = f"IMPORTANT: Write the response in {lang_name}."
-        except:
-            lang_name = "the same language as the requirement"
-            lang_instr = f"IMPORTANT: Write the response in {lang_name}."
+        # Language comes from document extraction; detect only for ad-hoc requirements
+        req_lang = language or detect_language(requirement)
+        lang_name = language_name(req_lang)
+        lang_instr = f"IMPORTANT: Write the response in {lang_name}."
 
         try:
             headers = {"Authorization": f"Bearer {settings.llm_api_key}"}
@@ -494,7 +505,7 @@ Transition:"""
             
             # ATTEMPT LOOP (paraphrase until AI% < 30%)
             for attempt in range(10):
-                print(f"[REFINE] Attempt {attempt+1}/10 (Lang: {req_lang if 'req_lang' in locals() else 'unknown'})...")
+                print(f"[REFINE] Attempt {attempt+1}/10 (Lang: {req_lang})...")
                 
                 # Adjust prompt for retries
                 if attempt == 0:
@@ -590,7 +601,7 @@ REWRITE:"""
                         )
                         
                         # Apply humanization
-                        humanized = self._humanize(temp_composed, mode=mode)
+                        humanized = self._humanize(temp_composed, mode=mode, language=req_lang)
                         ai_pct = humanized.ai_percentage
                         
                         print(f"[REFINE] Attempt {attempt+1}: AI Score: {ai_pct:.1f}%")
@@ -618,13 +629,19 @@ REWRITE:"""
         
         return None
     
-    def _humanize(self, composed: ComposedResponse, mode: str = "balanced") -> ComposedResponse:
+    def _humanize(
+        self,
+        composed: ComposedResponse,
+        mode: str = "balanced",
+        language: Optional[str] = None
+    ) -> ComposedResponse:
         """Apply humanization to remove AI patterns."""
         
         # Use the advanced humanize_text service
         humanized_text, original_score, new_score, techniques = humanize_text(
             composed.text, 
-            intensity=mode
+            intensity=mode,
+            lang=language
         )
         
         # Apply local replacements as well (tender specific)
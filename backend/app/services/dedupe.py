@@ -0,0 +1,135 @@
+"""
+Near-Duplicate Detection
+MinHash signatures with a banded LSH index, used to collapse requirement
+clauses repeated with small edits across tender sections and annexures.
+Candidates must also agree on their facts (numbers, identifiers, acronyms)
+and on negation, so "INR 50 crore" never folds into "INR 100 crore".
+"""
+import re
+import hashlib
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from app.services.lexical import identifier_terms
+
+NUM_PERM = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_ACRONYM_RE = re.compile(r"\b[A-Z][A-Z0-9]+\b")
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|without|cannot|nor|neither|none)\b|n't\b", re.IGNORECASE)
+
+# Default Jaccard threshold on word-bigram shingles
+DEFAULT_THRESHOLD = 0.8
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    """Deterministic (a, b) coefficients for the universal hash family."""
+    perms = []
+    for i in range(NUM_PERM):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % _MERSENNE_PRIME or 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+_PERMS = _permutations()
+
+
+def shingles(text: str) -> Set[str]:
+    """Word bigram shingles of normalized text (unigrams for one-word text)."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{tokens[i]} {tokens[i + 1]}" for i in range(len(tokens) - 1)}
+
+
+def minhash(features: Set[str]) -> Tuple[int, ...]:
+    """Compute a MinHash signature over a shingle set."""
+    if not features:
+        return tuple([_MAX_HASH] * NUM_PERM)
+
+    hashes = [
+        int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=4).digest(), "big")
+        for f in features
+    ]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMS
+    )
+
+
+def key_terms(text: str) -> Tuple[FrozenSet[str], int]:
+    """
+    What two clauses must share to be duplicates: identifier terms (numbers,
+    "level 5", "iso 27001"), acronyms (ERP vs GIS) and the negation count.
+    """
+    terms = set(identifier_terms(text))
+    terms.update(a.lower() for a in _ACRONYM_RE.findall(text))
+    return frozenset(terms), len(_NEGATION_RE.findall(text))
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashLSH:
+    """
+    Banded LSH index over MinHash signatures.
+    16 bands of 4 rows surface candidate pairs from roughly 0.5 Jaccard
+    upwards; candidates are then verified against the exact Jaccard.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.features: List[Set[str]] = []
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+
+    def _bands(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+            for band in range(NUM_BANDS)
+        ]
+
+    def query(self, features: Set[str], signature: Tuple[int, ...]) -> List[int]:
+        """Return positions of indexed items at or above the Jaccard threshold."""
+        candidates = set()
+        for key in self._bands(signature):
+            candidates.update(self.buckets.get(key, []))
+        return sorted(
+            pos for pos in candidates
+            if jaccard(features, self.features[pos]) >= self.threshold
+        )
+
+    def add(self, features: Set[str], signature: Tuple[int, ...]) -> int:
+        pos = len(self.features)
+        self.features.append(features)
+        for key in self._bands(signature):
+            self.buckets.setdefault(key, []).append(pos)
+        return pos
+
+
+def find_canonicals(texts: List[str], threshold: float = DEFAULT_THRESHOLD) -> List[int]:
+    """
+    Map each text to the position of its canonical (first-seen) near-duplicate.
+    A text that is its own canonical maps to its own position.
+    """
+    index = MinHashLSH(threshold=threshold)
+    canonical_of: List[int] = []
+    keys: List[Tuple[FrozenSet[str], int]] = []
+
+    for pos, text in enumerate(texts):
+        features = shingles(text)
+        signature = minhash(features)
+        key = key_terms(text)
+        matches = [m for m in index.query(features, signature) if keys[m] == key]
+        index.add(features, signature)
+        keys.append(key)
+        canonical_of.append(canonical_of[matches[0]] if matches else pos)
+
+    return canonical_of
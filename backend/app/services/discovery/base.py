@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional
+from urllib.parse import urlparse
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -22,6 +23,11 @@ class BaseScraper(ABC):
         self.source_url = source_url
         self.config = config or {}
 
+    @property
+    def portal(self) -> str:
+        """Portal this scraper talks to; detail-fetch concurrency is limited per portal."""
+        return getattr(self, "portal_name", None) or urlparse(self.source_url).netloc or self.source_url
+
     @abstractmethod
     async def scan(self) -> List[DiscoveredTender]:
         """Scan the portal and return a list of discovered tenders."""
@@ -1,55 +1,116 @@
-from typing import List, Dict, Any
+import json
+import httpx
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
 from datetime import datetime
+from app.core.config import get_settings
 from app.services.matcher import get_matcher
+from app.services.lexical import is_exact_match
 from app.core.supabase import get_supabase
 from app.services.discovery.base import DiscoveredTender
 
+settings = get_settings()
+
 # Minimum match score threshold. Set to 0 to save ALL tenders
 # regardless of relevance score. Users can filter by score in the UI.
 MIN_MATCH_SCORE = 0
 
+# Floor for lexical exact matches: a KB passage naming the tender's exact
+# identifiers is a strong fit even when its cosine score is low, so it must
+# land in the LLM prompt's "strong alignment" band (61-100) and label Related
+EXACT_MATCH_MIN_SCORE = 61
+
+
+@dataclass
+class TenantDiscoveryContext:
+    """
+    Per-scan tenant data for tender matching: discovery config, company
+    profile and competencies, plus a pooled HTTP client for LLM calls.
+    Loaded once per scan instead of once per tender.
+    """
+    tenant_id: str
+    config: Dict[str, Any]
+    company_name: str
+    keywords: List[str]
+    competencies: List[str]
+    http: httpx.AsyncClient = field(default_factory=lambda: httpx.AsyncClient(timeout=30.0))
+
+    @classmethod
+    async def load(cls, tenant_id: str, supabase=None) -> "TenantDiscoveryContext":
+        supabase = supabase or get_supabase()
+        config_res = supabase.table("discovery_config") \
+            .select("*") \
+            .eq("tenant_id", tenant_id) \
+            .execute()
+        config = config_res.data[0] if config_res.data else {}
+
+        # Fetch detailed company profile for core competence context
+        profile_res = supabase.table("company_profiles").select("capabilities, legal_name").eq("tenant_id", tenant_id).limit(1).execute()
+        company_profile = profile_res.data[0] if profile_res.data else {}
+
+        # Combine capabilities with preferred domains
+        competencies = list(set((config.get("preferred_domains") or []) + (company_profile.get("capabilities") or [])))
+
+        return cls(
+            tenant_id=tenant_id,
+            config=config,
+            company_name=company_profile.get("legal_name", "Our Company"),
+            keywords=config.get("keywords") or [],
+            competencies=competencies,
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
 class DiscoveryMatcher:
-    def __init__(self, tenant_id: str):
+    def __init__(self, tenant_id: str, context: Optional[TenantDiscoveryContext] = None):
         self.tenant_id = tenant_id
         self.supabase = get_supabase()
         self.matcher = get_matcher()
+        self.context = context
+
+    async def get_context(self) -> TenantDiscoveryContext:
+        """The tenant context, loaded on first use when none was passed in."""
+        if self.context is None:
+            self.context = await TenantDiscoveryContext.load(self.tenant_id, self.supabase)
+        return self.context
+
+    async def aclose(self):
+        if self.context is not None:
+            await self.context.aclose()
 
     async def match_tender(self, tender: DiscoveredTender) -> Dict[str, Any]:
         """
         AI-based semantic matching using both Vector Store and LLM for enterprise-level accuracy.
         """
-        # 1. Fetch Discovery Config
-        config_res = self.supabase.table("discovery_config") \
-            .select("*") \
-            .eq("tenant_id", self.tenant_id) \
-            .execute()
-        
-        config = config_res.data[0] if config_res.data else {}
-        preferred_domains = config.get("preferred_domains", [])
-        keywords = config.get("keywords", [])
-        
+        # 1. Tenant config, profile and competencies (loaded once per scan)
+        context = await self.get_context()
+        competencies = context.competencies
+        tender_text = f"{tender.title} {tender.description or ''}".lower()
+
         # 2. Vector Match (Against past projects & KB)
         # Search using title + description for better context
-        search_query = f"{tender.title} {tender.description[:200]}"
-        kb_matches = await self.matcher.search(search_query, top_k=3)
+        search_query = f"{tender.title} {(tender.description or '')[:200]}"
+        kb_matches = await self.matcher.search(search_query, top_k=3, tenant_id=self.tenant_id)
         
-        kb_context = "\n".join([f"- {m.content[:300]}..." for m in kb_matches])
+        kb_context = "\n".join([f"- {(m.passages[0] if m.passages else m.content)[:300]}..." for m in kb_matches])
         
-        # 3. LLM Semantic Analysis (The 'Agent' Part)
-        from app.core.config import get_settings
-        settings = get_settings()
+        # 3. Lexical short-circuit: a KB passage holding the exact identifiers the
+        # tender title names (certification, level, bid number) is an obvious match
+        for m in kb_matches:
+            passage = m.passages[0] if m.passages else m.content
+            if m.lexical_coverage >= settings.lexical_exact_coverage or is_exact_match(tender.title, passage):
+                return self._label({
+                    "score": max(EXACT_MATCH_MIN_SCORE, round(100 * max(m.score, m.lexical_coverage))),
+                    "explanation": f"Exact match with knowledge base: {passage[:150]}",
+                    "tags": [d for d in competencies if d.lower() in tender_text]
+                })
         
-        # Fetch detailed company profile for core competence context
-        profile_res = self.supabase.table("company_profiles").select("capabilities, legal_name").eq("tenant_id", self.tenant_id).limit(1).execute()
-        company_profile = profile_res.data[0] if profile_res.data else {}
-        capabilities = company_profile.get("capabilities", [])
-        company_name = company_profile.get("legal_name", "Our Company")
-        
-        # Combine capabilities with preferred domains
-        competencies = list(set(preferred_domains + capabilities))
+        # 4. LLM Semantic Analysis (The 'Agent' Part)
 
         prompt = f"""
-        Analyze the following Tender Discovery for {company_name}.
+        Analyze the following Tender Discovery for {context.company_name}.
         
         COMPANY CORE COMPETENCIES:
         {', '.join(competencies)}
@@ -58,7 +119,7 @@ class DiscoveryMatcher:
         {kb_context if kb_context else "No direct past performance matches found."}
         
         KEYWORDS OF INTEREST:
-        {', '.join(keywords)}
+        {', '.join(context.keywords)}
 
         TENDER DETAILS:
         Title: {tender.title}
@@ -84,34 +145,34 @@ class DiscoveryMatcher:
         """
         
         try:
-            import httpx
-            async with httpx.AsyncClient() as client:
-                res = await client.post(
-                    f"{settings.llm_api_url.rstrip('/')}/chat/completions",
-                    headers={"Authorization": f"Bearer {settings.llm_api_key}"},
-                    json={
-                        "model": settings.llm_model,
-                        "messages": [{"role": "system", "content": "You are an expert procurement consultant. Evaluate tender fit based on company competencies."}, 
-                                    {"role": "user", "content": prompt}],
-                        "response_format": {"type": "json_object"}
-                    },
-                    timeout=30.0
-                )
-                llm_data = res.json()["choices"][0]["message"]["content"]
-                import json
-                result = json.loads(llm_data)
+            res = await context.http.post(
+                f"{settings.llm_api_url.rstrip('/')}/chat/completions",
+                headers={"Authorization": f"Bearer {settings.llm_api_key}"},
+                json={
+                    "model": settings.llm_model,
+                    "messages": [{"role": "system", "content": "You are an expert procurement consultant. Evaluate tender fit based on company competencies."}, 
+                                {"role": "user", "content": prompt}],
+                    "response_format": {"type": "json_object"}
+                }
+            )
+            llm_data = res.json()["choices"][0]["message"]["content"]
+            result = json.loads(llm_data)
         except Exception as e:
             print(f"LLM Match Error: {e}")
             # Fallback to simple keyword-based logic if LLM fails
-            has_keyword_match = any(d.lower() in tender.title.lower() or d.lower() in (tender.description or "").lower() for d in competencies)
+            has_keyword_match = any(d.lower() in tender_text for d in competencies)
             fallback_score = 50 if has_keyword_match else 10
             result = {
                 "score": fallback_score,
                 "relevant": has_keyword_match,
                 "explanation": "Automated domain keyword match (LLM Unavailable)." if has_keyword_match else "No keyword overlap with company knowledge base (LLM Unavailable).",
-                "tags": [d for d in competencies if d.lower() in tender.title.lower() or d.lower() in (tender.description or "").lower()]
+                "tags": [d for d in competencies if d.lower() in tender_text]
             }
 
+        return self._label(result)
+
+    def _label(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the relevance label to a scored result."""
         # Save ALL tenders regardless of score — let the user decide in the UI
         is_relevant = True
 
@@ -132,36 +193,3 @@ class DiscoveryMatcher:
             "label": label,
             "is_relevant": is_relevant
         }
-
-    async def process_and_update_tender(self, tender_id: str):
-        """Fetch tender from DB, match it, and update it."""
-        tender_res = self.supabase.table("discovered_tenders") \
-            .select("*") \
-            .eq("id", tender_id) \
-            .execute()
-        
-        if not tender_res.data:
-            return
-            
-        tender_record = tender_res.data[0]
-        # Convert record to DiscoveredTender object for matcher
-        tender_obj = DiscoveredTender(
-            external_ref_id=tender_record["external_ref_id"],
-            title=tender_record["title"],
-            category=tender_record["category"],
-            description=tender_record["description"],
-            source_portal=tender_record["source_portal"]
-        )
-        
-        match_results = await self.match_tender(tender_obj)
-        
-        self.supabase.table("discovered_tenders") \
-            .update({
-                "match_score": match_results["score"],
-                "match_explanation": match_results["explanation"],
-                "domain_tags": match_results["tags"]
-            }) \
-            .eq("id", tender_id) \
-            .execute()
-        
-        return match_results
@@ -1,14 +1,31 @@
+import asyncio
 import hashlib
 import json
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Tuple
+from app.core.config import get_settings
 from app.core.supabase import get_supabase
 from app.services.discovery.base import DiscoveredTender, BaseScraper
 
+settings = get_settings()
+
+# Scraped tenders waiting to be saved; scrapers pause when saving falls behind
+SAVE_QUEUE_SIZE = 100
+
+# Ref ids per `in_` filter (URL length) and rows per bulk write
+LOOKUP_CHUNK = 200
+WRITE_CHUNK = 500
+
+# Concurrent KB/LLM scoring calls for new tenders
+SCORE_CONCURRENCY = 4
+
 class DiscoveryScanner:
     def __init__(self, tenant_id: str):
         self.tenant_id = tenant_id
         self.supabase = get_supabase()
+        # Shared by every batch of a scan (see _get_discovery_matcher)
+        self._discovery_matcher = None
 
     def generate_content_hash(self, tender: DiscoveredTender) -> str:
         """Create a hash of tender content to detect changes."""
@@ -22,99 +39,162 @@ class DiscoveryScanner:
         return hashlib.sha256(content_str.encode()).hexdigest()
 
     async def save_discovered_tenders(self, tenders: List[DiscoveredTender]):
-        saved_count = 0
-        updated_count = 0
-        skipped_expired = 0
-        skipped_irrelevant = 0
-        
+        """
+        Save a batch of scraped tenders in a handful of round trips: one
+        lookup for the batch's ref ids (hashes compared in memory), bulk
+        upserts of new and changed tenders, then one bulk attachment write.
+        """
+        counts = self._new_counts()
+        now = datetime.now()
+        current: Dict[Tuple[str, str], DiscoveredTender] = {}
         for tender in tenders:
             # --- FILTER 1: Skip expired tenders ---
-            if tender.submission_deadline and tender.submission_deadline < datetime.now():
+            if tender.submission_deadline and tender.submission_deadline < now:
                 print(f"[Scanner] Skipping expired tender: {tender.title} (Deadline: {tender.submission_deadline})")
-                skipped_expired += 1
+                counts["skipped_expired"] += 1
                 continue
+            # A portal listing the same tender twice: the last copy wins
+            current[(tender.external_ref_id, tender.source_portal)] = tender
+        if not current:
+            return counts
+
+        existing = self._existing_tenders({ref for ref, _ in current})
 
+        new_rows, changed_rows = [], []
+        for key, tender in current.items():
             content_hash = self.generate_content_hash(tender)
-            
-            # Check if tender already exists
-            existing = self.supabase.table("discovered_tenders") \
-                .select("id, content_hash, status") \
-                .eq("external_ref_id", tender.external_ref_id) \
-                .eq("source_portal", tender.source_portal) \
+            record = existing.get(key)
+            if record and record["content_hash"] == content_hash:
+                continue
+            row = self._tender_row(tender, content_hash)
+            if record:
+                # If it was rejected, maybe we want to re-evaluate it if it's updated?
+                # For now, just mark it as updated.
+                row["is_updated"] = True
+                changed_rows.append(row)
+            else:
+                new_rows.append(row)
+
+        # --- Score new tenders against company KB ---
+        # Save ALL tenders regardless of score — user filters in UI
+        if new_rows:
+            scores = await self._score_tenders([current[self._key(row)] for row in new_rows])
+            for row, match_results in zip(new_rows, scores):
+                row["match_score"] = match_results["score"]
+                row["match_explanation"] = match_results["explanation"]
+                row["domain_tags"] = match_results.get("tags", [])
+
+        # New and changed rows carry different columns: one upsert each
+        ids: Dict[Tuple[str, str], str] = {}
+        for rows, counter in ((new_rows, "saved"), (changed_rows, "updated")):
+            written = self._upsert_tenders(rows)
+            counts[counter] += len(written)
+            ids.update(written)
+
+        await self._replace_attachments({
+            ids[key]: tender.attachments
+            for key, tender in current.items()
+            if key in ids and tender.attachments
+        })
+        return counts
+
+    @staticmethod
+    def _new_counts() -> Dict[str, int]:
+        return {"saved": 0, "updated": 0, "skipped_expired": 0, "skipped_irrelevant": 0}
+
+    @staticmethod
+    def _key(record: Dict[str, Any]) -> Tuple[str, str]:
+        return record["external_ref_id"], record["source_portal"]
+
+    def _existing_tenders(self, ref_ids: Set[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """This tenant's stored tenders for the given ref ids, keyed by (ref id, portal)."""
+        refs = sorted(ref_ids)
+        found = {}
+        for start in range(0, len(refs), LOOKUP_CHUNK):
+            result = self.supabase.table("discovered_tenders") \
+                .select("id, external_ref_id, source_portal, content_hash") \
+                .eq("tenant_id", self.tenant_id) \
+                .in_("external_ref_id", refs[start:start + LOOKUP_CHUNK]) \
                 .execute()
-            
-            tender_data = {
-                "external_ref_id": tender.external_ref_id,
-                "title": tender.title,
-                "authority": tender.authority,
-                "publish_date": tender.publish_date.isoformat() if tender.publish_date else None,
-                "submission_deadline": tender.submission_deadline.isoformat() if tender.submission_deadline else None,
-                "category": tender.category,
-                "department": tender.department,
-                "source_portal": tender.source_portal,
-                "location": tender.location,
-                "description": tender.description,
-                "content_hash": content_hash,
-                "tenant_id": self.tenant_id,
-                "last_scanned_at": datetime.now().isoformat()
-            }
+            for record in result.data or []:
+                found[self._key(record)] = record
+        return found
 
-            if existing.data:
-                # Update if content changed
-                record = existing.data[0]
-                if record["content_hash"] != content_hash:
-                    tender_data["is_updated"] = True
-                    # If it was rejected, maybe we want to re-evaluate it if it's updated?
-                    # For now, just mark it as updated.
-                    self.supabase.table("discovered_tenders") \
-                        .update(tender_data) \
-                        .eq("id", record["id"]) \
-                        .execute()
-                    updated_count += 1
-                    
-                    # Also update attachments
-                    await self._update_attachments(record["id"], tender.attachments)
-            else:
-                # --- Score the tender against company KB ---
-                from app.services.discovery.matcher import DiscoveryMatcher
-                matcher = DiscoveryMatcher(self.tenant_id)
+    def _tender_row(self, tender: DiscoveredTender, content_hash: str) -> Dict[str, Any]:
+        return {
+            "external_ref_id": tender.external_ref_id,
+            "title": tender.title,
+            "authority": tender.authority,
+            "publish_date": tender.publish_date.isoformat() if tender.publish_date else None,
+            "submission_deadline": tender.submission_deadline.isoformat() if tender.submission_deadline else None,
+            "category": tender.category,
+            "department": tender.department,
+            "source_portal": tender.source_portal,
+            "location": tender.location,
+            "description": tender.description,
+            "content_hash": content_hash,
+            "tenant_id": self.tenant_id,
+            "last_scanned_at": datetime.now().isoformat()
+        }
+
+    async def _get_discovery_matcher(self):
+        """One DiscoveryMatcher per scan: tenant config, profile and HTTP client are loaded once."""
+        if self._discovery_matcher is None:
+            from app.services.discovery.matcher import DiscoveryMatcher, TenantDiscoveryContext
+            context = await TenantDiscoveryContext.load(self.tenant_id, self.supabase)
+            self._discovery_matcher = DiscoveryMatcher(self.tenant_id, context)
+        return self._discovery_matcher
+
+    async def close(self):
+        """Release the scan's matcher resources (pooled HTTP client)."""
+        if self._discovery_matcher is not None:
+            await self._discovery_matcher.aclose()
+            self._discovery_matcher = None
+
+    async def _score_tenders(self, tenders: List[DiscoveredTender]) -> List[Dict[str, Any]]:
+        """Match new tenders against the KB, a few LLM calls at a time."""
+        unavailable = {"score": 10, "explanation": "Matching unavailable", "tags": []}
+        try:
+            matcher = await self._get_discovery_matcher()
+        except Exception as match_err:
+            print(f"[Scanner] Matcher failed, saving with default score: {match_err}")
+            return [dict(unavailable) for _ in tenders]
+        semaphore = asyncio.Semaphore(SCORE_CONCURRENCY)
+
+        async def score(tender: DiscoveredTender) -> Dict[str, Any]:
+            async with semaphore:
                 try:
-                    match_results = await matcher.match_tender(tender)
+                    return await matcher.match_tender(tender)
                 except Exception as match_err:
                     print(f"[Scanner] Matcher failed, saving with default score: {match_err}")
-                    match_results = {"score": 10, "explanation": "Matching unavailable", "tags": []}
-                
-                # Save ALL tenders regardless of score — user filters in UI
-                tender_data["match_score"] = match_results["score"]
-                tender_data["match_explanation"] = match_results["explanation"]
-                tender_data["domain_tags"] = match_results.get("tags", [])
-                
-                result = self.supabase.table("discovered_tenders") \
-                    .insert(tender_data) \
-                    .execute()
-                
-                if result.data:
-                    new_id = result.data[0]["id"]
-                    await self._update_attachments(new_id, tender.attachments)
-                    saved_count += 1
-        
-        return {
-            "saved": saved_count, 
-            "updated": updated_count,
-            "skipped_expired": skipped_expired,
-            "skipped_irrelevant": skipped_irrelevant
-        }
+                    return dict(unavailable)
+
+        return await asyncio.gather(*(score(tender) for tender in tenders))
+
+    def _upsert_tenders(self, rows: List[Dict[str, Any]]) -> Dict[Tuple[str, str], str]:
+        """Bulk upsert on (external_ref_id, source_portal, tenant_id); returns ids by key."""
+        ids = {}
+        for start in range(0, len(rows), WRITE_CHUNK):
+            result = self.supabase.table("discovered_tenders") \
+                .upsert(rows[start:start + WRITE_CHUNK], on_conflict="external_ref_id,source_portal,tenant_id") \
+                .execute()
+            for record in result.data or []:
+                ids[self._key(record)] = record["id"]
+        return ids
 
-    async def _update_attachments(self, tender_id: str, attachments: List[Dict[str, str]]):
+    async def _replace_attachments(self, attachments: Dict[str, List[Dict[str, str]]]):
+        """Replace the attachments of several tenders with one delete and one insert."""
         if not attachments:
             return
-            
-        # Clear old attachments for this tender (simplified)
-        self.supabase.table("tender_attachments") \
-            .delete() \
-            .eq("tender_id", tender_id) \
-            .execute()
-            
+
+        # Clear old attachments for these tenders (simplified)
+        tender_ids = list(attachments)
+        for start in range(0, len(tender_ids), LOOKUP_CHUNK):
+            self.supabase.table("tender_attachments") \
+                .delete() \
+                .in_("tender_id", tender_ids[start:start + LOOKUP_CHUNK]) \
+                .execute()
+
         # Add new ones
         attachment_records = [
             {
@@ -123,23 +203,115 @@ class DiscoveryScanner:
                 "external_url": a.get("url"),
                 "file_type": a.get("url", "").split(".")[-1].upper() if "." in a.get("url", "") else "UNKNOWN"
             }
-            for a in attachments
+            for tender_id, items in attachments.items()
+            for a in items
         ]
-        
-        self.supabase.table("tender_attachments") \
-            .insert(attachment_records) \
-            .execute()
+        for start in range(0, len(attachment_records), WRITE_CHUNK):
+            self.supabase.table("tender_attachments") \
+                .insert(attachment_records[start:start + WRITE_CHUNK]) \
+                .execute()
 
     async def run_discovery(self, scrapers: List[BaseScraper]):
-        all_results = []
+        """
+        Run all scrapers concurrently and save tenders as they arrive.
+        Each scraper's listing scan and detail fetches are timed out and its
+        failures stay isolated; detail pages are fetched concurrently, bounded
+        per portal.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SAVE_QUEUE_SIZE)
+        semaphores: Dict[str, asyncio.Semaphore] = {}
         for scraper in scrapers:
-            try:
-                tenders = await scraper.scan()
-                for tender in tenders:
-                    # Get full details if needed
-                    detailed_tender = await scraper.get_details(tender)
-                    all_results.append(detailed_tender)
-            except Exception as e:
-                print(f"Error running scraper {scraper.__class__.__name__}: {str(e)}")
-        
-        return await self.save_discovered_tenders(all_results)
+            limit = scraper.config.get("detail_concurrency", settings.discovery_detail_concurrency)
+            semaphores.setdefault(scraper.portal, asyncio.Semaphore(limit))
+
+        reports: List[Dict[str, Any]] = []
+        producers = [
+            asyncio.create_task(self._run_scraper(scraper, semaphores[scraper.portal], queue, reports))
+            for scraper in scrapers
+        ]
+
+        counts = {**self._new_counts(), "errors": 0}
+        remaining = len(producers)
+        try:
+            while remaining:
+                # Wait for the next tender, then take whatever else has queued up
+                # meanwhile, so saves batch up while scrapers keep running
+                items = [await queue.get()]
+                while not queue.empty() and len(items) < SAVE_QUEUE_SIZE:
+                    items.append(queue.get_nowait())
+                # None marks one scraper finished (or failed)
+                remaining -= items.count(None)
+                batch = [tender for tender in items if tender is not None]
+                if not batch:
+                    continue
+                try:
+                    for key, value in (await self.save_discovered_tenders(batch)).items():
+                        counts[key] += value
+                except Exception as e:
+                    counts["errors"] += len(batch)
+                    print(f"[Scanner] Failed to save {len(batch)} tenders: {e}")
+        finally:
+            for producer in producers:
+                producer.cancel()
+            await self.close()
+
+        return {**counts, "scrapers": reports}
+
+    async def _run_scraper(
+        self,
+        scraper: BaseScraper,
+        semaphore: asyncio.Semaphore,
+        queue: asyncio.Queue,
+        reports: List[Dict[str, Any]]
+    ):
+        """Scan one portal, queueing tenders as details arrive; always ends with None."""
+        report = {"scraper": scraper.__class__.__name__, "portal": scraper.portal,
+                  "found": 0, "queued": 0, "detail_errors": 0, "error": None}
+        reports.append(report)
+        started = time.monotonic()
+        try:
+            await self._scrape(scraper, semaphore, queue, report)
+        except Exception as e:
+            report["error"] = str(e)
+        finally:
+            report["seconds"] = round(time.monotonic() - started, 2)
+            if report["error"]:
+                print(f"Error running scraper {report['scraper']}: {report['error']}")
+            await queue.put(None)
+
+    async def _scrape(
+        self,
+        scraper: BaseScraper,
+        semaphore: asyncio.Semaphore,
+        queue: asyncio.Queue,
+        report: Dict[str, Any]
+    ):
+        # Only the portal calls are timed: waiting for room in the save queue
+        # is backpressure from the saver, not a slow portal
+        scan_timeout = scraper.config.get("timeout_seconds", settings.discovery_scraper_timeout_seconds)
+        try:
+            tenders = await asyncio.wait_for(scraper.scan(), scan_timeout)
+        except asyncio.TimeoutError:
+            report["error"] = f"timed out after {scan_timeout}s"
+            return
+        report["found"] = len(tenders)
+        timeout = scraper.config.get("detail_timeout_seconds", settings.discovery_detail_timeout_seconds)
+
+        async def fetch_details(tender: DiscoveredTender) -> DiscoveredTender:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(scraper.get_details(tender), timeout)
+                except Exception as e:
+                    # Keep the listing data; a later scan picks up the details
+                    report["detail_errors"] += 1
+                    print(f"[Scanner] Details failed for {tender.external_ref_id}: {e!r}")
+                    return tender
+
+        tasks = [asyncio.create_task(fetch_details(tender)) for tender in tenders]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                await queue.put(await next_done)
+                report["queued"] += 1
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,130 @@
+"""
+Embedding Backends
+Sentence embeddings for the matcher, either through PyTorch
+SentenceTransformer or an int8-quantized ONNX export of the same model under
+onnxruntime. The ONNX backend avoids importing torch entirely, which cuts
+per-process memory and startup time on CPU-only workers.
+"""
+import os
+import importlib.util
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+
+# Checked without importing: onnxruntime is only loaded when selected
+ONNX_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None for name in ("onnxruntime", "tokenizers")
+)
+
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# File names written by scripts/export_onnx_embedder.py
+ONNX_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# SentenceTransformer's max_seq_length for this model
+MAX_SEQ_LENGTH = 128
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class TorchEmbedder:
+    """SentenceTransformer (PyTorch) backend."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        # Imported here so the ONNX backend never pays for torch
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode texts into L2-normalized float32 embeddings."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return _normalize(self.model.encode(texts, batch_size=batch_size))
+
+
+class OnnxEmbedder:
+    """
+    onnxruntime backend over an int8-quantized export of the same model.
+    Texts are sorted by token length and padded per batch, so short
+    requirements don't pay for the longest one in the request.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir: str, threads: int = 0):
+        if not ONNX_AVAILABLE:
+            raise RuntimeError("onnxruntime and tokenizers are required for the onnx embedding backend")
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def _run(self, encodings) -> np.ndarray:
+        length = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), length), dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, as SentenceTransformer does
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode texts into L2-normalized float32 embeddings."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(list(texts))
+        order = np.argsort([len(e.ids) for e in encodings], kind="stable")
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            embeddings[rows] = self._run([encodings[i] for i in rows])
+        return _normalize(embeddings)
+
+
+def get_embedder(model_name: str = DEFAULT_MODEL, backend: Optional[str] = None):
+    """Create the configured embedding backend, falling back to torch if ONNX is unusable."""
+    settings = get_settings()
+    backend = backend or settings.embedding_backend
+
+    if backend == "onnx":
+        try:
+            embedder = OnnxEmbedder(settings.onnx_model_dir, threads=settings.onnx_threads)
+            print(f"[EMBEDDING] Using ONNX backend from {settings.onnx_model_dir}")
+            return embedder
+        except Exception as e:
+            print(f"[EMBEDDING] ONNX backend unavailable ({e}), falling back to torch")
+
+    return TorchEmbedder(model_name)
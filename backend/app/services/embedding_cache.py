@@ -0,0 +1,165 @@
+"""
+Embedding Cache
+Two-tier cache in front of the embedding backend: an in-process LRU and an
+optional Redis tier shared by API and worker processes. Keys are hashes of
+whitespace/Unicode-normalized text; vectors are stored as float16 bytes.
+"""
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used both as the cache key and as the text encoded."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def _decode(blob: bytes) -> np.ndarray:
+    vector = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+    # float16 rounding shifts the norm slightly; keep vectors unit length
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class EmbeddingCache:
+    """
+    Caches encode() results per text. Every returned vector is decoded from
+    its float16 form, so a text embeds identically whether it hit or missed.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str], int], np.ndarray],
+        dimension: int,
+        namespace: str,
+        capacity: int = 50000,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 7 * 24 * 3600
+    ):
+        self.encode_fn = encode_fn
+        self.dimension = dimension
+        self.namespace = namespace
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._lru: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"lru_hits": 0, "redis_hits": 0, "misses": 0, "redis_errors": 0}
+
+        self._redis = None
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+                self._redis.ping()
+            except Exception as e:
+                print(f"[EMBEDDING CACHE] Redis tier disabled: {e}")
+                self._redis = None
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return f"emb:{self.namespace}:{digest}"
+
+    def _lru_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            blob = self._lru.get(key)
+            if blob is not None:
+                self._lru.move_to_end(key)
+            return blob
+
+    def _lru_put(self, key: str, blob: bytes):
+        with self._lock:
+            self._lru[key] = blob
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.capacity:
+                self._lru.popitem(last=False)
+
+    def _redis_get(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not self._redis or not keys:
+            return [None] * len(keys)
+        try:
+            return self._redis.mget(keys)
+        except Exception:
+            self._counters["redis_errors"] += 1
+            return [None] * len(keys)
+
+    def _redis_put(self, blobs: Dict[str, bytes]):
+        if not self._redis or not blobs:
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key, blob in blobs.items():
+                pipe.set(key, blob, ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception:
+            self._counters["redis_errors"] += 1
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode texts, computing only those missing from both tiers."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        normalized = [normalize_text(t) for t in texts]
+        keys = [self._key(t) for t in normalized]
+        found: Dict[str, bytes] = {}
+
+        # Tier 1: in-process LRU (duplicates within the batch count once)
+        unique = list(dict.fromkeys(keys))
+        pending = []
+        for key in unique:
+            blob = self._lru_get(key)
+            if blob is not None:
+                found[key] = blob
+            else:
+                pending.append(key)
+        self._counters["lru_hits"] += len(unique) - len(pending)
+
+        # Tier 2: shared Redis
+        if pending:
+            missing = []
+            for key, blob in zip(pending, self._redis_get(pending)):
+                if blob is not None:
+                    found[key] = blob
+                    self._lru_put(key, blob)
+                else:
+                    missing.append(key)
+            self._counters["redis_hits"] += len(pending) - len(missing)
+            pending = missing
+
+        # Miss: encode once per distinct text
+        if pending:
+            text_of = dict(zip(keys, normalized))
+            embeddings = self.encode_fn([text_of[k] for k in pending], batch_size)
+            fresh = {
+                key: np.asarray(vector, dtype=np.float16).tobytes()
+                for key, vector in zip(pending, embeddings)
+            }
+            for key, blob in fresh.items():
+                self._lru_put(key, blob)
+            self._redis_put(fresh)
+            found.update(fresh)
+            self._counters["misses"] += len(pending)
+
+        return np.stack([_decode(found[key]) for key in keys])
+
+    def stats(self) -> Dict:
+        lookups = self._counters["lru_hits"] + self._counters["redis_hits"] + self._counters["misses"]
+        hits = lookups - self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "lru_size": len(self._lru),
+            "lru_capacity": self.capacity,
+            "redis_enabled": self._redis is not None,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
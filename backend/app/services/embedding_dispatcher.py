@@ -0,0 +1,235 @@
+"""
+Embedding Dispatcher
+Micro-batches concurrent encode requests: requests arriving within a few
+milliseconds are merged into one batch, encoded on a dedicated worker
+thread, and each caller's future is resolved with its own rows. Keeps the
+event loop free and lets throughput scale with batch size under load.
+Bulk KB encodes (cache=False) run in max_batch chunks, with queued query
+requests served between chunks so a large sync never stalls search.
+"""
+import time
+import queue
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+import numpy as np
+
+
+class EmbeddingQueueFull(RuntimeError):
+    """Raised when the dispatcher queue stays full past the submit timeout."""
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    cache: bool
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    # Bulk progress: texts encoded so far and their embedding chunks
+    done: int = 0
+    parts: List[np.ndarray] = field(default_factory=list)
+
+
+class EmbeddingDispatcher:
+    """
+    Single worker thread in front of an encode function.
+    The queue is bounded: when it is full, callers wait up to
+    `submit_timeout` and then get EmbeddingQueueFull (back-pressure).
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[..., np.ndarray],
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 1024,
+        submit_timeout: float = 2.0,
+        dimension: int = 0
+    ):
+        self.encode_fn = encode_fn
+        self.dimension = dimension
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.submit_timeout = submit_timeout
+        self._queue: "queue.Queue[_Request]" = queue.Queue(maxsize=max_queue)
+        # Uncached requests being encoded chunk by chunk (worker thread only)
+        self._bulk: "deque[_Request]" = deque()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._metrics = {
+            "requests": 0, "texts": 0, "batches": 0, "rejected": 0, "errors": 0,
+            "max_batch_texts": 0, "wait_ms_total": 0.0, "encode_ms_total": 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-dispatcher", daemon=True)
+                    self._thread.start()
+
+    # --- Submission ---
+
+    def _empty(self) -> Future:
+        """An already-resolved future for a request with no texts (never queued)."""
+        future = Future()
+        future.set_result(np.zeros((0, self.dimension), dtype=np.float32))
+        return future
+
+    def submit(self, texts: List[str], cache: bool = True) -> Future:
+        """Queue texts for encoding, blocking up to submit_timeout if the queue is full."""
+        if not texts:
+            return self._empty()
+        self._ensure_worker()
+        request = _Request(list(texts), cache)
+        try:
+            self._queue.put(request, timeout=self.submit_timeout)
+        except queue.Full:
+            self._metrics["rejected"] += 1
+            raise EmbeddingQueueFull(f"Embedding queue full ({self._queue.maxsize} requests)")
+        return request.future
+
+    def encode(self, texts: List[str], cache: bool = True) -> np.ndarray:
+        """Blocking encode through the dispatcher (for worker threads and sync code)."""
+        return self.submit(texts, cache).result()
+
+    async def encode_async(self, texts: List[str], cache: bool = True) -> np.ndarray:
+        """Encode without blocking the event loop; waits for queue space asynchronously."""
+        if not texts:
+            return self._empty().result()
+        self._ensure_worker()
+        request = _Request(list(texts), cache)
+        deadline = time.monotonic() + self.submit_timeout
+        while True:
+            try:
+                self._queue.put_nowait(request)
+                break
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    self._metrics["rejected"] += 1
+                    raise EmbeddingQueueFull(f"Embedding queue full ({self._queue.maxsize} requests)")
+                await asyncio.sleep(0.005)
+        return await asyncio.wrap_future(request.future)
+
+    # --- Worker ---
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        """Gather requests until the batch is full or the wait window closes."""
+        batch, size = [first], len(first.texts)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _drain(self) -> List[_Request]:
+        """Take requests already queued, without waiting, up to one batch of texts."""
+        batch, size = [], 0
+        while size < self.max_batch:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            # Mid bulk encode, only pick up what is already waiting
+            batch = self._drain() if self._bulk else self._collect(self._queue.get())
+            started = time.perf_counter()
+            # Skip callers that gave up (e.g. a cancelled request task)
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            self._metrics["requests"] += len(batch)
+            self._metrics["wait_ms_total"] += sum((started - r.enqueued_at) * 1000 for r in batch)
+
+            # Cached (query) requests encode now; uncached (KB write) requests
+            # join the bulk queue and advance one chunk per loop
+            queries = [r for r in batch if r.cache]
+            if queries:
+                self._encode_group(queries)
+            self._bulk.extend(r for r in batch if not r.cache)
+            if self._bulk:
+                self._encode_bulk_chunk()
+
+    def _encode(self, texts: List[str], cache: bool) -> np.ndarray:
+        started = time.perf_counter()
+        embeddings = self.encode_fn(texts, cache=cache)
+        m = self._metrics
+        m["batches"] += 1
+        m["texts"] += len(texts)
+        m["max_batch_texts"] = max(m["max_batch_texts"], len(texts))
+        m["encode_ms_total"] += (time.perf_counter() - started) * 1000
+        return embeddings
+
+    def _encode_group(self, group: List[_Request]):
+        texts = [t for r in group for t in r.texts]
+        try:
+            embeddings = self._encode(texts, cache=True)
+        except Exception as e:
+            self._metrics["errors"] += 1
+            for request in group:
+                request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in group:
+            request.future.set_result(embeddings[offset:offset + len(request.texts)])
+            offset += len(request.texts)
+
+    def _encode_bulk_chunk(self):
+        """Encode the next max_batch texts of the bulk queue; resolve requests it completes."""
+        chunk, texts = [], []
+        for request in self._bulk:
+            room = self.max_batch - len(texts)
+            if room <= 0:
+                break
+            end = min(len(request.texts), request.done + room)
+            chunk.append((request, end))
+            texts.extend(request.texts[request.done:end])
+
+        try:
+            embeddings = self._encode(texts, cache=False)
+        except Exception as e:
+            self._metrics["errors"] += 1
+            for request, _ in chunk:
+                self._bulk.remove(request)
+                request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request, end in chunk:
+            request.parts.append(embeddings[offset:offset + end - request.done])
+            offset += end - request.done
+            request.done = end
+        while self._bulk and self._bulk[0].done == len(self._bulk[0].texts):
+            request = self._bulk.popleft()
+            request.future.set_result(np.concatenate(request.parts))
+
+    def stats(self) -> Dict:
+        m = self._metrics
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "requests": m["requests"],
+            "texts": m["texts"],
+            "batches": m["batches"],
+            "rejected": m["rejected"],
+            "errors": m["errors"],
+            "avg_batch_texts": round(m["texts"] / m["batches"], 2) if m["batches"] else 0.0,
+            "max_batch_texts": m["max_batch_texts"],
+            "avg_queue_wait_ms": round(m["wait_ms_total"] / m["requests"], 3) if m["requests"] else 0.0,
+            "avg_encode_ms": round(m["encode_ms_total"] / m["batches"], 3) if m["batches"] else 0.0,
+        }
@@ -55,6 +55,10 @@ class CompanyProfile:
         )
 
 
+# KB categories the export sections draw on
+KB_CATEGORIES = ['Certifications', 'Financial', 'Legal']
+
+
 class ExportService:
     """Generate enterprise-grade DOCX bid submissions with dynamic data."""
     
@@ -62,6 +66,11 @@ class ExportService:
         self.company = company or CompanyProfile()
         self.kb = knowledge_base or []
         
+        # Category posting list built once: sections look items up by category
+        self._kb_by_category: Dict[str, List[Dict]] = {}
+        for item in self.kb:
+            self._kb_by_category.setdefault((item.get('category') or '').lower(), []).append(item)
+        
         # Font settings
         self.font_primary = "Calibri"
         self.font_heading = "Cambria"
@@ -85,7 +94,7 @@ class ExportService:
     
     def _get_kb_items(self, category: str) -> List[Dict]:
         """Get knowledge base items by category."""
-        return [item for item in self.kb if item.get('category', '').lower() == category.lower()]
+        return self._kb_by_category.get(category.lower(), [])
     
     def _setup_styles(self, doc: Document):
         """Configure document styles for enterprise look."""
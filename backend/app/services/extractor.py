@@ -1,12 +1,14 @@
 import re
 import json
+import asyncio
 import httpx
 from typing import List, Dict, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from langdetect import detect, DetectorFactory
-DetectorFactory.seed = 0
 from app.core.config import get_settings
+from app.services.segmenter import iter_sentence_spans, iter_page_sentences
+from app.services.dedupe import find_canonicals
+from app.services.language import detect_language, detect_page_languages
 
 
 class RequirementCategory(str, Enum):
@@ -24,6 +26,8 @@ class ExtractedRequirement:
     page_number: int | None
     order: int
     priority: str = "Optional"
+    language: str = "en"
+    duplicates: List[Dict] = field(default_factory=list)  # Near-duplicate variants collapsed into this one
 
 
 class RequirementExtractor:
@@ -33,6 +37,7 @@ class RequirementExtractor:
         settings = get_settings()
         self.llm_url = settings.llm_api_url
         self.llm_key = settings.llm_api_key
+        self.confidence_threshold = settings.extraction_confidence_threshold
         
         # Eligibility patterns
         self.eligibility_patterns = [
@@ -115,16 +120,49 @@ class RequirementExtractor:
         self.compliance_re = [re.compile(p, re.IGNORECASE) for p in self.compliance_patterns]
         self.indicator_re = [re.compile(p, re.IGNORECASE) for p in self.requirement_indicators]
     
-    async def extract(self, text: str, pages: List[Dict] = None) -> List[ExtractedRequirement]:
+    async def extract(
+        self,
+        text: str,
+        pages: List[Dict] = None,
+        language: Optional[str] = None
+    ) -> List[ExtractedRequirement]:
         """Extract requirements from document text."""
+        # Detect language once per document (callers may pass it in)
+        lang = language or detect_language(text)
+        print(f"[EXTRACTOR] Document language: {lang}")
+        
+        requirements = await self._extract_candidates(text, lang, pages)
+        
+        # Tag requirements with their page's language for mixed-language tenders
+        page_languages = detect_page_languages(pages, lang) if pages else {}
+        for req in requirements:
+            req.language = page_languages.get(req.page_number, lang)
+        
+        return self._collapse_near_duplicates(requirements)
+    
+    def _collapse_near_duplicates(self, requirements: List[ExtractedRequirement]) -> List[ExtractedRequirement]:
+        """Fold near-duplicate clauses into their first occurrence."""
+        if len(requirements) < 2:
+            return requirements
+        
+        canonical_of = find_canonicals([r.text for r in requirements])
+        
+        collapsed = []
+        for pos, req in enumerate(requirements):
+            canonical = requirements[canonical_of[pos]]
+            if canonical is req:
+                req.order = len(collapsed)
+                collapsed.append(req)
+            else:
+                canonical.duplicates.append({'text': req.text, 'page_number': req.page_number})
+        
+        if len(collapsed) < len(requirements):
+            print(f"[EXTRACTOR] Collapsed {len(requirements) - len(collapsed)} near-duplicate requirements")
+        return collapsed
+    
+    async def _extract_candidates(self, text: str, lang: str, pages: List[Dict] = None) -> List[ExtractedRequirement]:
+        """Run regex extraction, falling back to the LLM when needed."""
         
-        # Detect language
-        try:
-            lang = detect(text[:2000]) # Scan first 2k chars
-            print(f"[EXTRACTOR] Detected language: {lang}")
-        except:
-            lang = "en"
-            
         # If not English and Mistral is available, use LLM extraction
         if lang != "en" and self.llm_key:
             print(f"[EXTRACTOR] User non-English detection, switching to LLM extraction")
@@ -134,12 +172,16 @@ class RequirementExtractor:
         seen_texts = set()
         order = 0
         
-        # Split into sentences
-        sentences = self._split_sentences(text)
-        print(f"[EXTRACTOR] Total sentences found: {len(sentences)}")
+        # Stream sentences page by page when pages line up with the raw text,
+        # so page numbers come straight from the segmenter
+        if pages and self._pages_match_text(text, pages):
+            sentence_stream = iter_page_sentences(pages)
+        else:
+            sentence_stream = ((None, text[start:end]) for start, end in iter_sentence_spans(text))
         
-        for sentence in sentences:
-            sentence = sentence.strip()
+        scanned = 0
+        for stream_page, sentence in sentence_stream:
+            scanned += 1
             
             # Skip short or duplicate sentences
             if len(sentence) < 10 or sentence.lower() in seen_texts:
@@ -159,7 +201,9 @@ class RequirementExtractor:
             category, confidence, subcategory, priority = self._categorize(sentence)
             
             # Find page number if pages provided
-            page_num = self._find_page_number(sentence, pages) if pages else None
+            page_num = stream_page
+            if page_num is None and pages:
+                page_num = self._find_page_number(sentence, pages)
             
             requirements.append(ExtractedRequirement(
                 text=sentence,
@@ -177,14 +221,41 @@ class RequirementExtractor:
             if order >= 100: # Increased limit to capture more questions
                 break
         
-        # If no requirements found by regex OR we have Very Large Text, try LLM for better accuracy
-        if (not requirements or len(text) > 10000) and self.llm_key:
+        print(f"[EXTRACTOR] Sentences scanned: {scanned}")
+        
+        # Only pay for the LLM round-trip when regex found nothing or the
+        # local model is not confident in what regex found (scored off the
+        # event loop: it is a synchronous model call)
+        if self.llm_key and (
+            not requirements or await asyncio.to_thread(self._needs_llm, requirements, text)
+        ):
              llm_reqs = await self._extract_llm(text, lang, pages)
              if llm_reqs:
                  return llm_reqs
               
         return requirements
 
+    def _needs_llm(self, requirements: List[ExtractedRequirement], text: str) -> bool:
+        """Score regex candidates locally and decide whether LLM extraction is needed."""
+        try:
+            from app.services.requirement_classifier import get_requirement_classifier
+            classifier = get_requirement_classifier()
+            scores = classifier.score(
+                [r.text for r in requirements],
+                [r.category.value for r in requirements]
+            )
+        except Exception as e:
+            # Embedding model unavailable - fall back to the size heuristic
+            print(f"[EXTRACTOR] Local confidence scoring failed: {e}")
+            return len(text) > 10000
+        
+        for req, local_conf in zip(requirements, scores):
+            req.confidence = round(min((req.confidence + float(local_conf)) / 2, 0.99), 2)
+        
+        doc_confidence = float(scores.mean())
+        print(f"[EXTRACTOR] Local confidence: {doc_confidence:.2f} (threshold {self.confidence_threshold})")
+        return doc_confidence < self.confidence_threshold
+
     async def _extract_llm(self, text: str, lang: str, pages: List[Dict] = None) -> List[ExtractedRequirement]:
         """Use LLM to extract requirements from non-English text."""
         
@@ -267,17 +338,10 @@ Format: JSON list only.
             
         return []
 
-    def _split_sentences(self, text: str) -> List[str]:
-        """Split text into sentences."""
-        # Handle common abbreviations
-        text = re.sub(r'\b(Mr|Mrs|Ms|Dr|Prof|Inc|Ltd|Co|etc)\.\s', r'\1<PERIOD> ', text)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        sentences = [s.replace('<PERIOD>', '.') for s in sentences]
-        expanded = []
-        for sentence in sentences:
-            items = re.split(r'\n\s*(?:\d+[\.\)]\s*|\•\s*|\-\s*)', sentence)
-            expanded.extend(items)
-        return [s.strip() for s in expanded if s.strip()]
+    def _pages_match_text(self, text: str, pages: List[Dict]) -> bool:
+        """Check that raw text is exactly the pages joined by blank lines (no OCR/table extras)."""
+        joined_length = sum(len(p.get("content") or "") for p in pages) + 2 * (len(pages) - 1)
+        return joined_length == len(text)
     
     def _is_requirement(self, sentence: str) -> bool:
         """Check if sentence is likely a requirement."""
@@ -0,0 +1,153 @@
+"""
+KB Metadata Filters
+Filter expressions for KB search (category in, tags contains, source in,
+updated after) resolved against per-attribute posting bitmaps, so the
+matcher can hand FAISS only the matching labels instead of filtering hits
+after the search.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# (field, normalized value)
+PostingKey = Tuple[str, str]
+
+
+def _normalize(value) -> str:
+    return str(value).strip().lower()
+
+
+def _values(value) -> List[str]:
+    """Accept a list, a single value or a comma-separated string."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [_normalize(v) for v in value if str(v).strip()]
+
+
+def to_timestamp(value) -> Optional[float]:
+    """Epoch seconds from a number, datetime or ISO-8601 string (naive = UTC)."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass
+class KBFilter:
+    """
+    Conjunction of optional clauses:
+      category in (...), source in (...)   -> any listed value
+      tags contains (...)                  -> every listed tag
+      updated_after                        -> items written after this time
+    """
+    categories: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    sources: Optional[List[str]] = None
+    updated_after: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, filters: Optional[Dict]) -> "KBFilter":
+        """Parse the API form: {'category': [...], 'tags': [...], 'source': [...], 'updated_after': ...}."""
+        filters = filters or {}
+        return cls(
+            categories=_values(filters.get('category')) or None,
+            tags=_values(filters.get('tags')) or None,
+            sources=_values(filters.get('source')) or None,
+            updated_after=to_timestamp(filters.get('updated_after'))
+        )
+
+    def is_empty(self) -> bool:
+        return not (self.categories or self.tags or self.sources or self.updated_after is not None)
+
+
+def attribute_keys(metadata: Dict) -> List[PostingKey]:
+    """Posting keys of one KB item's metadata."""
+    keys = [('category', v) for v in _values(metadata.get('category'))[:1]]
+    keys += [('tags', v) for v in _values(metadata.get('tags'))]
+    source = metadata.get('source') or metadata.get('source_file')
+    keys += [('source', v) for v in _values(source)[:1]]
+    return keys
+
+
+class PostingIndex:
+    """
+    Label bitmaps per (field, value) plus an updated_at column.
+    A filter resolves to a boolean label mask with a few vectorized OR/AND
+    operations; bitmaps grow on demand as labels are added.
+    """
+
+    def __init__(self):
+        self._bitmaps: Dict[PostingKey, np.ndarray] = {}
+        self._keys: Dict[int, List[PostingKey]] = {}
+        self._updated_at = np.zeros(0, dtype=np.float64)
+
+    @staticmethod
+    def _grow(array: np.ndarray, size: int) -> np.ndarray:
+        if len(array) >= size:
+            return array
+        grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def update(self, metadata: Dict[int, Dict]):
+        """Index (or re-index) labels from {label: item metadata}."""
+        if not metadata:
+            return
+        size = max(metadata) + 1
+        self._updated_at = self._grow(self._updated_at, size)
+        for label, meta in metadata.items():
+            self.discard(label)
+            keys = attribute_keys(meta)
+            for key in keys:
+                bitmap = self._bitmaps[key] = self._grow(self._bitmaps.get(key, np.zeros(0, dtype=bool)), size)
+                bitmap[label] = True
+            self._keys[label] = keys
+            self._updated_at[label] = to_timestamp(meta.get('updated_at') or meta.get('created_at')) or 0.0
+
+    def discard(self, label: int):
+        for key in self._keys.pop(label, []):
+            self._bitmaps[key][label] = False
+        if label < len(self._updated_at):
+            self._updated_at[label] = 0.0
+
+    def _bitmap(self, key: PostingKey, size: int) -> np.ndarray:
+        bitmap = np.zeros(size, dtype=bool)
+        stored = self._bitmaps.get(key)
+        if stored is not None:
+            n = min(size, len(stored))
+            bitmap[:n] = stored[:n]
+        return bitmap
+
+    def _any(self, field: str, values: Iterable[str], size: int) -> np.ndarray:
+        mask = np.zeros(size, dtype=bool)
+        for value in values:
+            mask |= self._bitmap((field, value), size)
+        return mask
+
+    def mask(self, flt: KBFilter, size: int) -> np.ndarray:
+        """Boolean mask over labels 0..size-1 matching every clause of the filter."""
+        mask = np.ones(size, dtype=bool)
+        if flt.categories:
+            mask &= self._any('category', flt.categories, size)
+        if flt.sources:
+            mask &= self._any('source', flt.sources, size)
+        for tag in flt.tags or []:
+            mask &= self._bitmap(('tags', tag), size)
+        if flt.updated_after is not None:
+            updated = np.zeros(size, dtype=np.float64)
+            n = min(size, len(self._updated_at))
+            updated[:n] = self._updated_at[:n]
+            mask &= updated > flt.updated_after
+        return mask
+
+    def stats(self) -> Dict:
+        return {'keys': len(self._bitmaps), 'labels': len(self._keys)}
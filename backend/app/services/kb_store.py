@@ -0,0 +1,375 @@
+"""
+Knowledge Base Metadata Store
+SQLite store for KB items and their passages. Each passage is one FAISS
+label pointing back to its parent item by character span. Ids, tenant,
+category and content hashes are indexed for filtering and diffing; content
+is only read for the rows being hydrated, so processes never hold the whole
+KB in memory.
+Every index mutation is also appended to a delta log (with its embedding),
+so other processes can replay recent changes instead of reloading.
+"""
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+# Columns stored natively; everything else on a KB item goes into `extra`
+CORE_FIELDS = ('id', 'tenant_id', 'category', 'title', 'content', 'content_hash')
+
+# SQLite's default bound-parameter limit is 999
+_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kb_items (
+    label INTEGER PRIMARY KEY,  -- row key; FAISS labels are kb_passages.label
+    item_id TEXT NOT NULL UNIQUE,
+    tenant_id TEXT,
+    category TEXT,
+    title TEXT,
+    content_hash TEXT,
+    content TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_kb_items_tenant_category ON kb_items (tenant_id, category);
+CREATE TABLE IF NOT EXISTS kb_passages (
+    label INTEGER PRIMARY KEY,
+    item_id TEXT NOT NULL,
+    start_char INTEGER NOT NULL,
+    end_char INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_kb_passages_item ON kb_passages (item_id);
+CREATE TABLE IF NOT EXISTS kb_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS kb_deltas (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,  -- add (vector at a new label), remove, meta (metadata/tenant change)
+    label INTEGER NOT NULL,
+    item_id TEXT,
+    tenant_id TEXT,
+    embedding BLOB
+);
+"""
+
+
+def _chunks(values: List, size: int = _CHUNK) -> Iterator[List]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class KBStore:
+    """
+    KB item and passage store (passages are addressed by FAISS label).
+    Item rows, passages and their deltas are written in one transaction(), so any
+    process reading the store sees rows and delta log in step.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        # Writers in other processes wait for the write lock instead of failing
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        # WAL keeps readers in other processes unblocked during a pending flush
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def _row(item: Dict) -> Tuple:
+        extra = {k: v for k, v in item.items() if k not in CORE_FIELDS}
+        return (
+            item['id'],
+            item.get('tenant_id'),
+            item.get('category'),
+            item.get('title'),
+            item.get('content_hash'),
+            item.get('content'),
+            json.dumps(extra, ensure_ascii=False, default=str) if extra else None,
+        )
+
+    @staticmethod
+    def _item(row: Tuple) -> Dict:
+        item_id, tenant_id, category, title, content_hash, content, extra = row
+        item = json.loads(extra) if extra else {}
+        item.update({
+            'id': item_id,
+            'tenant_id': tenant_id,
+            'category': category,
+            'title': title,
+            'content_hash': content_hash,
+            'content': content,
+        })
+        return item
+
+    # --- Metadata ---
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM kb_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, values: Dict[str, str]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kb_meta (key, value) VALUES (?, ?)",
+                [(k, str(v)) for k, v in values.items()]
+            )
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._conn.rollback()
+
+    @contextmanager
+    def transaction(self, write: bool = True):
+        """
+        Group statements into one transaction; nested calls join the outer one.
+        Write transactions take SQLite's write lock up front (BEGIN IMMEDIATE)
+        so writers in other processes queue rather than interleave. Read
+        transactions give one consistent view across several queries.
+        Callers serialize their own transactions (the matcher holds its lock).
+        """
+        outer = self._depth == 0
+        if outer:
+            with self._lock:
+                if self._conn.in_transaction:
+                    self._conn.commit()
+                self._conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if outer:
+                self.rollback()
+            raise
+        self._depth -= 1
+        if outer:
+            self.commit()
+
+    # --- Writes ---
+
+    def put(self, items: Iterable[Dict]):
+        """Insert or replace items by id (passages are written separately)."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kb_items "
+                "(item_id, tenant_id, category, title, content_hash, content, extra) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._row(item) for item in items]
+            )
+
+    def put_passages(self, rows: Iterable[Tuple[int, str, int, int]]):
+        """Insert (label, item_id, start_char, end_char) passages."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kb_passages VALUES (?, ?, ?, ?)",
+                [(int(label), item_id, int(start), int(end)) for label, item_id, start, end in rows]
+            )
+
+    def delete_passages(self, item_ids: List[str]):
+        with self._lock:
+            self._conn.executemany("DELETE FROM kb_passages WHERE item_id = ?", [(i,) for i in item_ids])
+
+    def delete(self, item_ids: List[str]):
+        """Delete items together with their passages."""
+        with self._lock:
+            self.delete_passages(item_ids)
+            self._conn.executemany("DELETE FROM kb_items WHERE item_id = ?", [(i,) for i in item_ids])
+
+    def replace_all(self, items: List[Dict], passages: List[Tuple[int, str, int, int]]):
+        """Replace the whole store (passages labelled 0..n-1 by the caller)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM kb_passages")
+            self._conn.execute("DELETE FROM kb_items")
+            self.put(items)
+            self.put_passages(passages)
+
+    def compact(self) -> int:
+        """Renumber live passage labels to 0..n-1, preserving order. Returns the live count."""
+        with self._lock:
+            labels = [row[0] for row in self._conn.execute("SELECT label FROM kb_passages ORDER BY label")]
+            # Ascending order never collides: each target label is already free
+            self._conn.executemany(
+                "UPDATE kb_passages SET label = ? WHERE label = ?",
+                [(new, old) for new, old in enumerate(labels) if new != old]
+            )
+            return len(labels)
+
+    # --- Delta log ---
+
+    def append_deltas(self, deltas: Iterable[Tuple[str, int, Optional[str], Optional[str], Optional[bytes]]]) -> int:
+        """Append (op, label, item_id, tenant_id, embedding bytes) rows. Returns the last seq."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO kb_deltas (op, label, item_id, tenant_id, embedding) VALUES (?, ?, ?, ?, ?)",
+                [(op, int(label), item_id, tenant_id, blob) for op, label, item_id, tenant_id, blob in deltas]
+            )
+        return self.last_delta_seq()
+
+    def last_delta_seq(self) -> int:
+        """Highest seq ever assigned (kept by sqlite_sequence even after pruning)."""
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'kb_deltas'").fetchone()
+        return row[0] if row else 0
+
+    def deltas_since(self, seq: int) -> List[Tuple]:
+        """Return (seq, op, label, item_id, tenant_id, embedding) rows after `seq`, in order."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, op, label, item_id, tenant_id, embedding FROM kb_deltas WHERE seq > ? ORDER BY seq",
+                (seq,)
+            ).fetchall()
+
+    def prune_deltas(self, seq: int):
+        """Drop deltas already covered by a snapshot."""
+        with self._lock:
+            self._conn.execute("DELETE FROM kb_deltas WHERE seq <= ?", (seq,))
+
+    # --- Reads ---
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kb_items").fetchone()[0]
+
+    def passage_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kb_passages").fetchone()[0]
+
+    def label_columns(self) -> Tuple[List[int], List[str], List[Optional[str]]]:
+        """Return (labels, parent item ids, tenant ids) of all live passages, ordered by label."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.label, p.item_id, i.tenant_id FROM kb_passages p "
+                "JOIN kb_items i ON i.item_id = p.item_id ORDER BY p.label"
+            ).fetchall()
+        if not rows:
+            return [], [], []
+        labels, ids, tenants = zip(*rows)
+        return list(labels), list(ids), list(tenants)
+
+    def passage_metadata(self, labels: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+        """
+        Filterable metadata (category plus extra fields such as tags, source,
+        updated_at) per passage label, for all passages or the given labels.
+        """
+        sql = "SELECT p.label, i.category, i.extra FROM kb_passages p JOIN kb_items i ON i.item_id = p.item_id"
+        with self._lock:
+            if labels is None:
+                rows = self._conn.execute(sql).fetchall()
+            else:
+                rows = []
+                for chunk in _chunks(sorted({int(l) for l in labels})):
+                    rows += self._conn.execute(
+                        f"{sql} WHERE p.label IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+        return {label: {**(json.loads(extra) if extra else {}), 'category': category} for label, category, extra in rows}
+
+    def passage_texts(self, labels: Optional[Iterable[int]] = None) -> Dict[int, str]:
+        """Passage text per label, for all passages or the given labels."""
+        sql = (
+            "SELECT p.label, substr(i.content, p.start_char + 1, p.end_char - p.start_char) "
+            "FROM kb_passages p JOIN kb_items i ON i.item_id = p.item_id"
+        )
+        with self._lock:
+            if labels is None:
+                rows = self._conn.execute(sql).fetchall()
+            else:
+                rows = []
+                for chunk in _chunks(sorted({int(l) for l in labels})):
+                    rows += self._conn.execute(
+                        f"{sql} WHERE p.label IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+        return {label: text or '' for label, text in rows}
+
+    # Items with their passage labels (in label order) and content hash
+    _HASH_SQL = (
+        "SELECT i.item_id, i.content_hash, p.label FROM kb_items i "
+        "LEFT JOIN kb_passages p ON p.item_id = i.item_id"
+    )
+
+    @staticmethod
+    def _group_labels(rows) -> Dict[str, Tuple[List[int], Optional[str]]]:
+        found: Dict[str, Tuple[List[int], Optional[str]]] = {}
+        for item_id, digest, label in rows:
+            labels = found.setdefault(item_id, ([], digest))[0]
+            if label is not None:
+                labels.append(label)
+        return found
+
+    def lookup(self, item_ids: List[str]) -> Dict[str, Tuple[List[int], Optional[str]]]:
+        """Map item ids to (passage labels, content_hash)."""
+        found = {}
+        with self._lock:
+            for chunk in _chunks(list(item_ids)):
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._group_labels(self._conn.execute(
+                    f"{self._HASH_SQL} WHERE i.item_id IN ({placeholders}) ORDER BY p.label", chunk
+                )))
+        return found
+
+    def all_hashes(self) -> Dict[str, Tuple[List[int], Optional[str]]]:
+        """Map every item id to (passage labels, content_hash) without reading content."""
+        with self._lock:
+            return self._group_labels(self._conn.execute(f"{self._HASH_SQL} ORDER BY p.label"))
+
+    def fetch(self, labels: Iterable[int]) -> Dict[int, Dict]:
+        """Hydrate passages for a set of labels: the parent item plus its 'passage' text."""
+        wanted = sorted({int(l) for l in labels})
+        items = {}
+        with self._lock:
+            for chunk in _chunks(wanted):
+                placeholders = ",".join("?" * len(chunk))
+                for row in self._conn.execute(
+                    "SELECT p.label, p.start_char, p.end_char, i.item_id, i.tenant_id, i.category, i.title, "
+                    "i.content_hash, i.content, i.extra FROM kb_passages p "
+                    f"JOIN kb_items i ON i.item_id = p.item_id WHERE p.label IN ({placeholders})", chunk
+                ):
+                    item = self._item(row[3:])
+                    item['passage'] = (item['content'] or '')[row[1]:row[2]]
+                    items[row[0]] = item
+        return items
+
+    def iter_items(self) -> Iterator[Dict]:
+        """Yield every item in insertion order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, tenant_id, category, title, content_hash, content, extra "
+                "FROM kb_items ORDER BY label"
+            ).fetchall()
+        for row in rows:
+            yield self._item(row)
+
+    def items(self, tenant_id: Optional[str] = None, categories: Optional[List[str]] = None) -> List[Dict]:
+        """Items visible to a tenant (its own plus shared), optionally by category."""
+        sql = ("SELECT item_id, tenant_id, category, title, content_hash, content, extra "
+               "FROM kb_items WHERE (tenant_id IS NULL OR tenant_id = ?)")
+        params: List = [tenant_id]
+        if categories:
+            sql += f" AND LOWER(category) IN ({','.join('?' * len(categories))})"
+            params.extend(c.lower() for c in categories)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY label", params).fetchall()
+        return [self._item(row) for row in rows]
+
+
+# Singleton instance
+_store: Optional[KBStore] = None
+
+
+def get_kb_store() -> KBStore:
+    global _store
+    if _store is None:
+        path = get_settings().kb_store_path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _store = KBStore(path)
+    return _store
@@ -0,0 +1,60 @@
+"""
+Language Detection Service
+Detects document language once (and per page for mixed-language tenders)
+so the extractor, composer and humanizer don't re-run langdetect per call.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from langdetect import detect, DetectorFactory
+DetectorFactory.seed = 0  # Consistent detection
+
+DEFAULT_LANGUAGE = "en"
+
+# Characters sampled for detection; langdetect converges well before this
+SAMPLE_CHARS = 2000
+
+# Pages shorter than this inherit the document language
+MIN_PAGE_CHARS = 200
+
+LANGUAGE_NAMES = {
+    "en": "English", "hi": "Hindi", "es": "Spanish",
+    "fr": "French", "ar": "Arabic", "de": "German",
+    "pt": "Portuguese", "zh-cn": "Chinese (Simplified)"
+}
+
+
+@lru_cache(maxsize=4096)
+def _detect_cached(sample: str) -> str:
+    try:
+        return detect(sample)
+    except Exception:
+        return DEFAULT_LANGUAGE
+
+
+def detect_language(text: Optional[str]) -> str:
+    """Memoized language detection for a text (sampled to its first 2k chars)."""
+    sample = (text or "").strip()[:SAMPLE_CHARS]
+    if not sample:
+        return DEFAULT_LANGUAGE
+    return _detect_cached(sample)
+
+
+def detect_page_languages(pages: List[Dict], document_language: str) -> Dict[int, str]:
+    """Detect language per page, falling back to the document language for short pages."""
+    page_languages = {}
+    for page in pages or []:
+        content = page.get("content") or ""
+        page_num = page.get("page_num")
+        if page_num is None:
+            continue
+        if len(content.strip()) < MIN_PAGE_CHARS:
+            page_languages[page_num] = document_language
+        else:
+            page_languages[page_num] = detect_language(content)
+    return page_languages
+
+
+def language_name(code: Optional[str], default: str = "the same language as the requirement") -> str:
+    """Human-readable language name for prompts."""
+    return LANGUAGE_NAMES.get(code or "", default)
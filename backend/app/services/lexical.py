@@ -0,0 +1,255 @@
+"""
+Lexical KB Index
+In-process BM25 inverted index over KB passages, keyed by the same labels
+as the FAISS index. Tender requirements hinge on exact tokens ("ISO 27001",
+"CMMI Level 5", "₹50 crore", GeM bid numbers) that sentence embeddings blur
+together; the matcher fuses these scores with vector ranks (RRF).
+"""
+import re
+import math
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from app.services.segmenter import iter_sentence_spans
+
+# Words with internal separators (27001:2013, GEM/2024/B/123, ISO/IEC) stay whole
+TOKEN = re.compile(r"\w+(?:[./:-]\w+)*")
+PART = re.compile(r"\w+")
+# ₹50, Rs. 50, INR 50 -> "inr 50"
+CURRENCY = re.compile(r"(?:₹|\brs\.?|\binr\b)\s*(?=\d)", re.IGNORECASE)
+# Indian digit grouping: 50,00,000 -> 5000000
+DIGIT_GROUPS = re.compile(r"(?<=\d),(?=\d)")
+
+# Words that hedge or negate a claim ("level 5 roadmap", "audit planned")
+QUALIFIER = re.compile(
+    r"\b(?:not|no(?!\.)|never|without|planned|planning|roadmap|pursuing|pending|applied|"
+    r"upcoming|expected|targeted|intend(?:s|ed)?|will|under way|in progress)\b|n't",
+    re.IGNORECASE
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or shall should "
+    "that the their this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms: words, the parts of compound tokens and adjacent-word
+    bigrams ("iso 27001", "level 5"), so exact phrases outrank scattered words.
+    A bigram into a compound also pairs with its first part, so "ISO 27001:2013"
+    yields "iso 27001" as well.
+    """
+    text = DIGIT_GROUPS.sub('', CURRENCY.sub('inr ', (text or '').lower()))
+    words = [w for w in TOKEN.findall(text) if w not in STOPWORDS]
+    terms = list(words)
+    for word in words:
+        parts = PART.findall(word)
+        if len(parts) > 1:
+            terms.extend(parts)
+    for a, b in zip(words, words[1:]):
+        terms.append(f"{a} {b}")
+        head = PART.match(b).group()
+        if head != b:
+            terms.append(f"{a} {head}")
+    return terms
+
+
+def identifier_terms(text: str) -> Set[str]:
+    """
+    Terms that pin down an exact fact: words with digits ("27001", "gem/2024/b/1")
+    and label-number bigrams ("level 5", "iso 27001", "inr 50").
+    """
+    terms = set()
+    for term in tokenize(text):
+        if ' ' in term:
+            label, number = term.split(' ')
+            if not any(c.isdigit() for c in label) and any(c.isdigit() for c in number):
+                terms.add(term)
+        elif any(c.isdigit() for c in term):
+            terms.add(term)
+    return terms
+
+
+def _words(text: str) -> List[Tuple[str, bool]]:
+    """(word, starts uppercase) in order; stopwords are kept so they can break runs."""
+    text = DIGIT_GROUPS.sub('', CURRENCY.sub('INR ', text or ''))
+    return [(w.lower(), w[:1].isupper()) for w in TOKEN.findall(text)]
+
+
+def identifier_phrases(text: str) -> List[Tuple[str, ...]]:
+    """
+    Each word with digits together with the capitalised label words right
+    before it (at most two): "CMMI Level 5" -> ("cmmi", "level", "5"),
+    "Turnover above ₹50" -> ("inr", "50").
+    """
+    words = _words(text)
+    phrases = []
+    for i, (word, _) in enumerate(words):
+        if not any(c.isdigit() for c in word):
+            continue
+        start = i
+        while (
+            start > max(0, i - 2) and words[start - 1][1] and words[start - 1][0] not in STOPWORDS
+            and not any(c.isdigit() for c in words[start - 1][0])
+        ):
+            start -= 1
+        phrases.append(tuple(w for w, _ in words[start:i + 1]))
+    return phrases
+
+
+def _contains_run(words: List[str], phrase: Tuple[str, ...]) -> bool:
+    """True if `phrase` occurs as consecutive words (a compound matches its parts)."""
+    for i in range(len(words) - len(phrase) + 1):
+        if all(p == w or p in PART.findall(w) for p, w in zip(phrase, words[i:])):
+            return True
+    return False
+
+
+def is_exact_match(query: str, text: str) -> bool:
+    """
+    True if the query names identifiers and each one appears whole, as one
+    run of words, in a single sentence of the text that does not hedge or
+    negate it ("CMMI Level 3 appraised; level 5 roadmap" is not CMMI Level 5,
+    "ISO 27001 audit planned" is not ISO 27001).
+    """
+    wanted = identifier_phrases(query)
+    if not wanted:
+        return False
+    hedged = bool(QUALIFIER.search(query))
+    text = text or ''
+    sentences = [
+        [w for w, _ in _words(clause) if w not in STOPWORDS]
+        for start, end in iter_sentence_spans(text)
+        for clause in text[start:end].split(';')
+        if hedged or not QUALIFIER.search(clause)
+    ]
+    return all(any(_contains_run(words, phrase) for words in sentences) for phrase in wanted)
+
+
+class LexicalIndex:
+    """
+    BM25 (k1, b) over labelled passages with incremental add/discard.
+    Posting lists are dicts ({label: tf}); their numpy form is cached per
+    term and invalidated when the term changes.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._terms: Dict[int, Set[str]] = {}
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._terms)
+
+    def update(self, texts: Dict[int, str]):
+        """Index (or re-index) passages from {label: text}."""
+        if not texts:
+            return
+        with self._lock:
+            size = max(texts) + 1
+            if size > len(self._lengths):
+                grown = np.zeros(max(size, 2 * len(self._lengths)), dtype=np.float32)
+                grown[:len(self._lengths)] = self._lengths
+                self._lengths = grown
+            for label, text in texts.items():
+                self._discard(label)
+                terms = tokenize(text)
+                counts: Dict[str, int] = {}
+                for term in terms:
+                    counts[term] = counts.get(term, 0) + 1
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[label] = tf
+                    self._arrays.pop(term, None)
+                self._terms[label] = set(counts)
+                self._lengths[label] = len(terms)
+                self._total_length += len(terms)
+
+    def discard(self, label: int):
+        with self._lock:
+            self._discard(label)
+
+    def _discard(self, label: int):
+        for term in self._terms.pop(label, ()):
+            posting = self._postings[term]
+            posting.pop(label, None)
+            if not posting:
+                del self._postings[term]
+            self._arrays.pop(term, None)
+        if label < len(self._lengths):
+            self._total_length -= int(self._lengths[label])
+            self._lengths[label] = 0
+
+    def _idf(self, df: int) -> float:
+        n = len(self._terms)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _posting_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        if term not in self._arrays:
+            posting = self._postings[term]
+            self._arrays[term] = (
+                np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+                np.fromiter(posting.values(), dtype=np.float32, count=len(posting)),
+            )
+        return self._arrays[term]
+
+    def search(self, query: str, top_k: int, mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (labels, BM25 scores) for a query, optionally within a label mask."""
+        with self._lock:
+            terms = [t for t in set(tokenize(query)) if t in self._postings]
+            if not terms or not self._terms:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            avg_length = self._total_length / len(self._terms)
+            scores = np.zeros(len(self._lengths), dtype=np.float32)
+            for term in terms:
+                labels, tfs = self._posting_arrays(term)
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[labels] / avg_length)
+                scores[labels] += self._idf(len(labels)) * tfs * (self.k1 + 1) / (tfs + norm)
+
+        if mask is not None:
+            n = min(len(mask), len(scores))
+            scores[n:] = 0
+            scores[:n][~mask[:n]] = 0
+        hits = np.flatnonzero(scores)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return hits.astype(np.int64), scores[hits]
+
+    def coverage(self, query: str, label: int) -> float:
+        """
+        IDF-weighted share of the query's words found in one passage (0-1).
+        Words absent from the whole KB count at full weight, so "ISO 27001"
+        does not cover a passage that only mentions ISO 9001.
+        """
+        with self._lock:
+            words = {t for t in tokenize(query) if ' ' not in t}
+            if not words or not self._terms:
+                return 0.0
+            present = self._terms.get(label, set())
+            total = found = 0.0
+            for word in words:
+                weight = self._idf(len(self._postings.get(word, ())))
+                total += weight
+                if word in present:
+                    found += weight
+            return found / total
+
+    def stats(self) -> Dict:
+        return {'passages': len(self._terms), 'terms': len(self._postings)}
+
+
+def rrf_fuse(rankings: Iterable[np.ndarray], k: int = 60) -> List[int]:
+    """Reciprocal rank fusion of several ranked label lists (best first)."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, label in enumerate(ranking.tolist(), start=1):
+            fused[label] = fused.get(label, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
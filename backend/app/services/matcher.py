@@ -1,20 +1,52 @@
 """
 Vector Matching Service
-Uses FAISS for semantic similarity search against knowledge base
+Uses FAISS for semantic similarity search against knowledge base.
+faiss and the embedding model are imported on first VectorMatcher
+construction (see warm_up_matcher), so importing this module stays cheap.
 """
 import os
+import copy
 import json
+import time
+import atexit
+import hashlib
+import threading
 import numpy as np
-from typing import List, Dict, Optional
-from dataclasses import dataclass
-
-import faiss
-from sentence_transformers import SentenceTransformer
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field
 
 from app.core.config import get_settings
+from app.services.kb_store import get_kb_store
+from app.services.chunking import split_passages
+from app.services.kb_filters import KBFilter, PostingIndex
+from app.services.lexical import LexicalIndex, rrf_fuse
+from app.services.rwlock import ReadWriteLock
+from app.services.embedding import get_embedder
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_dispatcher import EmbeddingDispatcher
+from app.services.ann import (
+    build_index, choose_index_type, index_type, supports_removal, apply_search_params, search_parameters,
+    search as ann_search
+)
+
+if TYPE_CHECKING:
+    import faiss
 
 settings = get_settings()
 
+# Matched passages returned per search result
+MAX_PASSAGES_PER_MATCH = 3
+
+# Filtered subsets up to this size are scored exactly against stored
+# embeddings; larger ones go through FAISS with a label bitmap selector
+EXACT_SUBSET_MAX = 20_000
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of KB item content, used to skip re-encoding unchanged items."""
+    return hashlib.sha1((content or "").encode('utf-8')).hexdigest()
+
 
 @dataclass
 class MatchResult:
@@ -22,171 +54,33 @@ class MatchResult:
     content: str
     score: float
     rank: int
+    passages: List[str] = field(default_factory=list)  # matched passages, best first
+    lexical_coverage: float = 0.0  # share of query words in the best passage (see LexicalIndex)
 
 
-class VectorMatcher:
-    """Vector-based semantic matching using FAISS."""
-    
-    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
-        self.model = SentenceTransformer(model_name)
-        self.dimension = 384  # Dimension for paraphrase-multilingual-MiniLM-L12-v2
-        self.index: Optional[faiss.IndexFlatIP] = None
-        self.kb_items: List[Dict] = []
-        self.id_to_index: Dict[str, int] = {}
-        
-        # Load existing index if available
-        self._load_index()
-    
-    def _load_index(self):
-        """Load existing FAISS index and KB data."""
-        index_path = settings.faiss_index_path
-        kb_path = settings.knowledge_base_path
-        
-        if os.path.exists(index_path) and os.path.exists(kb_path):
-            try:
-                self.index = faiss.read_index(index_path)
-                with open(kb_path, 'r', encoding='utf-8') as f:
-                    self.kb_items = json.load(f)
-                self.id_to_index = {item['id']: i for i, item in enumerate(self.kb_items)}
-            except Exception as e:
-                print(f"Error loading index: {e}")
-                self._create_empty_index()
-        else:
-            self._create_empty_index()
-    
-    def _create_empty_index(self):
-        """Create empty FAISS index."""
-        self.index = faiss.IndexFlatIP(self.dimension)
-        self.kb_items = []
-        self.id_to_index = {}
-    
-    def _save_index(self):
-        """Save FAISS index and KB data to disk."""
-        os.makedirs(os.path.dirname(settings.faiss_index_path), exist_ok=True)
-        
-        faiss.write_index(self.index, settings.faiss_index_path)
-        with open(settings.knowledge_base_path, 'w', encoding='utf-8') as f:
-            json.dump(self.kb_items, f, ensure_ascii=False, indent=2)
-    
-    def add_item(self, item_id: str, content: str, metadata: Dict = None):
-        """Add item to knowledge base and index."""
-        # Generate embedding
-        embedding = self.model.encode([content])[0]
-        embedding = embedding / np.linalg.norm(embedding)  # Normalize
-        
-        # Add to FAISS
-        self.index.add(np.array([embedding], dtype=np.float32))
-        
-        # Store KB item
-        kb_item = {
-            'id': item_id,
-            'content': content,
-            **(metadata or {})
-        }
-        self.kb_items.append(kb_item)
-        self.id_to_index[item_id] = len(self.kb_items) - 1
-        
-        # Save
-        self._save_index()
-    
-    def remove_item(self, item_id: str):
-        """Remove item from knowledge base (rebuild index)."""
-        if item_id not in self.id_to_index:
-            return
-        
-        # Remove from KB items
-        self.kb_items = [item for item in self.kb_items if item['id'] != item_id]
-        
-        # Rebuild index
-        self._rebuild_index()
-    
-    def _rebuild_index(self):
-        """Rebuild FAISS index from KB items."""
-        self._create_empty_index()
-        
-        if not self.kb_items:
-            self._save_index()
-            return
-        
-        # Regenerate embeddings
-        contents = [item['content'] for item in self.kb_items]
-        embeddings = self.model.encode(contents)
-        
-        # Normalize
-        faiss.normalize_L2(embeddings)
-        
-        # Add to index
-        self.index.add(embeddings.astype(np.float32))
-        
-        # Rebuild mapping
-        self.id_to_index = {item['id']: i for i, item in enumerate(self.kb_items)}
-        
-        # Save
-        self._save_index()
-    
-    def sync_with_database(self, kb_items: List[Dict]):
-        """Sync FAISS index with database KB items."""
-        self.kb_items = kb_items
-        self._rebuild_index()
-    
-    async def search(
-        self, 
-        query: str, 
-        top_k: int = 5,
-        min_score: float = 0.0,
-        tenant_id: str = None
-    ) -> List[MatchResult]:
-        """Search for similar KB items."""
-        if self.index.ntotal == 0:
-            return []
-        
-        # Generate query embedding
-        query_embedding = self.model.encode([query])[0]
-        query_embedding = query_embedding / np.linalg.norm(query_embedding)
-        query_embedding = query_embedding.reshape(1, -1).astype(np.float32)
-        
-        # Search deeper to allow post-filtering without missing results
-        search_k = min(top_k * 10 if tenant_id else top_k, self.index.ntotal)
-        scores, indices = self.index.search(query_embedding, search_k)
-        
-        results = []
-        for rank, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx < 0 or idx >= len(self.kb_items) or float(score) < min_score:
-                continue
-            
-            kb_item = self.kb_items[idx]
-            
-            # Enforce multi-tenancy isolation correctly
-            if tenant_id and kb_item.get('tenant_id') and kb_item.get('tenant_id') != tenant_id:
-                continue
-                
-            results.append(MatchResult(
-                kb_item_id=kb_item['id'],
-                content=kb_item['content'],
-                score=float(score),
-                rank=len(results) + 1
-            ))
-            
-            if len(results) >= top_k:
-                break
-        
-        return results
+class MatchingMixin:
+    """Requirement matching and summaries on top of search_batch (local or remote)."""
     
     async def match_requirements(
         self, 
         requirements: List[Dict],
         top_k: int = 3,
-        tenant_id: str = None
+        tenant_id: str = None,
+        filters: Optional[Dict] = None
     ) -> List[Dict]:
         """Match multiple requirements against KB."""
-        results = []
+        all_matches = await self.search_batch(
+            [req['text'] for req in requirements],
+            top_k=top_k,
+            tenant_id=tenant_id,
+            filters=filters
+        )
         
-        for req in requirements:
-            matches = await self.search(req['text'], top_k=top_k, tenant_id=tenant_id)
-            
-            # Calculate match percentage (normalize cosine similarity to 0-100)
-            best_match = matches[0] if matches else None
-            match_percentage = (best_match.score * 100) if best_match else 0
+        results = []
+        for req, matches in zip(requirements, all_matches):
+            # Calculate match percentage (normalize cosine similarity to 0-100);
+            # fused ranking can put a lexical hit first, so take the best score
+            match_percentage = max((m.score for m in matches), default=0) * 100
             
             results.append({
                 'requirement_id': req['id'],
@@ -198,7 +92,9 @@ class VectorMatcher:
                         'kb_item_id': m.kb_item_id,
                         'content': m.content,
                         'score': m.score,
-                        'rank': m.rank
+                        'rank': m.rank,
+                        'passages': m.passages,
+                        'lexical_coverage': m.lexical_coverage
                     }
                     for m in matches
                 ]
@@ -270,12 +166,970 @@ class VectorMatcher:
         }
 
 
+class VectorMatcher(MatchingMixin):
+    """Vector-based semantic matching using FAISS."""
+    
+    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
+        self.embedder = get_embedder(model_name)
+        self.dimension = 384  # Dimension for paraphrase-multilingual-MiniLM-L12-v2
+        self.index: Optional["faiss.IndexIDMap2"] = None
+        self.batch_size = settings.embedding_batch_size
+        
+        # Query-side cache: titles, requirements and standard clauses recur
+        self.embedding_cache = EmbeddingCache(
+            lambda texts, batch_size: self.embedder.encode(texts, batch_size=batch_size),
+            dimension=self.dimension,
+            namespace=f"{self.embedder.name}:{model_name}",
+            capacity=settings.embedding_cache_size,
+            redis_url=settings.embedding_cache_redis_url,
+            ttl_seconds=settings.embedding_cache_ttl_seconds
+        )
+        
+        # Concurrent callers share micro-batched encodes on one worker thread
+        self.dispatcher = EmbeddingDispatcher(
+            lambda texts, cache: self.encode(texts, batch_size=self.batch_size, cache=cache),
+            max_batch=self.batch_size,
+            max_wait_ms=settings.embedding_batch_wait_ms,
+            max_queue=settings.embedding_queue_size,
+            submit_timeout=settings.embedding_queue_timeout_seconds,
+            dimension=self.dimension
+        )
+        
+        # Query-time ANN knobs; values persisted with the index take precedence
+        self._search_params = {
+            'nprobe': settings.ann_nprobe,
+            'ef_search': settings.ann_ef_search,
+            'hnsw_m': settings.ann_hnsw_m,
+        }
+        
+        # Item metadata and content live in the KB store; content is read
+        # only when hits are hydrated
+        self.store = get_kb_store()
+        
+        # Label -> item id ('' for removed labels)
+        self._ids = np.zeros(0, dtype=np.str_)
+        
+        # Stored embeddings (row = label) so mutations never re-encode the KB
+        self._embeddings = np.zeros((0, self.dimension), dtype=np.float32)
+        
+        # Per-label tenant codes for vectorized filtering (0 = shared item)
+        self._tenant_codes = np.zeros(0, dtype=np.int32)
+        self._tenant_lookup: Dict[str, int] = {}
+        
+        # Lazily built per-tenant sub-indexes keyed by tenant code
+        self._partitions: Dict[int, "faiss.IndexIDMap2"] = {}
+        
+        # Category / tags / source / updated_at bitmaps for filtered search
+        self._postings = PostingIndex()
+        
+        # BM25 over passage text, fused with vector ranks at search time
+        self._lexical = LexicalIndex()
+        
+        # Mutations commit item rows plus a delta log entry to the KB store
+        # right away; a timer or pending-count threshold then checkpoints a
+        # new versioned snapshot (index + embeddings)
+        self._lock = threading.RLock()
+        # FAISS indexes must not change while a search runs: in-place index
+        # and label-array updates take the write side, searches the read side
+        self._index_lock = ReadWriteLock()
+        self._version = 0
+        self._pending_writes = 0
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+        
+        # Committed state this process has loaded: snapshot epoch (bumped when
+        # labels are renumbered) and the last delta replayed on top of it
+        self._epoch = 0
+        self._applied_seq = 0
+        
+        # Load existing index if available
+        self._load_index()
+        
+        # Pick up KB writes made by other processes (API, Celery workers)
+        if settings.index_reload_interval_seconds > 0:
+            threading.Thread(
+                target=self._watch, args=(settings.index_reload_interval_seconds,),
+                name="matcher-reload", daemon=True
+            ).start()
+    
+    def _build_index(self, embeddings: np.ndarray, labels: Optional[np.ndarray] = None) -> "faiss.IndexIDMap2":
+        """Build (and train if needed) an index sized for `embeddings`."""
+        kind = choose_index_type(len(embeddings), settings.ann_index_type)
+        return build_index(kind, self.dimension, embeddings, labels, self._search_params)
+    
+    @property
+    def size(self) -> int:
+        """Number of live (non-removed) passage vectors."""
+        return int(np.count_nonzero(self._tenant_codes != -2))
+    
+    def _load_index(self):
+        """Load the committed snapshot (migrating legacy files on first run)."""
+        if not self.store.get_meta('version') and not self.store.count() and self._migrate_legacy():
+            return
+        if self.store.count() and not self.store.passage_count():
+            # Store written before passage chunking: one vector per item
+            print("[MATCHER] Re-encoding KB items as passages")
+            self._rebuild_index()
+            return
+        try:
+            self._load_snapshot()
+        except Exception as e:
+            print(f"Error loading index: {e}")
+            if self.store.count():
+                # Item rows survive a lost snapshot: re-encode them
+                self._rebuild_index()
+            else:
+                self._create_empty_index()
+    
+    def _load_snapshot(self):
+        """
+        Load the snapshot recorded in the KB store and replay newer deltas.
+        Meta, deltas and item labels are read in one transaction, so they
+        describe the same committed state.
+        """
+        with self.store.transaction(write=False):
+            meta = {
+                key: int(self.store.get_meta(key) or 0)
+                for key in ('version', 'epoch', 'snapshot_seq', 'nprobe', 'ef_search')
+            }
+            deltas = self.store.deltas_since(meta['snapshot_seq'])
+            columns = self.store.label_columns()
+            metadata = self.store.passage_metadata()
+            texts = self.store.passage_texts()
+        
+        for key in ('nprobe', 'ef_search'):
+            if meta[key]:
+                self._search_params[key] = meta[key]
+        self._partitions, self._tenant_lookup, self._postings = {}, {}, PostingIndex()
+        self._lexical = LexicalIndex()
+        
+        version = meta['version']
+        if version:
+            import faiss
+            self.index = faiss.read_index(f"{settings.faiss_index_path}.v{version}")
+            apply_search_params(self.index, self._search_params)
+            # Memory-mapped: rows are paged in on demand, not copied at startup
+            self._embeddings = np.load(f"{settings.embeddings_path}.v{version}", mmap_mode='r')
+        else:
+            self._embeddings = np.zeros((0, self.dimension), dtype=np.float32)
+            self.index = self._build_index(self._embeddings)
+        
+        self._ids = np.full(len(self._embeddings), '', dtype=np.str_)
+        self._tenant_codes = np.full(len(self._embeddings), -2, dtype=np.int32)
+        self._version, self._epoch, self._applied_seq = version, meta['epoch'], meta['snapshot_seq']
+        self._apply_deltas(deltas)
+        self._refresh_mappings(columns, metadata, texts)
+    
+    def _migrate_legacy(self) -> bool:
+        """Import a legacy knowledge_base.json into the KB store."""
+        kb_path = settings.knowledge_base_path
+        if not os.path.exists(kb_path):
+            return False
+        
+        try:
+            with open(kb_path, 'r', encoding='utf-8') as f:
+                kb_items = json.load(f)
+            
+            # Legacy vectors are per item, not per passage: re-encode
+            with self.store.transaction():
+                self.store.put(
+                    {**item, 'content_hash': content_hash(item['content'])}
+                    for item in kb_items
+                    if item is not None
+                )
+                self._rebuild_index()
+            print(f"[MATCHER] Migrated {self.store.count()} KB items into {settings.kb_store_path}")
+            return True
+        except Exception as e:
+            print(f"Error migrating index: {e}")
+            return False
+    
+    def _create_empty_index(self):
+        """Create empty FAISS index."""
+        self._embeddings = np.zeros((0, self.dimension), dtype=np.float32)
+        self.index = self._build_index(self._embeddings)
+        self._refresh_mappings(([], [], []), {}, {})
+    
+    def _refresh_mappings(
+        self,
+        columns: Optional[Tuple[List[int], List[str], List[Optional[str]]]] = None,
+        metadata: Optional[Dict[int, Dict]] = None,
+        texts: Optional[Dict[int, str]] = None
+    ):
+        """Rebuild label -> id / tenant code arrays, filter postings and BM25 index from the KB store."""
+        self._partitions = {}
+        self._tenant_lookup = {}
+        size = len(self._embeddings)
+        labels, ids, tenants = columns if columns is not None else self.store.label_columns()
+        
+        self._ids = np.zeros(size, dtype=np.str_)
+        codes = np.full(size, -2, dtype=np.int32)  # -2 = tombstone
+        if labels:
+            self._ids = np.full(size, '', dtype=f'U{max(len(i) for i in ids)}')
+            self._ids[labels] = ids
+            codes[labels] = [self._tenant_code(t, create=True) for t in tenants]
+        self._tenant_codes = codes
+        
+        self._postings = PostingIndex()
+        self._postings.update(metadata if metadata is not None else self.store.passage_metadata())
+        self._lexical = LexicalIndex()
+        self._lexical.update(texts if texts is not None else self.store.passage_texts())
+    
+    def _reindex_from_embeddings(self):
+        """Compact tombstones and rebuild the index from stored embeddings (no re-encode)."""
+        live = np.flatnonzero(self._ids != '')
+        self._embeddings = np.ascontiguousarray(self._embeddings[live], dtype=np.float32)
+        self.store.compact()
+        
+        self.index = self._build_index(self._embeddings)
+        self._refresh_mappings()
+    
+    def _tenant_code(self, tenant_id: Optional[str], create: bool = False) -> int:
+        """Map a tenant id to its integer code (0 for shared, -1 if unknown)."""
+        if not tenant_id:
+            return 0
+        if tenant_id not in self._tenant_lookup:
+            if not create:
+                return -1
+            self._tenant_lookup[tenant_id] = len(self._tenant_lookup) + 1
+        return self._tenant_lookup[tenant_id]
+    
+    def _get_partition(self, code: int) -> "faiss.IndexIDMap2":
+        """Get (building on first use) the sub-index holding one tenant's vectors."""
+        if code not in self._partitions:
+            labels = np.flatnonzero(self._tenant_codes == code).astype(np.int64)
+            self._partitions[code] = self._build_index(self._embeddings[labels], labels)
+        return self._partitions[code]
+    
+    def _search_partitions(
+        self,
+        query_embeddings: np.ndarray,
+        codes: List[int],
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search several tenant partitions and merge their (global label) results."""
+        all_scores, all_labels = [], []
+        for code in codes:
+            partition = self._get_partition(code)
+            if partition.ntotal == 0:
+                continue
+            scores, labels = ann_search(partition, query_embeddings, min(top_k, partition.ntotal), self._embeddings)
+            all_scores.append(scores)
+            all_labels.append(labels)
+        
+        if not all_scores:
+            empty = np.zeros((len(query_embeddings), 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+        
+        scores = np.concatenate(all_scores, axis=1)
+        labels = np.concatenate(all_labels, axis=1)
+        order = np.argsort(-scores, axis=1)[:, :top_k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(labels, order, axis=1)
+    
+    def _search_subset(
+        self,
+        index: "faiss.IndexIDMap2",
+        query_embeddings: np.ndarray,
+        mask: np.ndarray,
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search only the labels set in `mask`."""
+        labels = np.flatnonzero(mask).astype(np.int64)
+        top_k = min(top_k, len(labels))
+        if top_k == 0:
+            empty = np.zeros((len(query_embeddings), 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+        
+        # HNSW graph search degrades badly under selective filters
+        selective = len(labels) < 0.1 * index.ntotal
+        if len(labels) <= EXACT_SUBSET_MAX or (index_type(index) == 'hnsw' and selective):
+            # Exact inner product over the subset's stored embeddings
+            sims = query_embeddings @ np.asarray(self._embeddings[labels], dtype=np.float32).T
+            top = np.argpartition(-sims, top_k - 1, axis=1)[:, :top_k]
+            order = np.argsort(-np.take_along_axis(sims, top, axis=1), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            return np.take_along_axis(sims, top, axis=1), labels[top]
+        
+        import faiss
+        bits = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bits))
+        params = search_parameters(index, self._search_params, selector)
+        return ann_search(index, query_embeddings, top_k, self._embeddings, params)
+    
+    def _fuse(
+        self,
+        queries: List[str],
+        query_embeddings: np.ndarray,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        scope: Optional[np.ndarray],
+        top_k: int,
+        embeddings: np.ndarray,
+        lexical: LexicalIndex
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Merge vector hits with BM25 hits (same scope) by reciprocal rank fusion.
+        Returned scores stay cosine similarities, computed exactly for
+        BM25-only hits, so min_score and downstream thresholds keep their meaning.
+        """
+        width = indices.shape[1] + top_k
+        fused_scores = np.full((len(queries), width), -np.inf, dtype=np.float32)
+        fused_labels = np.full((len(queries), width), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            lexical_hits, _ = lexical.search(query, top_k, scope)
+            labels = np.array(
+                rrf_fuse([indices[row][indices[row] >= 0], lexical_hits], settings.hybrid_rrf_k), dtype=np.int64
+            )
+            # Labels added by a concurrent write may be past this search's view
+            labels = labels[labels < len(embeddings)]
+            fused_labels[row, :len(labels)] = labels
+            fused_scores[row, :len(labels)] = np.asarray(embeddings[labels], dtype=np.float32) @ query_embeddings[row]
+        return fused_scores, fused_labels
+    
+    def _write_atomic(self, path: str, write_fn):
+        """Write a file via temp file + fsync + rename so readers never see a partial file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def _save_index(self, new_epoch: bool = False):
+        """
+        Checkpoint the index and embeddings as a new versioned snapshot.
+        Files are written under a new version suffix first; committing the
+        KB store meta (version + the delta seq it covers) is the atomic switch.
+        new_epoch marks renumbered labels (compaction, rebuild, sync): older
+        deltas no longer apply, so other processes reload the snapshot.
+        """
+        with self._lock, self.store.transaction():
+            if new_epoch:
+                # Rebuilt from the store's rows under the write lock: covers every delta
+                self._applied_seq = self.store.last_delta_seq()
+            else:
+                # Fold in other writers' deltas so the snapshot covers them too
+                self.refresh()
+            
+            current = int(self.store.get_meta('version') or 0)
+            version = current + 1
+            epoch = int(self.store.get_meta('epoch') or 0) + (1 if new_epoch else 0)
+            
+            os.makedirs(os.path.dirname(settings.faiss_index_path) or ".", exist_ok=True)
+            import faiss
+            index_bytes = faiss.serialize_index(self.index)
+            self._write_atomic(f"{settings.faiss_index_path}.v{version}", lambda f: f.write(index_bytes.tobytes()))
+            self._write_atomic(
+                f"{settings.embeddings_path}.v{version}",
+                lambda f: np.save(f, np.asarray(self._embeddings, dtype=np.float32))
+            )
+            
+            # Keep one snapshot's worth of deltas for processes slightly behind;
+            # anyone older than that reloads the snapshot
+            pruned = self._applied_seq if new_epoch else int(self.store.get_meta('snapshot_seq') or 0)
+            self.store.prune_deltas(pruned)
+            self.store.set_meta({
+                'version': version,
+                'epoch': epoch,
+                'snapshot_seq': self._applied_seq,
+                'pruned_seq': pruned,
+                'written_at': time.time(),
+                'index_type': index_type(self.index),
+                'nprobe': self._search_params['nprobe'],
+                'ef_search': self._search_params['ef_search'],
+            })
+            
+            self._version, self._epoch = version, epoch
+            self._pending_writes = 0
+        
+        # The previous snapshot stays for processes still loading it
+        if current > 1:
+            for path in (settings.faiss_index_path, settings.embeddings_path):
+                try:
+                    os.remove(f"{path}.v{current - 1}")
+                except OSError:
+                    pass
+    
+    def _mark_dirty(self, count: int = 1):
+        """Record pending mutations and schedule (or trigger) a snapshot."""
+        with self._lock:
+            self._pending_writes += count
+            if self._pending_writes >= settings.index_flush_max_pending:
+                self._cancel_flush_timer()
+                self._save_index()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(settings.index_flush_interval_seconds, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _cancel_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+    
+    def flush(self):
+        """Snapshot pending mutations now (they are already durable in the delta log)."""
+        with self._lock:
+            self._cancel_flush_timer()
+            if self._pending_writes:
+                self._save_index()
+    
+    # --- Cross-process refresh ---
+    
+    def refresh(self) -> bool:
+        """
+        Bring this process up to the KB state committed by any process.
+        Replays new deltas in place, or reloads the snapshot if labels were
+        renumbered or the deltas it needs were pruned. Returns True on change.
+        """
+        with self._lock:
+            with self.store.transaction(write=False):
+                epoch = int(self.store.get_meta('epoch') or 0)
+                pruned = int(self.store.get_meta('pruned_seq') or 0)
+                current = epoch == self._epoch and self._applied_seq >= pruned
+                deltas = self.store.deltas_since(self._applied_seq) if current else []
+            
+            if not current:
+                self._reload()
+                return True
+            self._apply_deltas(deltas)
+            return bool(deltas)
+    
+    def _reload(self):
+        """Load the committed state off to the side, then swap it in whole."""
+        shadow = copy.copy(self)
+        # The shadow's objects are private until the swap: no need to block searches
+        shadow._index_lock = ReadWriteLock()
+        shadow._load_snapshot()
+        with self._index_lock.write():
+            for name in ('index', '_embeddings', '_ids', '_tenant_codes', '_tenant_lookup', '_partitions',
+                         '_postings', '_lexical', '_version', '_epoch', '_applied_seq'):
+                setattr(self, name, getattr(shadow, name))
+        print(f"[MATCHER] Reloaded index v{self._version} (epoch {self._epoch}, {self.size} passages)")
+    
+    def _watch(self, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[MATCHER] Index refresh failed: {e}")
+    
+    def _apply_deltas(self, deltas: List[Tuple]):
+        """Replay (seq, op, label, item_id, tenant_id, embedding) deltas onto the index."""
+        adds: List[Tuple] = []
+        updated: List[int] = []
+        for seq, op, label, item_id, tenant_id, blob in deltas:
+            if op == 'add':
+                adds.append((label, item_id, tenant_id, blob))
+                continue
+            # Keep ordering: pending adds land before a later remove/re-scope
+            self._add_delta_vectors(adds)
+            adds = []
+            if op == 'remove':
+                self._tombstone(label)
+            elif op in ('meta', 'tenant'):
+                self._set_tenant_code(label, tenant_id)
+                updated.append(label)
+        self._add_delta_vectors(adds)
+        # Metadata lives in the store: re-read it for re-scoped labels
+        metadata = self.store.passage_metadata(updated) if updated else {}
+        with self._index_lock.write():
+            self._postings.update(metadata)
+        if deltas:
+            self._applied_seq = deltas[-1][0]
+    
+    def _add_delta_vectors(self, adds: List[Tuple]):
+        if not adds:
+            return
+        labels, item_ids, tenant_ids, blobs = zip(*adds)
+        embeddings = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(-1, self.dimension).copy()
+        self._add_vectors(np.array(labels, dtype=np.int64), list(item_ids), list(tenant_ids), embeddings)
+    
+    def _add_vectors(
+        self,
+        labels: np.ndarray,
+        item_ids: List[str],
+        tenant_ids: List[Optional[str]],
+        embeddings: np.ndarray
+    ):
+        """Place vectors at new labels in the index, built partitions and label arrays."""
+        metadata = self.store.passage_metadata(labels.tolist())
+        texts = self.store.passage_texts(labels.tolist())
+        with self._index_lock.write():
+            self._place_vectors(labels, item_ids, tenant_ids, embeddings, metadata, texts)
+    
+    def _place_vectors(
+        self,
+        labels: np.ndarray,
+        item_ids: List[str],
+        tenant_ids: List[Optional[str]],
+        embeddings: np.ndarray,
+        metadata: Dict[int, Dict],
+        texts: Dict[int, str]
+    ):
+        grow = int(labels.max()) + 1 - len(self._ids)
+        if grow > 0:
+            self._embeddings = np.vstack([self._embeddings, np.zeros((grow, self.dimension), dtype=np.float32)])
+            self._ids = np.concatenate([self._ids, np.full(grow, '', dtype=np.str_)])
+            self._tenant_codes = np.concatenate([self._tenant_codes, np.full(grow, -2, dtype=np.int32)])
+        elif not self._embeddings.flags.writeable:
+            self._embeddings = np.array(self._embeddings)
+        
+        width = max(len(i) for i in item_ids)
+        if width > self._ids.dtype.itemsize // 4:
+            self._ids = self._ids.astype(f'U{width}')
+        
+        codes = np.array([self._tenant_code(t, create=True) for t in tenant_ids], dtype=np.int32)
+        self._embeddings[labels] = embeddings
+        self._ids[labels] = item_ids
+        self._tenant_codes[labels] = codes
+        self.index.add_with_ids(embeddings, labels)
+        self._postings.update(metadata)
+        self._lexical.update(texts)
+        
+        # Keep already-built tenant partitions in step
+        for code in set(codes.tolist()) & set(self._partitions):
+            mask = codes == code
+            self._partitions[code].add_with_ids(embeddings[mask], labels[mask])
+    
+    def encode(self, texts: List[str], batch_size: int = 64, cache: bool = True) -> np.ndarray:
+        """
+        Encode texts into L2-normalized float32 embeddings.
+        KB writes pass cache=False: their vectors are persisted with the index
+        and would only evict query entries from the LRU.
+        """
+        if cache and settings.embedding_cache_size:
+            return self.embedding_cache.encode(texts, batch_size=batch_size)
+        return self.embedder.encode(texts, batch_size=batch_size)
+    
+    async def encode_async(self, texts: List[str], cache: bool = True) -> np.ndarray:
+        """Encode from async code on the dispatcher thread, batched with concurrent callers."""
+        return await self.dispatcher.encode_async(texts, cache=cache)
+    
+    def stats(self) -> Dict:
+        """Index and embedding cache counters."""
+        return {
+            'items': self.store.count(),
+            'passages': self.size,
+            'index_type': index_type(self.index),
+            'version': self._version,
+            'epoch': self._epoch,
+            'applied_seq': self._applied_seq,
+            'embedding_backend': self.embedder.name,
+            'embedding_cache': self.embedding_cache.stats(),
+            'embedding_dispatcher': self.dispatcher.stats(),
+            'filter_postings': self._postings.stats(),
+            'lexical_index': self._lexical.stats(),
+        }
+    
+    def add_item(self, item_id: str, content: str, metadata: Dict = None):
+        """Add item to knowledge base and index (replaces an existing item with the same id)."""
+        self.add_items([{**(metadata or {}), 'id': item_id, 'content': content}])
+    
+    def add_items(self, items: List[Dict]):
+        """
+        Bulk upsert of KB items (dicts with 'id', 'content' and metadata).
+        New or changed content is encoded in one batch; unchanged content
+        only updates metadata.
+        """
+        with self._lock, self.store.transaction():
+            # Replay other processes' writes first: new labels go after theirs
+            self.refresh()
+            
+            # Last write wins for repeated ids within the batch; updated_at
+            # (for updated_after filters) defaults to the write time
+            now = datetime.now(timezone.utc).isoformat()
+            pending: Dict[str, Dict] = {}
+            for item in items:
+                pending[item['id']] = {
+                    'updated_at': now, **item, 'content_hash': content_hash(item['content'])
+                }
+            
+            stored = self.store.lookup(list(pending))
+            to_encode, deltas, updated = [], [], []
+            for item_id, kb_item in pending.items():
+                existing = stored.get(item_id)
+                if existing is not None and existing[1] == kb_item['content_hash']:
+                    # Content unchanged: metadata-only update, no embedding needed
+                    for label in existing[0]:
+                        self._set_tenant_code(label, kb_item.get('tenant_id'))
+                        deltas.append(('meta', label, item_id, kb_item.get('tenant_id'), None))
+                    updated.extend(existing[0])
+                    continue
+                if existing is not None:
+                    self._drop_passages(item_id, existing[0])
+                    deltas.extend(('remove', label, item_id, None, None) for label in existing[0])
+                to_encode.append(kb_item)
+            self.store.put(pending.values())
+            metadata = self.store.passage_metadata(updated) if updated else {}
+            with self._index_lock.write():
+                self._postings.update(metadata)
+            
+            if to_encode:
+                # Generate passage embeddings under fresh labels
+                passages, texts = self._chunk(to_encode, start=len(self._ids))
+                embeddings = self.dispatcher.encode(texts, cache=False)
+                
+                # Add to FAISS and store passages
+                tenants = {item['id']: item.get('tenant_id') for item in to_encode}
+                labels = np.array([row[0] for row in passages], dtype=np.int64)
+                parents = [row[1] for row in passages]
+                self.store.put_passages(passages)
+                self._add_vectors(labels, parents, [tenants[i] for i in parents], embeddings)
+                deltas.extend(
+                    ('add', int(label), parent, tenants[parent], row.tobytes())
+                    for label, parent, row in zip(labels, parents, np.asarray(embeddings, dtype=np.float32))
+                )
+            
+            self._applied_seq = self.store.append_deltas(deltas)
+            
+            # Re-select the index type (and train) once the KB outgrows it
+            if to_encode and choose_index_type(self.size, settings.ann_index_type) != index_type(self.index):
+                self._reindex_from_embeddings()
+                self._cancel_flush_timer()
+                self._save_index(new_epoch=True)
+            else:
+                self._mark_dirty(len(pending))
+    
+    def _set_tenant_code(self, label: int, tenant_id: Optional[str]):
+        """Move a label to another tenant partition if its tenant changed."""
+        with self._index_lock.write():
+            code = self._tenant_code(tenant_id, create=True)
+            previous = int(self._tenant_codes[label])
+            if code != previous:
+                self._tenant_codes[label] = code
+                self._partitions.pop(previous, None)
+                self._partitions.pop(code, None)
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Change the ANN recall/latency operating point; persisted with the index."""
+        with self._lock:
+            if nprobe:
+                self._search_params['nprobe'] = nprobe
+            if ef_search:
+                self._search_params['ef_search'] = ef_search
+            with self._index_lock.write():
+                for index in [self.index, *self._partitions.values()]:
+                    apply_search_params(index, self._search_params)
+            self._mark_dirty()
+    
+    def reindex(self):
+        """
+        Rebuild the ANN index from stored embeddings (no re-encode), choosing
+        the index type from the current settings, e.g. after ann_index_type changed.
+        """
+        with self._lock, self.store.transaction():
+            self.refresh()
+            self._reindex_from_embeddings()
+            self._cancel_flush_timer()
+            self._save_index(new_epoch=True)
+
+    def update_item(self, item_id: str, content: str, metadata: Dict = None):
+        """Replace an item's content/metadata with a single embedding call."""
+        self.add_item(item_id, content, metadata)
+    
+    def _tombstone(self, label: int):
+        """Remove one label from the global index and its partition."""
+        with self._index_lock.write():
+            if label >= len(self._ids):
+                return
+            # HNSW cannot remove vectors: the tombstone below masks the hit
+            # until the next compaction or rebuild
+            ids = np.array([label], dtype=np.int64)
+            if supports_removal(self.index):
+                self.index.remove_ids(ids)
+            
+            code = int(self._tenant_codes[label])
+            if code in self._partitions and supports_removal(self._partitions[code]):
+                self._partitions[code].remove_ids(ids)
+            
+            self._ids[label] = ''
+            self._tenant_codes[label] = -2
+            self._postings.discard(label)
+            self._lexical.discard(label)
+    
+    def _drop_passages(self, item_id: str, labels: List[int]):
+        """Remove an item's passages from the index and the store."""
+        for label in labels:
+            self._tombstone(label)
+        self.store.delete_passages([item_id])
+    
+    def _chunk(self, items: List[Dict], start: int) -> Tuple[List[Tuple[int, str, int, int]], List[str]]:
+        """Split items into passages labelled from `start`: (passage rows, passage texts)."""
+        rows, texts = [], []
+        for item in items:
+            content = item['content'] or ''
+            for begin, end in split_passages(content, settings.kb_passage_max_chars):
+                rows.append((start + len(rows), item['id'], begin, end))
+                texts.append(content[begin:end])
+        return rows, texts
+    
+    def remove_item(self, item_id: str):
+        """Remove item from knowledge base without rebuilding the index."""
+        with self._lock, self.store.transaction():
+            self.refresh()
+            existing = self.store.lookup([item_id]).get(item_id)
+            if existing is None:
+                return
+            
+            self._drop_passages(item_id, existing[0])
+            self.store.delete([item_id])
+            self._applied_seq = self.store.append_deltas(
+                ('remove', label, item_id, None, None) for label in existing[0]
+            )
+            
+            # Compact once tombstones dominate, reusing stored embeddings
+            if len(self._ids) > 100 and self.size < len(self._ids) // 2:
+                self._reindex_from_embeddings()
+                self._cancel_flush_timer()
+                self._save_index(new_epoch=True)
+            else:
+                self._mark_dirty()
+    
+    def _rebuild_index(self):
+        """Rebuild FAISS index from KB items (re-encodes all content)."""
+        with self._lock, self.store.transaction():
+            items = list(self.store.iter_items())
+            passages, texts = self._chunk(items, start=0)
+            self.store.replace_all(items, passages)
+            
+            # Regenerate embeddings
+            self._embeddings = self.dispatcher.encode(texts, cache=False)
+            
+            # Add to index and rebuild mappings
+            self.index = self._build_index(self._embeddings)
+            self._refresh_mappings()
+            
+            # Save
+            self._cancel_flush_timer()
+            self._save_index(new_epoch=True)
+    
+    def sync_with_database(self, kb_items: List[Dict]) -> Dict[str, int]:
+        """
+        Sync FAISS index with database KB items.
+        Only new or changed items (by content hash) are re-encoded; stored
+        embeddings are reused for the rest and deleted items are dropped.
+        """
+        with self._lock, self.store.transaction():
+            # Stored embeddings are reused by label: they must match the store
+            self.refresh()
+            return self._sync_locked(kb_items)
+    
+    def _sync_locked(self, kb_items: List[Dict]) -> Dict[str, int]:
+        stored = self.store.all_hashes()
+        
+        new_items = [{**db_item, 'content_hash': content_hash(db_item.get('content'))} for db_item in kb_items]
+        passages, texts = self._chunk(new_items, start=0)
+        
+        # Passage rows of each item are contiguous, in item order
+        reuse_labels, reuse_rows = [], []
+        encode_rows, encode_texts = [], []
+        row, reused_items = 0, 0
+        for item in new_items:
+            count = 0
+            while row + count < len(passages) and passages[row + count][1] == item['id']:
+                count += 1
+            previous = stored.get(item['id'])
+            # Same content and same passage split: reuse the stored vectors
+            if previous and previous[1] == item['content_hash'] and len(previous[0]) == count:
+                reuse_labels.extend(previous[0])
+                reuse_rows.extend(range(row, row + count))
+                reused_items += 1
+            else:
+                encode_rows.extend(range(row, row + count))
+                encode_texts.extend(texts[row:row + count])
+            row += count
+        
+        embeddings = np.zeros((len(passages), self.dimension), dtype=np.float32)
+        if reuse_rows:
+            embeddings[reuse_rows] = self._embeddings[reuse_labels]
+        if encode_rows:
+            embeddings[encode_rows] = self.dispatcher.encode(encode_texts, cache=False)
+        
+        self.store.replace_all(new_items, passages)
+        self._embeddings = embeddings
+        self.index = self._build_index(embeddings)
+        self._refresh_mappings()
+        self._cancel_flush_timer()
+        self._save_index(new_epoch=True)
+        
+        stats = {
+            'total': len(new_items),
+            'reused': reused_items,
+            'encoded': len(new_items) - reused_items,
+            'passages': len(passages),
+            'removed': len(set(stored) - {item['id'] for item in new_items}),
+        }
+        print(f"[MATCHER] Sync complete: {stats}")
+        return stats
+    
+    async def search(
+        self, 
+        query: str, 
+        top_k: int = 5,
+        min_score: float = 0.0,
+        tenant_id: str = None,
+        filters: Optional[Dict] = None
+    ) -> List[MatchResult]:
+        """Search for similar KB items."""
+        results = await self.search_batch(
+            [query], top_k=top_k, min_score=min_score, tenant_id=tenant_id, filters=filters
+        )
+        return results[0]
+    
+    async def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        min_score: float = 0.0,
+        tenant_id: str = None,
+        filters: Optional[Dict] = None
+    ) -> List[List[MatchResult]]:
+        """
+        Search for many queries with one (micro-batched) encode and one matrix search.
+        Passages are over-fetched and aggregated per parent item (max score);
+        each result carries its matched passages, best first.
+        With hybrid_search, vector and BM25 passage ranks are fused (RRF).
+        `filters` ({'category', 'tags', 'source', 'updated_after'}, see KBFilter)
+        restrict the search itself to matching passages.
+        """
+        if not queries or self.index.ntotal == 0 or not self.size:
+            return [[] for _ in queries]
+        
+        # Encoded on the dispatcher thread, batched with concurrent callers
+        query_embeddings = await self.dispatcher.encode_async(queries)
+        
+        # Searches run alongside each other but never during an in-place
+        # index update (FAISS does not allow modifying an index mid-search)
+        with self._index_lock.read():
+            # One consistent view even if a reload swaps the index mid-search
+            index, ids, codes = self.index, self._ids, self._tenant_codes
+            embeddings, lexical = self._embeddings, self._lexical
+            fetch_k = top_k * settings.kb_passage_fanout
+            
+            # Label scope for the lexical side (None = every live passage)
+            scope = None
+            kb_filter = KBFilter.from_dict(filters)
+            if not kb_filter.is_empty():
+                # Resolve the filter (and tenant scope) to a label set up front
+                scope = self._postings.mask(kb_filter, len(codes)) & (codes != -2)
+                if tenant_id:
+                    scope &= np.isin(codes, [0, self._tenant_code(tenant_id)])
+                scores, indices = self._search_subset(index, query_embeddings, scope, fetch_k)
+            elif tenant_id:
+                # Enforce multi-tenancy isolation by searching only the tenant's own
+                # partition plus shared items (code 0), so cost scales with tenant KB size
+                code = self._tenant_code(tenant_id)
+                tenant_codes = [0, code] if code > 0 else [0]
+                scores, indices = self._search_partitions(query_embeddings, tenant_codes, fetch_k)
+                scope = np.isin(codes, tenant_codes)
+            else:
+                scores, indices = ann_search(index, query_embeddings, min(fetch_k, index.ntotal), embeddings)
+            
+            if settings.hybrid_search and lexical.size:
+                scores, indices = self._fuse(queries, query_embeddings, scores, indices, scope, fetch_k, embeddings, lexical)
+            
+            # Vectorized validity mask: real (non-removed) hit above threshold
+            valid = (indices >= 0) & (indices < len(codes)) & (scores >= min_score)
+            valid &= codes[np.clip(indices, 0, len(codes) - 1)] != -2
+            
+            # Group passage hits by parent item (hits are in rank order, so the
+            # first passage seen is the parent's best) and keep the top_k parents
+            grouped: List[Dict[str, List[Tuple[int, float]]]] = []
+            for row in range(len(queries)):
+                parents: Dict[str, List[Tuple[int, float]]] = {}
+                for col in np.flatnonzero(valid[row]):
+                    label = int(indices[row, col])
+                    parent = str(ids[label])
+                    if parent not in parents and len(parents) == top_k:
+                        continue
+                    if len(parents.setdefault(parent, [])) < MAX_PASSAGES_PER_MATCH:
+                        parents[parent].append((label, float(scores[row, col])))
+                grouped.append(parents)
+        
+        # Hydrate content only for the passages actually returned
+        hits = self.store.fetch(
+            label for parents in grouped for passage_hits in parents.values() for label, _ in passage_hits
+        )
+        
+        results = []
+        for query, parents in zip(queries, grouped):
+            # The store is authoritative: hits removed (or re-scoped) by another
+            # process since the last refresh are dropped
+            matches = []
+            for passage_hits in parents.values():
+                found = [(label, hits[label], score) for label, score in passage_hits if label in hits]
+                if not found or (tenant_id and found[0][1].get('tenant_id') not in (None, '', tenant_id)):
+                    continue
+                label, item, score = found[0]
+                passages = [hit['passage'] for _, hit, _ in found]
+                matches.append((item, score, passages, lexical.coverage(query, label)))
+            results.append([
+                MatchResult(
+                    kb_item_id=item['id'], content=item['content'], score=score, rank=rank,
+                    passages=passages, lexical_coverage=round(coverage, 3)
+                )
+                for rank, (item, score, passages, coverage) in enumerate(matches, start=1)
+            ])
+        
+        return results
+
+
 # Singleton instance
 _matcher: Optional[VectorMatcher] = None
+_matcher_lock = threading.Lock()
+_warmup = {'state': 'cold', 'error': None, 'started_at': None, 'seconds': None}
 
 
 def get_matcher() -> VectorMatcher:
     global _matcher
     if _matcher is None:
-        _matcher = VectorMatcher()
+        # Concurrent first callers (warm-up thread, requests) load the model once
+        with _matcher_lock:
+            if _matcher is None:
+                if settings.retrieval_socket:
+                    # Model and index live in the retrieval sidecar
+                    from app.services.retrieval.client import RemoteMatcher
+                    _matcher = RemoteMatcher(settings.retrieval_socket)
+                else:
+                    _matcher = VectorMatcher()
     return _matcher
+
+
+def is_matcher_ready() -> bool:
+    if _warmup['state'] == 'cold':
+        # No warm-up was started: ready once something has loaded the matcher
+        return _matcher is not None
+    return _warmup['state'] == 'ready'
+
+
+def matcher_status() -> Dict:
+    """Warm-up state for readiness checks: cold, warming, ready or failed."""
+    return {**_warmup, 'state': 'ready' if is_matcher_ready() else _warmup['state']}
+
+
+def _warm_up(attempts: int = 60, delay: float = 2.0):
+    _warmup.update(state='warming', started_at=time.time())
+    for attempt in range(1, attempts + 1):
+        try:
+            # Load the index and run one encode so the first request pays nothing
+            # (with a retrieval sidecar this waits for the sidecar to come up)
+            get_matcher().encode(["warm-up"], cache=False)
+            _warmup.update(state='ready', error=None, seconds=round(time.time() - _warmup['started_at'], 2))
+            print(f"[MATCHER] Warm-up complete in {_warmup['seconds']}s")
+            return
+        except Exception as e:
+            _warmup.update(error=str(e))
+            if not settings.retrieval_socket or attempt == attempts:
+                break
+            time.sleep(delay)
+    _warmup.update(state='failed')
+    print(f"[MATCHER] Warm-up failed: {_warmup['error']}")
+
+
+def warm_up_matcher() -> threading.Thread:
+    """Load faiss, the embedding model and the index in a background thread."""
+    thread = threading.Thread(target=_warm_up, name="matcher-warmup", daemon=True)
+    thread.start()
+    return thread
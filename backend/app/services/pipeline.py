@@ -10,6 +10,7 @@ from app.core.supabase import get_supabase
 from app.services.parser import get_parser
 from app.services.extractor import get_extractor
 from app.services.matcher import get_matcher
+from app.services.language import detect_language
 
 
 class ProcessingPipeline:
@@ -51,7 +52,10 @@ class ProcessingPipeline:
             print(f"[{document_id}] Starting extraction...")
             await self._update_status(document_id, "EXTRACTING", 40)
             
-            requirements = await self.extractor.extract(parsed.raw_text, parsed.pages)
+            language = detect_language(parsed.raw_text)
+            self.supabase.table('documents').update({'language': language}).eq('id', document_id).execute()
+            
+            requirements = await self.extractor.extract(parsed.raw_text, parsed.pages, language=language)
             print(f"[{document_id}] Extraction complete. Found {len(requirements)} requirements.")
             
             # Save requirements to database
@@ -66,6 +70,8 @@ class ProcessingPipeline:
                     'page_number': req.page_number,
                     'extraction_order': req.order,
                     'priority': req.priority,
+                    'language': req.language,
+                    'duplicate_refs': req.duplicates,
                 }).execute()
             
             await asyncio.sleep(0.5)
@@ -107,7 +113,10 @@ class ProcessingPipeline:
                         'requirement_id': result['requirement_id'],
                         'kb_item_id': valid_kb_id,
                         'match_percentage': result['match_percentage'],
-                        'matched_content': match['content'][:500] if match.get('content') else "",  # Limit content
+                        # Matched passages (what composition uses), else the item content
+                        'matched_content': (' '.join(match.get('passages') or []) or match.get('content') or "")[:500],
+                        'passages': match.get('passages') or [],
+                        'lexical_coverage': match.get('lexical_coverage', 0.0),
                         'rank': match['rank'],
                     }).execute()
             
@@ -0,0 +1,122 @@
+"""
+Requirement Confidence Model
+Local nearest-centroid classifier over regex-extracted requirement candidates.
+Reuses the multilingual MiniLM embeddings loaded by VectorMatcher, so scoring
+a document needs no remote calls.
+"""
+import numpy as np
+from typing import List, Dict, Optional
+
+from app.services.matcher import get_matcher
+
+
+# Labelled prototype sentences per class. NOISE covers text the regex patterns
+# commonly pick up that is not an answerable requirement.
+PROTOTYPES: Dict[str, List[str]] = {
+    "ELIGIBILITY": [
+        "The bidder must have a minimum of 5 years of experience in similar projects.",
+        "Average annual turnover of the bidder should be at least Rs. 50 crore in the last three financial years.",
+        "The bidder shall be a company registered under the Companies Act, 2013.",
+        "The bidder must hold a valid ISO 9001 and ISO 27001 certification.",
+        "The bidder should have successfully completed at least three similar works for government clients.",
+        "Positive net worth in each of the last three financial years is mandatory.",
+        "The bidder must be empaneled with CERT-In or MeitY.",
+    ],
+    "TECHNICAL": [
+        "The system shall provide role-based access control for all users.",
+        "The solution must support integration with existing ERP and SAP systems.",
+        "The platform should guarantee 99.9% uptime with 24x7 support.",
+        "The bidder shall implement data encryption at rest and in transit.",
+        "Describe your approach to scalability and performance under peak load.",
+        "The application must be accessible on mobile devices and support multiple languages.",
+        "Deliverables include design documents, source code and user training.",
+    ],
+    "COMPLIANCE": [
+        "The bidder shall submit a duly signed declaration on company letterhead.",
+        "Attach copies of all relevant certificates as documentary proof.",
+        "An undertaking stating that the bidder has not been blacklisted must be submitted.",
+        "A notarized affidavit is required along with the technical bid.",
+        "The bidder must comply with all applicable labour laws and statutory regulations.",
+        "Submit the earnest money deposit in the form of a bank guarantee.",
+        "All documents must be in accordance with the tender terms and conditions.",
+    ],
+    "NOISE": [
+        "Table of Contents",
+        "Page 3 of 45",
+        "Section 4: General Instructions to Bidders",
+        "Ministry of Electronics and Information Technology, New Delhi",
+        "Date of issue: 12 March 2024",
+        "This document is confidential and intended for the addressee only.",
+        "For any queries, contact the procurement officer at the address below.",
+        "The following abbreviations are used in this document.",
+    ],
+}
+
+REQUIREMENT_CLASSES = ("ELIGIBILITY", "TECHNICAL", "COMPLIANCE")
+
+
+class RequirementClassifier:
+    """Batched nearest-centroid classifier in embedding space."""
+
+    def __init__(self, temperature: float = 0.05):
+        self.temperature = temperature
+        self.labels: List[str] = list(PROTOTYPES.keys())
+        self._centroids: Optional[np.ndarray] = None
+
+    def _get_centroids(self) -> np.ndarray:
+        """Compute (and cache) one normalized centroid per class."""
+        if self._centroids is None:
+            matcher = get_matcher()
+            centroids = []
+            for label in self.labels:
+                embeddings = matcher.encode(PROTOTYPES[label])
+                centroid = embeddings.mean(axis=0)
+                centroids.append(centroid / np.linalg.norm(centroid))
+            self._centroids = np.stack(centroids).astype(np.float32)
+        return self._centroids
+
+    def predict_proba(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Return an (n, n_classes) matrix of softmax class probabilities."""
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+
+        # Candidate sentences are one-off: keep them out of the query cache
+        embeddings = get_matcher().encode(texts, batch_size=batch_size, cache=False)
+        sims = embeddings @ self._get_centroids().T
+
+        logits = sims / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def score(self, texts: List[str], categories: List[str]) -> np.ndarray:
+        """
+        Per-candidate confidence that a regex hit is a real requirement
+        of the category the regex assigned it.
+        """
+        probs = self.predict_proba(texts)
+        if len(probs) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        noise_idx = self.labels.index("NOISE")
+        req_prob = 1.0 - probs[:, noise_idx]
+
+        class_idx = np.array([self.labels.index(c) for c in categories])
+        req_columns = [self.labels.index(c) for c in REQUIREMENT_CLASSES]
+        predicted = np.array(req_columns)[probs[:, req_columns].argmax(axis=1)]
+
+        # Category disagreement halves confidence rather than zeroing it:
+        # the regex still found a requirement, just possibly mis-filed.
+        agreement = np.where(predicted == class_idx, 1.0, 0.5)
+        return (req_prob * agreement).astype(np.float32)
+
+
+# Singleton instance
+_classifier: Optional[RequirementClassifier] = None
+
+
+def get_requirement_classifier() -> RequirementClassifier:
+    global _classifier
+    if _classifier is None:
+        _classifier = RequirementClassifier()
+    return _classifier
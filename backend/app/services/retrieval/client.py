@@ -0,0 +1,145 @@
+"""
+Retrieval Sidecar Client
+RemoteMatcher exposes the VectorMatcher interface used across the app but
+forwards every call to the retrieval sidecar, so this process never loads
+faiss, torch or the embedding model.
+"""
+import socket
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.matcher import MatchingMixin, MatchResult
+from app.services.retrieval.protocol import pack, read_frame, array_from_frame
+
+
+class RemoteMatcher(MatchingMixin):
+    """Drop-in VectorMatcher replacement backed by the retrieval sidecar."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout or get_settings().retrieval_timeout_seconds
+        # One connection per thread; requests on a connection are sequential
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _reset(self, sock: Optional[socket.socket]):
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def _call(self, header: Dict, payload: bytes = b"", wait: bool = False) -> Tuple[Dict, bytes]:
+        """
+        Send one request and read its response. `wait` drops the read timeout,
+        for KB mutations that can re-encode for minutes.
+        A request is resent once only if it never reached the sidecar or the
+        sidecar closed the connection without answering (stale connection,
+        restart); a timeout is raised as is, since the request may still run.
+        """
+        frame = pack(header, payload)
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                sock.settimeout(None if wait else self.timeout)
+                sock.sendall(frame)
+            except OSError:
+                self._reset(sock)
+                if attempt:
+                    raise
+                continue
+            try:
+                response, body = read_frame(sock)
+                break
+            except ConnectionError:
+                self._reset(sock)
+                if attempt:
+                    raise
+            except Exception:
+                # Timed out or failed mid-response: the connection is out of sync
+                self._reset(sock)
+                raise
+        if not response.get("ok"):
+            raise RuntimeError(f"Retrieval sidecar error: {response.get('error')}")
+        return response, body
+
+    # --- Encoding and search ---
+
+    def encode(self, texts: List[str], batch_size: int = 64, cache: bool = True) -> np.ndarray:
+        """Encode texts on the sidecar (batch size is the sidecar's own)."""
+        response, body = self._call({"op": "encode", "texts": list(texts), "cache": cache})
+        return array_from_frame(response, body)
+
+    async def encode_async(self, texts: List[str], cache: bool = True) -> np.ndarray:
+        return await asyncio.to_thread(self.encode, texts, cache=cache)
+
+    def _search(
+        self, queries: List[str], top_k: int, min_score: float, tenant_id: Optional[str], filters: Optional[Dict]
+    ) -> List[List[MatchResult]]:
+        response, _ = self._call({
+            "op": "search", "queries": list(queries),
+            "top_k": top_k, "min_score": min_score, "tenant_id": tenant_id, "filters": filters,
+        })
+        return [[MatchResult(**m) for m in row] for row in response["results"]]
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        min_score: float = 0.0,
+        tenant_id: str = None,
+        filters: Optional[Dict] = None
+    ) -> List[MatchResult]:
+        results = await self.search_batch(
+            [query], top_k=top_k, min_score=min_score, tenant_id=tenant_id, filters=filters
+        )
+        return results[0]
+
+    async def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        min_score: float = 0.0,
+        tenant_id: str = None,
+        filters: Optional[Dict] = None
+    ) -> List[List[MatchResult]]:
+        if not queries:
+            return []
+        return await asyncio.to_thread(self._search, queries, top_k, min_score, tenant_id, filters)
+
+    # --- KB mutations ---
+
+    def add_item(self, item_id: str, content: str, metadata: Dict = None):
+        self.add_items([{**(metadata or {}), 'id': item_id, 'content': content}])
+
+    def add_items(self, items: List[Dict]):
+        self._call({"op": "add_items", "items": items}, wait=True)
+
+    def update_item(self, item_id: str, content: str, metadata: Dict = None):
+        self.add_item(item_id, content, metadata)
+
+    def remove_item(self, item_id: str):
+        self._call({"op": "remove_item", "item_id": item_id}, wait=True)
+
+    def sync_with_database(self, kb_items: List[Dict]) -> Dict[str, int]:
+        response, _ = self._call({"op": "sync", "items": kb_items}, wait=True)
+        return response["stats"]
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        self._call({"op": "set_search_params", "nprobe": nprobe, "ef_search": ef_search})
+
+    def flush(self):
+        self._call({"op": "flush"}, wait=True)
+
+    def stats(self) -> Dict:
+        response, _ = self._call({"op": "stats"})
+        return {**response["stats"], 'remote': self.socket_path}
@@ -0,0 +1,62 @@
+"""
+Retrieval Sidecar Protocol
+Length-prefixed frames over a Unix socket: a JSON header plus an optional
+binary payload (raw float32 embeddings), so vectors never go through JSON.
+"""
+import json
+import socket
+import struct
+import asyncio
+from typing import Dict, Tuple
+
+import numpy as np
+
+# (header length, payload length)
+FRAME = struct.Struct("!II")
+
+# Guard against a corrupt length prefix allocating gigabytes
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+def pack(header: Dict, payload: bytes = b"") -> bytes:
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return FRAME.pack(len(body), len(payload)) + body + payload
+
+
+def _unpack_lengths(prefix: bytes) -> Tuple[int, int]:
+    header_len, payload_len = FRAME.unpack(prefix)
+    if header_len + payload_len > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame too large: {header_len + payload_len} bytes")
+    return header_len, payload_len
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Retrieval sidecar closed the connection")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(sock: socket.socket) -> Tuple[Dict, bytes]:
+    header_len, payload_len = _unpack_lengths(_recv_exact(sock, FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len))
+    return header, _recv_exact(sock, payload_len) if payload_len else b""
+
+
+async def read_frame_async(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+    header_len, payload_len = _unpack_lengths(await reader.readexactly(FRAME.size))
+    header = json.loads(await reader.readexactly(header_len))
+    return header, await reader.readexactly(payload_len) if payload_len else b""
+
+
+def array_to_frame(array: np.ndarray) -> Tuple[Dict, bytes]:
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {"shape": list(array.shape)}, array.tobytes()
+
+
+def array_from_frame(header: Dict, payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype=np.float32).reshape(header["shape"])
@@ -0,0 +1,133 @@
+"""
+Retrieval Sidecar
+One process per node owns the embedding model, FAISS index and KB store and
+serves encode/search/mutation calls over a Unix socket. API and Celery
+workers set RETRIEVAL_SOCKET and use RemoteMatcher instead of loading their
+own copy of the model. Encodes from all clients share the matcher's
+micro-batching dispatcher.
+
+Usage (from backend/):
+    python -m app.services.retrieval.server
+    python -m app.services.retrieval.server --socket /run/tender/retrieval.sock
+"""
+import os
+import signal
+import asyncio
+import argparse
+from dataclasses import asdict
+from typing import Dict, Tuple
+
+from app.core.config import get_settings
+from app.services.retrieval.protocol import pack, read_frame_async, array_to_frame
+
+DEFAULT_SOCKET = "/tmp/tender-retrieval.sock"
+
+
+class RetrievalServer:
+    """Dispatches protocol ops onto a local VectorMatcher."""
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+
+    async def handle_op(self, header: Dict, payload: bytes) -> Tuple[Dict, bytes]:
+        op = header.get("op")
+        matcher = self.matcher
+
+        if op == "ping":
+            return {"ok": True}, b""
+
+        if op == "encode":
+            embeddings = await matcher.encode_async(header["texts"], cache=header.get("cache", True))
+            meta, body = array_to_frame(embeddings)
+            return {"ok": True, **meta}, body
+
+        if op == "search":
+            results = await matcher.search_batch(
+                header["queries"],
+                top_k=header.get("top_k", 5),
+                min_score=header.get("min_score", 0.0),
+                tenant_id=header.get("tenant_id"),
+                filters=header.get("filters")
+            )
+            return {"ok": True, "results": [[asdict(m) for m in row] for row in results]}, b""
+
+        # Mutations take the matcher lock and may encode: keep them off the loop.
+        # They run alongside searches on the loop; the matcher's index lock
+        # makes a search wait for any in-place index update in progress
+        if op == "add_items":
+            await asyncio.to_thread(matcher.add_items, header["items"])
+            return {"ok": True}, b""
+        if op == "remove_item":
+            await asyncio.to_thread(matcher.remove_item, header["item_id"])
+            return {"ok": True}, b""
+        if op == "sync":
+            stats = await asyncio.to_thread(matcher.sync_with_database, header["items"])
+            return {"ok": True, "stats": stats}, b""
+        if op == "set_search_params":
+            await asyncio.to_thread(matcher.set_search_params, header.get("nprobe"), header.get("ef_search"))
+            return {"ok": True}, b""
+        if op == "flush":
+            await asyncio.to_thread(matcher.flush)
+            return {"ok": True}, b""
+        if op == "stats":
+            return {"ok": True, "stats": matcher.stats()}, b""
+
+        return {"ok": False, "error": f"Unknown op: {op}"}, b""
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header, payload = await read_frame_async(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    response, body = await self.handle_op(header, payload)
+                except Exception as e:
+                    response, body = {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+                writer.write(pack(response, body))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"[RETRIEVAL] Client error: {e}")
+        finally:
+            writer.close()
+
+
+async def serve(socket_path: str):
+    from app.services.matcher import VectorMatcher
+
+    # Always a local matcher here, whatever RETRIEVAL_SOCKET says
+    matcher = VectorMatcher()
+    matcher.encode(["warm-up"], cache=False)
+    server = RetrievalServer(matcher)
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    unix_server = await asyncio.start_unix_server(server.handle_client, path=socket_path)
+    os.chmod(socket_path, 0o660)
+    print(f"[RETRIEVAL] Serving {matcher.size} KB passages on {socket_path}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with unix_server:
+        await stop.wait()
+
+    matcher.flush()
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    print("[RETRIEVAL] Stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval sidecar serving encode/search over a Unix socket")
+    parser.add_argument("--socket", default=get_settings().retrieval_socket or DEFAULT_SOCKET)
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
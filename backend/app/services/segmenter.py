@@ -0,0 +1,80 @@
+"""
+Sentence Segmenter
+Single-pass, span-based sentence segmentation for requirement extraction.
+Yields (start, end) offsets into the original text instead of building
+masked and re-split copies of the document.
+"""
+import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = {
+    "Mr", "Mrs", "Ms", "Dr", "Prof", "Inc", "Ltd", "Co", "etc",
+    "No", "Nos", "Rs", "Sl", "vs", "viz", "approx", "Govt", "Dept",
+}
+
+_BOUNDARY_RE = re.compile(
+    # Sentence terminator followed by whitespace (kept with the sentence)
+    r"(?P<term>[.!?])(?=\s)"
+    # Numbered or bulleted list item on a new line (marker is dropped); a
+    # multi-level clause number ("2.2", "3.1.4.") is one marker, never split
+    r"|\n[ \t]*(?:\d+(?:\.\d+)*[.)](?!\d)[ \t]*|\d+(?:\.\d+)+[ \t]+|•[ \t]*|-[ \t]*)"
+    # Question numbering on a new line (Q1, Question 2) is kept with the question
+    r"|\n[ \t]*(?=(?:Q|Question)[ \t]*\.?[ \t]*\d)"
+)
+
+# A bare question label such as "Question 2" or "Q 1.1" that a period follows
+_QUESTION_LABEL_RE = re.compile(r"\s*(?:Q|Question)\s*\.?\s*\d+(?:\.\d+)*")
+
+
+def _is_abbreviation(text: str, dot: int) -> bool:
+    """Check whether the period at `dot` closes a known abbreviation."""
+    if text[max(0, dot - 3):dot] in ("e.g", "i.e"):
+        return True
+    start = dot
+    while start > 0 and text[start - 1].isalpha():
+        start -= 1
+    return start < dot and text[start:dot] in ABBREVIATIONS
+
+
+def _trim(text: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Shrink a span to exclude surrounding whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def iter_sentence_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) spans of sentences and list items in one pass."""
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        term = match.group("term")
+        if term:
+            if term == "." and (
+                _is_abbreviation(text, match.start())
+                or _QUESTION_LABEL_RE.fullmatch(text, start, match.start())
+            ):
+                continue
+            end = match.end()
+        else:
+            end = match.start()
+
+        span = _trim(text, start, end)
+        if span:
+            yield span
+        start = match.end()
+
+    span = _trim(text, start, len(text))
+    if span:
+        yield span
+
+
+def iter_page_sentences(pages: Iterable[Dict]) -> Iterator[Tuple[Optional[int], str]]:
+    """Lazily yield (page_num, sentence) pairs from a stream of parsed pages."""
+    for page in pages:
+        content = page.get("content") or ""
+        page_num = page.get("page_num")
+        for start, end in iter_sentence_spans(content):
+            yield page_num, content[start:end]
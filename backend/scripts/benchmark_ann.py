@@ -0,0 +1,184 @@
+"""
+ANN Recall vs Latency Report
+Sweeps the FAISS index types behind VectorMatcher (flat, HNSW, IVF-Flat,
+IVF-PQ) over their query-time knobs and reports recall@k against an exact
+scan, so an operating point (nprobe / efSearch) can be chosen and persisted.
+
+Usage (from backend/):
+    python scripts/benchmark_ann.py                       # current KB snapshot
+    python scripts/benchmark_ann.py --synthetic 200000    # random unit vectors
+    python scripts/benchmark_ann.py --types ivf_flat --output bench_ann.json
+    python scripts/benchmark_ann.py --apply-nprobe 32     # persist for the matcher
+
+Queries are KB vectors with added noise, which approximates requirement
+text landing near (but not on) KB items.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings requires Supabase credentials even though the report never uses them
+for key in ("SUPABASE_URL", "SUPABASE_SERVICE_KEY", "SUPABASE_ANON_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+import faiss
+
+from app.core.config import get_settings
+from app.services.ann import INDEX_TYPES, build_index, apply_search_params, choose_index_type, search
+from app.services.kb_store import get_kb_store
+
+DIMENSION = 384
+SWEEPS = {
+    "flat": [{}],
+    "hnsw": [{"ef_search": v} for v in (16, 32, 64, 128, 256)],
+    "ivf_flat": [{"nprobe": v} for v in (1, 4, 8, 16, 32, 64, 128)],
+    "ivf_pq": [{"nprobe": v} for v in (1, 4, 8, 16, 32, 64, 128)],
+}
+
+
+def load_embeddings() -> np.ndarray:
+    """Read the embeddings of the currently committed index snapshot."""
+    version = get_kb_store().get_meta("version")
+    if not version:
+        raise SystemExit("No committed index snapshot found; use --synthetic N")
+    return np.load(f"{get_settings().embeddings_path}.v{version}")
+
+
+def synthetic_embeddings(n: int, seed: int = 0) -> np.ndarray:
+    # Clustered rather than uniform, closer to how real KB text distributes
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 500), DIMENSION)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, DIMENSION)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(embeddings: np.ndarray, count: int, noise: float, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(embeddings), min(count, len(embeddings)), replace=False)
+    queries = embeddings[rows] + noise * rng.standard_normal((len(rows), embeddings.shape[1])).astype(np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def measure(index, embeddings: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> Dict:
+    # Single-query latency, as the matcher sees it for small batches
+    # (including the exact IVF-PQ re-rank)
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, labels = search(index, queries[i:i + 1], k, embeddings)
+        latencies.append(time.perf_counter() - start)
+        found[i] = labels[0]
+
+    start = time.perf_counter()
+    search(index, queries, k, embeddings)
+    batch_seconds = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "recall": round(recall_at_k(found, truth), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "batch_qps": round(len(queries) / batch_seconds, 1) if batch_seconds else None,
+    }
+
+
+def run_report(embeddings: np.ndarray, types: List[str], queries: int, k: int, noise: float) -> Dict:
+    query_vectors = make_queries(embeddings, queries, noise)
+    exact = faiss.IndexFlatIP(embeddings.shape[1])
+    exact.add(embeddings)
+    _, truth = exact.search(query_vectors, k)
+
+    results = []
+    for kind in types:
+        effective = choose_index_type(len(embeddings), kind)
+        start = time.perf_counter()
+        index = build_index(kind, embeddings.shape[1], embeddings)
+        build_seconds = time.perf_counter() - start
+        print(f"[{kind}] built as {effective} in {build_seconds:.1f}s")
+
+        for params in SWEEPS[effective]:
+            apply_search_params(index, params)
+            row = {"type": kind, "effective_type": effective, **params,
+                   "build_seconds": round(build_seconds, 2), **measure(index, embeddings, query_vectors, truth, k)}
+            results.append(row)
+
+    return {
+        "vectors": len(embeddings),
+        "queries": len(query_vectors),
+        "k": k,
+        "auto_type": choose_index_type(len(embeddings)),
+        "results": results,
+    }
+
+
+def print_report(report: Dict):
+    print(f"\nVectors: {report['vectors']}  Queries: {report['queries']}  k={report['k']}  "
+          f"auto -> {report['auto_type']}")
+    print(f"{'type':<10} {'param':<14} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'batch qps':>10}")
+    for r in report["results"]:
+        param = f"nprobe={r['nprobe']}" if "nprobe" in r else f"ef={r['ef_search']}" if "ef_search" in r else "-"
+        print(f"{r['effective_type']:<10} {param:<14} {r['recall']:>7.3f} {r['p50_ms']:>8.3f} "
+              f"{r['p95_ms']:>8.3f} {r['batch_qps'] or 0:>10.1f}")
+
+
+def apply_params(nprobe: Optional[int], ef_search: Optional[int]):
+    """Persist search params next to the committed index; the matcher reads them on load."""
+    store = get_kb_store()
+    values = {}
+    if nprobe:
+        values["nprobe"] = nprobe
+    if ef_search:
+        values["ef_search"] = ef_search
+    store.set_meta(values)
+    store.commit()
+    print(f"Persisted search params: {values}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Recall vs latency report for ANN index types")
+    parser.add_argument("--synthetic", type=int, help="Use N synthetic vectors instead of the KB snapshot")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="Comma-separated index types")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query (recall@k)")
+    parser.add_argument("--noise", type=float, default=0.05, help="Query perturbation around KB vectors")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--apply-nprobe", type=int, help="Persist nprobe for the matcher and exit")
+    parser.add_argument("--apply-ef-search", type=int, help="Persist efSearch for the matcher and exit")
+    args = parser.parse_args(argv)
+
+    if args.apply_nprobe or args.apply_ef_search:
+        apply_params(args.apply_nprobe, args.apply_ef_search)
+        return
+
+    embeddings = synthetic_embeddings(args.synthetic) if args.synthetic else load_embeddings()
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+
+    report = run_report(embeddings, types, args.queries, args.k, args.noise)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Extraction Benchmark
+Measures RequirementExtractor accuracy and throughput against a labelled
+golden corpus (benchmarks/extraction_golden.jsonl), fully offline.
+
+Usage (from backend/):
+    python scripts/benchmark_extraction.py
+    python scripts/benchmark_extraction.py --variants 5 --repeat 3
+    python scripts/benchmark_extraction.py --llm-mock --mock-latency-ms 800
+    python scripts/benchmark_extraction.py --output bench_extraction.json
+
+--llm-mock serves the gold labels from a local OpenAI-compatible endpoint,
+so the LLM path's plumbing (parsing, page mapping, de-duplication) and the
+regex-vs-LLM routing decision are measured without network access. It does
+not measure real LLM quality.
+"""
+import os
+import re
+import sys
+import io
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings requires Supabase credentials even though extraction never uses them
+for key in ("SUPABASE_URL", "SUPABASE_SERVICE_KEY", "SUPABASE_ANON_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+DEFAULT_DATASET = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks", "extraction_golden.jsonl"
+)
+CATEGORIES = ("ELIGIBILITY", "TECHNICAL", "COMPLIANCE")
+MATCH_THRESHOLD = 0.6
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Numbering styles used when generating synthetic variants
+MARKERS = [
+    lambda i: f"{i}. ",
+    lambda i: f"{i}) ",
+    lambda i: "• ",
+    lambda i: "- ",
+    lambda i: f"Q{i}: ",
+    lambda i: "",
+]
+NOISE_LINES = [
+    "Page {n} of 40",
+    "Section {n}: General Instructions to Bidders",
+    "This page is intentionally left blank.",
+    "Tender Reference No. GEM/2026/B/{n}0451",
+    "निविदा संदर्भ संख्या {n}",
+]
+
+
+def load_dataset(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def make_variants(doc: Dict, count: int, seed: int = 0) -> List[Dict]:
+    """Reorder, renumber and pad a labelled document with noise lines."""
+    rng = random.Random(f"{doc['doc_id']}-{seed}")
+    gold_texts = {r["text"] for r in doc["requirements"]}
+    context_lines = [
+        line for line in doc["text"].splitlines()
+        if line.strip() and not any(g in line for g in gold_texts)
+    ]
+
+    variants = []
+    for v in range(count):
+        reqs = list(doc["requirements"])
+        rng.shuffle(reqs)
+        marker = rng.choice(MARKERS)
+
+        lines = list(context_lines[:1])
+        for i, req in enumerate(reqs, start=1):
+            if rng.random() < 0.3:
+                lines.append(rng.choice(NOISE_LINES + context_lines).format(n=rng.randint(1, 40)))
+            text = req["text"]
+            # Don't double up question labels already in the gold text
+            prefix = "" if re.match(r"^Q\d+:", text) else marker(i)
+            lines.append(prefix + text)
+
+        variants.append({
+            **doc,
+            "doc_id": f"{doc['doc_id']}~v{v + 1}",
+            "source": "variant",
+            "text": "\n".join(lines),
+        })
+    return variants
+
+
+def _tokens(text: str) -> set:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+def _similarity(a: str, b: str) -> float:
+    ta, tb = _tokens(a), _tokens(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def align(predicted: List[Dict], gold: List[Dict]) -> List[tuple]:
+    """Greedy one-to-one alignment of predicted to gold requirements."""
+    pairs = []
+    for p_idx, p in enumerate(predicted):
+        for g_idx, g in enumerate(gold):
+            score = _similarity(p["text"], g["text"])
+            if score >= MATCH_THRESHOLD:
+                pairs.append((score, p_idx, g_idx))
+    pairs.sort(reverse=True)
+
+    used_p, used_g, matched = set(), set(), []
+    for score, p_idx, g_idx in pairs:
+        if p_idx in used_p or g_idx in used_g:
+            continue
+        used_p.add(p_idx)
+        used_g.add(g_idx)
+        matched.append((p_idx, g_idx))
+    return matched
+
+
+class ScoreBoard:
+    """Accumulates detection, per-category and priority counts."""
+
+    def __init__(self):
+        self.tp = self.predicted = self.gold = 0
+        self.priority_correct = 0
+        self.cat = {c: {"tp": 0, "predicted": 0, "gold": 0} for c in CATEGORIES}
+
+    def add(self, predicted: List[Dict], gold: List[Dict]):
+        matched = align(predicted, gold)
+        self.tp += len(matched)
+        self.predicted += len(predicted)
+        self.gold += len(gold)
+
+        for p in predicted:
+            if p["category"] in self.cat:
+                self.cat[p["category"]]["predicted"] += 1
+        for g in gold:
+            self.cat[g["category"]]["gold"] += 1
+        for p_idx, g_idx in matched:
+            p, g = predicted[p_idx], gold[g_idx]
+            if p["category"] == g["category"]:
+                self.cat[g["category"]]["tp"] += 1
+            if p["priority"] == g["priority"]:
+                self.priority_correct += 1
+
+    @staticmethod
+    def _prf(tp: int, predicted: int, gold: int) -> Dict:
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / gold if gold else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {"precision": round(precision, 3), "recall": round(recall, 3), "f1": round(f1, 3)}
+
+    def report(self) -> Dict:
+        return {
+            "detection": self._prf(self.tp, self.predicted, self.gold),
+            "by_category": {
+                c: {**self._prf(v["tp"], v["predicted"], v["gold"]), "support": v["gold"]}
+                for c, v in self.cat.items()
+            },
+            "priority_accuracy": round(self.priority_correct / self.tp, 3) if self.tp else 0.0,
+            "counts": {"predicted": self.predicted, "gold": self.gold, "matched": self.tp},
+        }
+
+
+class _MockLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions that answers with gold labels."""
+    docs: List[Dict] = []
+    latency_s: float = 0.0
+    calls: int = 0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+
+        doc = next((d for d in self.docs if d["text"][:200] in prompt), None)
+        items = [
+            {"text": r["text"], "category": r["category"], "subcategory": None}
+            for r in (doc["requirements"] if doc else [])
+        ]
+
+        type(self).calls += 1
+        time.sleep(self.latency_s)
+        payload = json.dumps({
+            "choices": [{"message": {"content": json.dumps({"requirements": items}, ensure_ascii=False)}}]
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_llm(docs: List[Dict], latency_ms: int) -> HTTPServer:
+    _MockLLMHandler.docs = docs
+    _MockLLMHandler.latency_s = latency_ms / 1000
+    server = HTTPServer(("127.0.0.1", 0), _MockLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_benchmark(docs: List[Dict], repeat: int, verbose: bool = False) -> Dict:
+    from app.services.extractor import RequirementExtractor
+    from app.services.segmenter import iter_sentence_spans
+
+    extractor = RequirementExtractor()
+    board = ScoreBoard()
+    per_doc = []
+    total_sentences = 0
+    total_seconds = 0.0
+
+    for doc in docs:
+        sentences = sum(1 for _ in iter_sentence_spans(doc["text"]))
+        timings = []
+        requirements = []
+        for _ in range(repeat):
+            # Extractor debug prints would otherwise dominate the timings
+            sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            with sink:
+                start = time.perf_counter()
+                requirements = await extractor.extract(doc["text"], None, language=doc.get("language"))
+                timings.append(time.perf_counter() - start)
+
+        predicted = [
+            {"text": r.text, "category": r.category.value, "priority": r.priority}
+            for r in requirements
+        ]
+        board.add(predicted, doc["requirements"])
+
+        best = min(timings)
+        total_sentences += sentences
+        total_seconds += best
+        doc_board = ScoreBoard()
+        doc_board.add(predicted, doc["requirements"])
+        per_doc.append({
+            "doc_id": doc["doc_id"],
+            "language": doc.get("language"),
+            "sentences": sentences,
+            "seconds": round(best, 4),
+            **doc_board.report()["detection"],
+        })
+
+    return {
+        "documents": len(docs),
+        "sentences": total_sentences,
+        "sentences_per_sec": round(total_sentences / total_seconds, 1) if total_seconds else None,
+        **board.report(),
+        "per_document": per_doc,
+    }
+
+
+def print_report(report: Dict):
+    print(f"\nDocuments: {report['documents']}  Sentences: {report['sentences']}  "
+          f"Throughput: {report['sentences_per_sec']} sentences/sec")
+    if "llm_calls" in report:
+        print(f"LLM calls (mock): {report['llm_calls']}")
+    det = report["detection"]
+    print(f"Detection  P={det['precision']:.3f} R={det['recall']:.3f} F1={det['f1']:.3f}")
+    for cat, m in report["by_category"].items():
+        print(f"  {cat:<12} P={m['precision']:.3f} R={m['recall']:.3f} F1={m['f1']:.3f} (n={m['support']})")
+    print(f"Priority accuracy (matched): {report['priority_accuracy']:.3f}")
+    print("\nPer document:")
+    for d in report["per_document"]:
+        print(f"  {d['doc_id']:<32} {d['language'] or '?':<3} {d['seconds']*1000:8.1f} ms  "
+              f"P={d['precision']:.2f} R={d['recall']:.2f}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark requirement extraction against a golden dataset")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Labelled JSONL corpus")
+    parser.add_argument("--variants", type=int, default=0, help="Synthetic variants to generate per document")
+    parser.add_argument("--repeat", type=int, default=1, help="Timing repetitions per document (best is kept)")
+    parser.add_argument("--language", help="Only run documents in this language (e.g. en, hi)")
+    parser.add_argument("--llm-mock", action="store_true", help="Route LLM extraction to a local mock endpoint")
+    parser.add_argument("--mock-latency-ms", type=int, default=0, help="Simulated mock LLM latency")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--verbose", action="store_true", help="Show extractor log output")
+    args = parser.parse_args(argv)
+
+    docs = load_dataset(args.dataset)
+    if args.variants:
+        docs = docs + [v for d in docs for v in make_variants(d, args.variants)]
+    if args.language:
+        docs = [d for d in docs if d.get("language") == args.language]
+
+    server = None
+    if args.llm_mock:
+        server = start_mock_llm(docs, args.mock_latency_ms)
+        os.environ["LLM_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ["LLM_API_KEY"] = "mock"
+    else:
+        # Offline regex-only run
+        os.environ["LLM_API_KEY"] = ""
+
+    try:
+        report = asyncio.run(run_benchmark(docs, args.repeat, args.verbose))
+    finally:
+        if server:
+            server.shutdown()
+
+    report["mode"] = "llm-mock" if args.llm_mock else "regex"
+    if args.llm_mock:
+        report["llm_calls"] = _MockLLMHandler.calls
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
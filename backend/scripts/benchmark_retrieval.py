@@ -0,0 +1,421 @@
+"""
+Retrieval Benchmark
+End-to-end VectorMatcher benchmark on synthetic multilingual (English /
+Hindi) KBs with paraphrased queries of known ground truth. For each KB size
+and embedding backend it reports build time, disk size and RSS, then for
+each index type (and hybrid BM25 fusion on/off) recall@1/3/10, p50/p99
+single-query latency and QPS per query batch size.
+
+Usage (from backend/):
+    python scripts/benchmark_retrieval.py                                # 1k, 10k
+    python scripts/benchmark_retrieval.py --sizes 1000,10000,100000,1000000
+    python scripts/benchmark_retrieval.py --backends torch,onnx --types flat,hnsw,ivf_flat
+    python scripts/benchmark_retrieval.py --compare benchmarks/reports/retrieval-20260101T000000Z.json
+
+Every (size, backend) run happens in a fresh subprocess with its own KB
+store under a temp directory, so RSS and disk size are per configuration
+and the real KB is never touched. The query embedding cache is disabled.
+Encoding dominates build time: 1M items takes hours on CPU.
+
+Each item is a unique (domain, client, city, year, team size) fact, written
+from one of several templates in either language; queries restate the
+same fact with different wording, often in the other language.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_REPORT_DIR = os.path.join(BACKEND_DIR, "benchmarks", "reports")
+RECALL_AT = (1, 3, 10)
+ADD_BATCH = 10_000
+
+DOMAINS = [
+    ("ERP implementation", "ईआरपी कार्यान्वयन"),
+    ("cybersecurity operations centre", "साइबर सुरक्षा संचालन केंद्र"),
+    ("data centre migration", "डेटा सेंटर माइग्रेशन"),
+    ("GIS mapping", "जीआईएस मैपिंग"),
+    ("e-governance portal development", "ई-गवर्नेंस पोर्टल विकास"),
+    ("network infrastructure upgrade", "नेटवर्क इंफ्रास्ट्रक्चर उन्नयन"),
+    ("cloud hosting services", "क्लाउड होस्टिंग सेवाएं"),
+    ("mobile application development", "मोबाइल एप्लिकेशन विकास"),
+    ("CCTV surveillance system", "सीसीटीवी निगरानी प्रणाली"),
+    ("hospital management system", "अस्पताल प्रबंधन प्रणाली"),
+    ("smart city command centre", "स्मार्ट सिटी कमांड सेंटर"),
+    ("document digitisation", "दस्तावेज़ डिजिटलीकरण"),
+    ("payroll software", "पेरोल सॉफ्टवेयर"),
+    ("call centre operations", "कॉल सेंटर संचालन"),
+    ("IT helpdesk support", "आईटी हेल्पडेस्क सहायता"),
+    ("LAN and Wi-Fi rollout", "लैन और वाई-फाई स्थापना"),
+    ("database administration", "डेटाबेस प्रशासन"),
+    ("learning management system", "लर्निंग मैनेजमेंट सिस्टम"),
+    ("billing and revenue system", "बिलिंग और राजस्व प्रणाली"),
+    ("disaster recovery setup", "आपदा रिकवरी व्यवस्था"),
+]
+CLIENTS = [
+    "Indian Railways", "ONGC", "BHEL", "NTPC", "GAIL", "SAIL", "Coal India", "Indian Oil",
+    "BSNL", "Air India", "LIC", "SBI", "Punjab National Bank", "AIIMS", "DRDO", "ISRO",
+    "NHAI", "Delhi Metro", "Mumbai Port Trust", "Election Commission", "UIDAI", "CBSE",
+    "Income Tax Department", "India Post", "FCI",
+]
+CITIES = [
+    ("Delhi", "दिल्ली"), ("Mumbai", "मुंबई"), ("Kolkata", "कोलकाता"), ("Chennai", "चेन्नई"),
+    ("Bengaluru", "बेंगलुरु"), ("Hyderabad", "हैदराबाद"), ("Pune", "पुणे"), ("Ahmedabad", "अहमदाबाद"),
+    ("Jaipur", "जयपुर"), ("Lucknow", "लखनऊ"), ("Bhopal", "भोपाल"), ("Patna", "पटना"),
+    ("Ranchi", "रांची"), ("Raipur", "रायपुर"), ("Bhubaneswar", "भुवनेश्वर"), ("Guwahati", "गुवाहाटी"),
+    ("Chandigarh", "चंडीगढ़"), ("Dehradun", "देहरादून"), ("Shimla", "शिमला"), ("Srinagar", "श्रीनगर"),
+    ("Nagpur", "नागपुर"), ("Indore", "इंदौर"), ("Surat", "सूरत"), ("Kochi", "कोच्चि"),
+    ("Thiruvananthapuram", "तिरुवनंतपुरम"), ("Visakhapatnam", "विशाखापत्तनम"), ("Varanasi", "वाराणसी"),
+    ("Agra", "आगरा"), ("Kanpur", "कानपुर"), ("Goa", "गोवा"),
+]
+YEARS = list(range(2006, 2026))
+TEAM_SIZES = list(range(10, 410, 10))
+
+ITEM_TEMPLATES = {
+    "en": [
+        "Completed {domain} for {client} in {city} in {year} with a team of {team} engineers.",
+        "In {year} our {team}-member team delivered {domain} to {client}, {city}.",
+    ],
+    "hi": [
+        "{year} में {client} ({city}) के लिए {team} इंजीनियरों की टीम के साथ {domain} परियोजना पूरी की।",
+    ],
+}
+QUERY_TEMPLATES = {
+    "en": [
+        "Bidder should have executed {domain} for {client} at {city} in {year} with about {team} staff.",
+        "Experience of {domain} work for {client}, {city} ({year}), team size {team}",
+    ],
+    "hi": [
+        "बोलीदाता के पास {year} में {client} {city} के लिए {domain} का अनुभव हो, टीम {team} सदस्य",
+    ],
+}
+
+
+# --- Synthetic data ---
+
+def _fact(index: int, total: int, stride: int) -> Tuple[int, int, int, int, int]:
+    """Unique (domain, client, city, year, team) slot indices for item `index`."""
+    code = (index * stride) % total
+    slots = []
+    for radix in (len(TEAM_SIZES), len(YEARS), len(CITIES), len(CLIENTS), len(DOMAINS)):
+        code, slot = divmod(code, radix)
+        slots.append(slot)
+    team, year, city, client, domain = slots
+    return domain, client, city, year, team
+
+
+def _render(template: str, fact: Tuple[int, int, int, int, int], lang: str) -> str:
+    domain, client, city, year, team = fact
+    column = 0 if lang == "en" else 1
+    return template.format(
+        domain=DOMAINS[domain][column], client=CLIENTS[client], city=CITIES[city][column],
+        year=YEARS[year], team=TEAM_SIZES[team]
+    )
+
+
+def generate(size: int, query_count: int, seed: int = 0) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    """KB items plus (query, ground-truth item id) pairs."""
+    total = len(DOMAINS) * len(CLIENTS) * len(CITIES) * len(YEARS) * len(TEAM_SIZES)
+    if size > total:
+        raise SystemExit(f"At most {total} unique synthetic items")
+    # Any stride coprime to the slot space visits each fact once
+    stride = int(total * 0.618)
+    while math.gcd(stride, total) != 1:
+        stride += 1
+
+    rng = random.Random(seed)
+    items, facts = [], []
+    for i in range(size):
+        fact = _fact(i, total, stride)
+        lang = rng.choice(("en", "en", "hi"))
+        items.append({
+            "id": f"kb-{i}",
+            "content": _render(rng.choice(ITEM_TEMPLATES[lang]), fact, lang),
+            "category": "Technical",
+        })
+        facts.append(fact)
+
+    queries = []
+    for i in rng.sample(range(size), min(query_count, size)):
+        lang = rng.choice(("en", "hi"))
+        queries.append((_render(rng.choice(QUERY_TEMPLATES[lang]), facts[i], lang), f"kb-{i}"))
+    return items, queries
+
+
+# --- Measurement helpers ---
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def disk_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def percentile_ms(seconds: List[float], q: float) -> float:
+    return round(float(np.percentile(np.array(seconds) * 1000, q)), 3)
+
+
+async def measure(matcher, queries: List[Tuple[str, str]], batch_sizes: List[int]) -> Dict:
+    """Recall and single-query latency (encode + search + hydrate), then QPS per batch size."""
+    latencies, hits = [], {k: 0 for k in RECALL_AT}
+    for query, truth in queries:
+        start = time.perf_counter()
+        results = await matcher.search(query, top_k=max(RECALL_AT))
+        latencies.append(time.perf_counter() - start)
+        ranked = [r.kb_item_id for r in results]
+        for k in RECALL_AT:
+            hits[k] += truth in ranked[:k]
+
+    texts = [query for query, _ in queries]
+    qps = {}
+    for batch in batch_sizes:
+        start = time.perf_counter()
+        for offset in range(0, len(texts), batch):
+            await matcher.search_batch(texts[offset:offset + batch], top_k=max(RECALL_AT))
+        elapsed = time.perf_counter() - start
+        qps[str(batch)] = round(len(texts) / elapsed, 1) if elapsed else None
+
+    return {
+        **{f"recall@{k}": round(hits[k] / len(queries), 4) for k in RECALL_AT},
+        "p50_ms": percentile_ms(latencies, 50),
+        "p99_ms": percentile_ms(latencies, 99),
+        "qps": qps,
+    }
+
+
+# --- Worker: one (size, backend) configuration in this process ---
+
+def run_worker(args) -> Dict:
+    workdir = args.workdir
+    os.environ.update({
+        "SUPABASE_URL": os.environ.get("SUPABASE_URL", "benchmark"),
+        "SUPABASE_SERVICE_KEY": os.environ.get("SUPABASE_SERVICE_KEY", "benchmark"),
+        "SUPABASE_ANON_KEY": os.environ.get("SUPABASE_ANON_KEY", "benchmark"),
+        "FAISS_INDEX_PATH": os.path.join(workdir, "faiss.index"),
+        "EMBEDDINGS_PATH": os.path.join(workdir, "embeddings.npy"),
+        "KB_STORE_PATH": os.path.join(workdir, "kb_store.sqlite3"),
+        "KNOWLEDGE_BASE_PATH": os.path.join(workdir, "knowledge_base.json"),
+        "EMBEDDING_BACKEND": args.backend,
+        "EMBEDDING_BATCH_SIZE": str(args.encode_batch_size),
+        "EMBEDDING_CACHE_SIZE": "0",
+        "EMBEDDING_CACHE_REDIS_URL": "",
+        "INDEX_RELOAD_INTERVAL_SECONDS": "0",
+        "INDEX_FLUSH_MAX_PENDING": str(10 ** 9),
+        "ANN_INDEX_TYPE": "auto",
+    })
+    os.environ.pop("RETRIEVAL_SOCKET", None)
+
+    from app.services import matcher as matcher_module
+
+    items, queries = generate(args.size, args.queries, args.seed)
+    baseline_rss = rss_mb()
+
+    start = time.perf_counter()
+    matcher = matcher_module.VectorMatcher()
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for offset in range(0, len(items), ADD_BATCH):
+        matcher.add_items(items[offset:offset + ADD_BATCH])
+    matcher.flush()
+    build_seconds = time.perf_counter() - start
+    print(f"[{args.size} / {matcher.embedder.name}] built in {build_seconds:.1f}s", file=sys.stderr)
+
+    rows = []
+    for kind in args.types:
+        matcher_module.settings.ann_index_type = kind
+        start = time.perf_counter()
+        matcher.reindex()
+        index_seconds = time.perf_counter() - start
+        for hybrid in args.hybrid:
+            matcher_module.settings.hybrid_search = hybrid
+            metrics = asyncio.run(measure(matcher, queries, args.query_batch_sizes))
+            rows.append({
+                "index_type": kind,
+                "effective_type": matcher.stats().get("index_type"),
+                "hybrid": hybrid,
+                "index_build_seconds": round(index_seconds, 2),
+                "disk_bytes": disk_bytes(workdir),
+                "rss_mb": rss_mb(),
+                **metrics,
+            })
+            print(f"[{args.size} / {matcher.embedder.name}] {kind} hybrid={hybrid}: "
+                  f"recall@10={metrics['recall@10']} p50={metrics['p50_ms']}ms", file=sys.stderr)
+
+    return {
+        "size": args.size,
+        "backend": args.backend,
+        "embedder": matcher.embedder.name,
+        "encode_batch_size": args.encode_batch_size,
+        "queries": len(queries),
+        "load_seconds": round(load_seconds, 2),
+        "build_seconds": round(build_seconds, 2),
+        "items_per_second": round(len(items) / build_seconds, 1) if build_seconds else None,
+        "baseline_rss_mb": baseline_rss,
+        "results": rows,
+    }
+
+
+# --- Orchestration and reporting ---
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_configuration(args, size: int, backend: str) -> Dict:
+    """Run one (size, backend) worker in a fresh subprocess and collect its result."""
+    workdir = tempfile.mkdtemp(prefix=f"bench-retrieval-{size}-")
+    result_path = os.path.join(workdir, "result.json")
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker",
+        "--size", str(size), "--backend", backend, "--workdir", workdir, "--result", result_path,
+        "--types", ",".join(args.types), "--hybrid", ",".join("on" if h else "off" for h in args.hybrid),
+        "--queries", str(args.queries), "--seed", str(args.seed),
+        "--encode-batch-size", str(args.encode_batch_size),
+        "--query-batch-sizes", ",".join(str(b) for b in args.query_batch_sizes),
+    ]
+    try:
+        completed = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+        sys.stderr.write(completed.stderr)
+        if completed.returncode != 0:
+            return {"size": size, "backend": backend, "error": completed.stderr.strip()[-2000:]}
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _key(run: Dict, row: Dict) -> Tuple:
+    return run["size"], run.get("embedder", run["backend"]), row["index_type"], row["hybrid"]
+
+
+def print_report(report: Dict, previous: Optional[Dict] = None):
+    baseline = {}
+    for run in (previous or {}).get("runs", []):
+        for row in run.get("results", []):
+            baseline[_key(run, row)] = row
+
+    print(f"\n{'size':>8} {'backend':<8} {'index':<9} {'hybrid':<6} {'R@1':>6} {'R@3':>6} {'R@10':>6} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'QPS':>8} {'disk MB':>8} {'RSS MB':>8}")
+    for run in report["runs"]:
+        if "error" in run:
+            print(f"{run['size']:>8} {run['backend']:<8} FAILED: {run['error'].splitlines()[-1]}")
+            continue
+        for row in run["results"]:
+            best_qps = max((q for q in row["qps"].values() if q), default=0)
+            line = (f"{run['size']:>8} {run['embedder']:<8} {row['effective_type']:<9} "
+                    f"{'on' if row['hybrid'] else 'off':<6} {row['recall@1']:>6.3f} {row['recall@3']:>6.3f} "
+                    f"{row['recall@10']:>6.3f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {best_qps:>8.1f} "
+                    f"{row['disk_bytes'] / 2 ** 20:>8.1f} {row['rss_mb']:>8.1f}")
+            before = baseline.get(_key(run, row))
+            if before:
+                line += (f"   (R@10 {row['recall@10'] - before['recall@10']:+.3f}, "
+                         f"p50 {row['p50_ms'] - before['p50_ms']:+.2f}ms)")
+            print(line)
+
+
+def _csv(value: str, cast=str) -> List:
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="End-to-end VectorMatcher retrieval benchmark")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated KB sizes")
+    parser.add_argument("--backends", default="torch", help="Comma-separated embedding backends (torch, onnx)")
+    parser.add_argument("--types", default="flat,hnsw,ivf_flat,ivf_pq", help="Comma-separated index types")
+    parser.add_argument("--hybrid", default="off,on", help="BM25 fusion settings to run (off, on)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per configuration")
+    parser.add_argument("--encode-batch-size", type=int, default=64, help="Embedding batch size for the build")
+    parser.add_argument("--query-batch-sizes", default="1,16,64", help="search_batch sizes for QPS")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Report path (default: benchmarks/reports/retrieval-<UTC time>.json)")
+    parser.add_argument("--compare", help="Earlier report to print deltas against")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary KB directories")
+    # Internal: run a single configuration
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    args.types = _csv(args.types)
+    args.hybrid = [h == "on" for h in _csv(args.hybrid)]
+    args.query_batch_sizes = _csv(args.query_batch_sizes, int)
+
+    if args.worker:
+        result = run_worker(args)
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    started = datetime.now(timezone.utc)
+    runs = [
+        run_configuration(args, size, backend)
+        for size in _csv(args.sizes, int)
+        for backend in _csv(args.backends)
+    ]
+    report = {
+        "generated_at": started.isoformat(),
+        "git_commit": _git_commit(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {
+            "types": args.types, "hybrid": args.hybrid, "queries": args.queries, "seed": args.seed,
+            "encode_batch_size": args.encode_batch_size, "query_batch_sizes": args.query_batch_sizes,
+        },
+        "runs": runs,
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_report(report, previous)
+
+    output = args.output or os.path.join(
+        DEFAULT_REPORT_DIR, f"retrieval-{started.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+ONNX Embedder Export
+Exports paraphrase-multilingual-MiniLM-L12-v2 to ONNX, applies dynamic int8
+quantization, and verifies it against the torch backend: per-text cosine
+agreement, encode throughput and peak RSS of each backend in its own process.
+
+Usage (from backend/):
+    python scripts/export_onnx_embedder.py                 # export + verify
+    python scripts/export_onnx_embedder.py --verify-only   # re-check an existing export
+    python scripts/export_onnx_embedder.py --tolerance 0.99
+
+Then set EMBEDDING_BACKEND=onnx (ONNX_MODEL_DIR defaults to the output dir).
+Stored embeddings from the torch backend stay comparable within the
+verified tolerance; run a KB rebuild if you want them re-encoded.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings requires Supabase credentials even though the export never uses them
+for key in ("SUPABASE_URL", "SUPABASE_SERVICE_KEY", "SUPABASE_ANON_KEY"):
+    os.environ.setdefault(key, "export")
+
+from app.core.config import get_settings
+from app.services.embedding import DEFAULT_MODEL, ONNX_MODEL_FILE, TOKENIZER_FILE, MAX_SEQ_LENGTH
+
+HF_MODEL = f"sentence-transformers/{DEFAULT_MODEL}"
+GOLDEN_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks", "extraction_golden.jsonl"
+)
+
+SAMPLE_TEXTS = [
+    "The bidder must have ISO 9001:2015 certification.",
+    "Minimum annual turnover of INR 5 crore in each of the last three financial years.",
+    "The solution shall support single sign-on via SAML 2.0 and OAuth 2.0.",
+    "All data must be stored within India in compliance with MeitY guidelines.",
+    "बोलीदाता के पास पिछले तीन वर्षों का अनुभव होना चाहिए।",
+    "El licitador debe presentar una garantía bancaria del 5%.",
+    "Le soumissionnaire doit fournir une assistance 24h/24 et 7j/7.",
+    "Q1: Describe your disaster recovery approach and RPO/RTO targets.",
+]
+
+
+def export(output_dir: str):
+    """Export the transformer to ONNX (fp32) and quantize weights to int8."""
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL)
+    model = AutoModel.from_pretrained(HF_MODEL).eval()
+
+    dummy = tokenizer(["export sample"], return_tensors="pt", padding=True)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    fp32_path = os.path.join(output_dir, "model_fp32.onnx")
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "token_embeddings": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+        )
+
+    quantize_dynamic(fp32_path, os.path.join(output_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+    print(f"Exported {HF_MODEL} (int8, max_seq_length={MAX_SEQ_LENGTH}) to {output_dir}")
+
+
+def load_texts(limit: int) -> List[str]:
+    texts = list(SAMPLE_TEXTS)
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    texts.extend(r["text"] for r in json.loads(line)["requirements"])
+    # Repeat to get a stable throughput measurement
+    while len(texts) < limit:
+        texts = texts + texts
+    return texts[:limit]
+
+
+def _profile_backend(backend: str, texts: List[str], batch_size: int) -> Tuple[np.ndarray, float, float, float]:
+    """Runs in a fresh process: load, warm up, encode; returns (embeddings, load s, encode s, peak RSS MB)."""
+    from app.services.embedding import get_embedder
+
+    start = time.perf_counter()
+    embedder = get_embedder(backend=backend)
+    load_seconds = time.perf_counter() - start
+    if embedder.name != backend:
+        raise RuntimeError(f"{backend} backend could not be loaded")
+
+    embedder.encode(texts[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    embeddings = embedder.encode(texts, batch_size=batch_size)
+    encode_seconds = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return embeddings, load_seconds, encode_seconds, peak_mb
+
+
+def verify(texts: List[str], batch_size: int, tolerance: float) -> Dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in ("torch", "onnx"):
+        with ctx.Pool(1) as pool:
+            results[backend] = pool.apply(_profile_backend, (backend, texts, batch_size))
+
+    torch_emb, onnx_emb = results["torch"][0], results["onnx"][0]
+    cosine = (torch_emb * onnx_emb).sum(axis=1)
+
+    report = {
+        "texts": len(texts),
+        "cosine_min": round(float(cosine.min()), 4),
+        "cosine_mean": round(float(cosine.mean()), 4),
+        "tolerance": tolerance,
+        "passed": bool(cosine.min() >= tolerance),
+        "backends": {
+            backend: {
+                "load_seconds": round(load_s, 2),
+                "texts_per_sec": round(len(texts) / encode_s, 1),
+                "peak_rss_mb": round(peak_mb, 1),
+            }
+            for backend, (_, load_s, encode_s, peak_mb) in results.items()
+        },
+    }
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Export and verify the int8 ONNX embedding model")
+    parser.add_argument("--output-dir", default=settings.onnx_model_dir, help="Where to write the export")
+    parser.add_argument("--verify-only", action="store_true", help="Skip export, verify an existing one")
+    parser.add_argument("--texts", type=int, default=512, help="Texts to encode during verification")
+    parser.add_argument("--batch-size", type=int, default=settings.embedding_batch_size)
+    parser.add_argument("--tolerance", type=float, default=0.98, help="Minimum per-text cosine vs torch")
+    args = parser.parse_args(argv)
+
+    if not args.verify_only:
+        export(args.output_dir)
+
+    os.environ["ONNX_MODEL_DIR"] = args.output_dir
+    report = verify(load_texts(args.texts), args.batch_size, args.tolerance)
+    print(json.dumps(report, indent=2))
+
+    if not report["passed"]:
+        print(f"FAILED: min cosine {report['cosine_min']} below tolerance {args.tolerance}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -706,6 +706,7 @@ def seed_knowledge_base():
 
     print(f"Seeding knowledge base for tenant: {tenant_id}...")
     
+    indexed = []
     for item in SAMPLE_KB_ITEMS:
         # Insert into database
         result = supabase.table('knowledge_base').insert({
@@ -719,14 +720,18 @@ def seed_knowledge_base():
         
         if result.data:
             new_item = result.data[0]
-            # Add to vector index
-            matcher.add_item(
-                item_id=new_item['id'],
-                content=item['content'],
-                metadata={'title': item['title'], 'category': item['category']}
-            )
+            indexed.append({
+                'id': new_item['id'],
+                'content': item['content'],
+                'title': item['title'],
+                'category': item['category']
+            })
             print(f"  Added: {item['title']}")
     
+    # Add to vector index in one batch and persist once
+    matcher.add_items(indexed)
+    matcher.flush()
+    
     print(f"\nSeeded {len(SAMPLE_KB_ITEMS)} knowledge base items.")
 
 
@@ -27,10 +27,10 @@ try:
             f.write(f"Found {len(kb_items)} items\n")
             
         matcher = get_matcher()
-        matcher.sync_with_database(kb_items)
+        stats = matcher.sync_with_database(kb_items)
         
         with open("sync_debug.log", "a") as f:
-            f.write("Sync complete!\n")
+            f.write(f"Sync complete! {stats}\n")
             
     if __name__ == "__main__":
         asyncio.run(sync())
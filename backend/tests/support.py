@@ -0,0 +1,74 @@
+"""
+Helpers for tests that exercise a real VectorMatcher (FAISS index + KB store)
+without the embedding model. Each such test runs a child process with its
+own store paths (settings are read at import) and a hashing embedder.
+"""
+import os
+import sys
+import subprocess
+import textwrap
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRELUDE = '''
+import sys, hashlib
+sys.path.insert(0, {backend!r})
+import numpy as np
+import app.services.embedding as embedding
+
+
+class HashingEmbedder:
+    """Bag-of-words hashed into the model's 384 dimensions."""
+    name = "hashing"
+    dimension = 384
+
+    def encode(self, texts, batch_size=64):
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                out[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+        return out / np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+
+
+embedding.get_embedder = lambda *args, **kwargs: HashingEmbedder()
+import app.services.matcher as matcher_module
+matcher_module.get_embedder = embedding.get_embedder
+'''
+
+
+def matcher_env(directory: str, **overrides) -> dict:
+    """Environment for a child process with a private KB store and index."""
+    env = dict(os.environ)
+    env.update(
+        SUPABASE_URL="test", SUPABASE_SERVICE_KEY="test", SUPABASE_ANON_KEY="test",
+        FAISS_INDEX_PATH=os.path.join(directory, "faiss.index"),
+        EMBEDDINGS_PATH=os.path.join(directory, "embeddings.npy"),
+        KNOWLEDGE_BASE_PATH=os.path.join(directory, "knowledge_base.json"),
+        KB_STORE_PATH=os.path.join(directory, "kb.sqlite3"),
+        INDEX_RELOAD_INTERVAL_SECONDS="0",
+    )
+    env.pop("RETRIEVAL_SOCKET", None)
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def child_source(*parts: str) -> str:
+    return PRELUDE.format(backend=BACKEND_DIR) + "".join(textwrap.dedent(part) for part in parts)
+
+
+def run_child(directory: str, *parts: str, timeout: float = 120, **overrides) -> subprocess.CompletedProcess:
+    """Run code `parts` (after the prelude) in a child process; a crash shows up as a non-zero return code."""
+    return subprocess.run(
+        [sys.executable, "-c", child_source(*parts)],
+        env=matcher_env(directory, **overrides), cwd=BACKEND_DIR,
+        capture_output=True, text=True, timeout=timeout,
+    )
+
+
+def start_child(directory: str, *parts: str, **overrides) -> subprocess.Popen:
+    """Start code `parts` (after the prelude) in a background child process, e.g. a sidecar."""
+    return subprocess.Popen(
+        [sys.executable, "-c", child_source(*parts)],
+        env=matcher_env(directory, **overrides), cwd=BACKEND_DIR,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
@@ -0,0 +1,75 @@
+from app.services.dedupe import DEFAULT_THRESHOLD, MinHashLSH, find_canonicals, jaccard, key_terms, minhash, shingles
+
+CLAUSE = "The bidder shall have a minimum annual turnover of INR 50 crore in the last three financial years"
+
+
+def test_shingles_are_word_bigrams():
+    assert shingles("Valid GST registration") == {"valid gst", "gst registration"}
+    assert shingles("ISO") == {"iso"}
+
+
+def test_jaccard():
+    assert jaccard({"a", "b"}, {"a", "b"}) == 1.0
+    assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+    assert jaccard(set(), set()) == 1.0
+
+
+def test_minhash_is_deterministic():
+    features = shingles(CLAUSE)
+    assert minhash(features) == minhash(set(features))
+    assert minhash(features) != minhash(shingles("Completely unrelated text about delivery schedules"))
+
+
+def test_lsh_query_applies_exact_jaccard_threshold():
+    near = CLAUSE + " ending March"
+    a, b = shingles(CLAUSE), shingles(near)
+    assert jaccard(a, b) >= 0.7
+
+    index = MinHashLSH(threshold=0.7)
+    index.add(a, minhash(a))
+    assert index.query(b, minhash(b)) == [0]
+
+    strict = MinHashLSH(threshold=0.99)
+    strict.add(a, minhash(a))
+    assert strict.query(b, minhash(b)) == []
+
+
+def test_find_canonicals_collapses_near_duplicates():
+    texts = [
+        CLAUSE,
+        "Bidder must submit an EMD of INR 5 lakh",
+        CLAUSE + ".",
+        CLAUSE + " (refer Annexure B)",
+    ]
+    assert find_canonicals(texts) == [0, 1, 0, 0]
+
+
+def test_find_canonicals_keeps_distinct_texts():
+    texts = ["ISO 9001 certification", "ISO 27001 certification", "CMMI Level 5 appraisal"]
+    assert find_canonicals(texts) == [0, 1, 2]
+
+
+def assert_not_merged(a: str, b: str):
+    # Similar enough to pass the shingle threshold: only the key terms keep them apart
+    assert jaccard(shingles(a), shingles(b)) >= DEFAULT_THRESHOLD
+    assert key_terms(a) != key_terms(b)
+    assert find_canonicals([a, b]) == [0, 1]
+
+
+def test_different_amounts_are_not_duplicates():
+    clause = ("The bidder shall have a minimum average annual turnover of INR {} crore during "
+              "the last three financial years ending 31 March 2024")
+    assert_not_merged(clause.format(50), clause.format(100))
+
+
+def test_different_domains_are_not_duplicates():
+    clause = ("The bidder must have at least five years of experience in {} implementation "
+              "for central or state government departments in India")
+    assert_not_merged(clause.format("ERP"), clause.format("GIS"))
+
+
+def test_negated_clause_is_not_a_duplicate():
+    assert_not_merged(
+        "The bidder must provide a copy of the valid GST registration certificate along with the technical bid documents",
+        "The bidder must not provide a copy of the valid GST registration certificate along with the technical bid documents",
+    )
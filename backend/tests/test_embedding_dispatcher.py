@@ -0,0 +1,75 @@
+import time
+import asyncio
+import threading
+
+import numpy as np
+
+from app.services.embedding_dispatcher import EmbeddingDispatcher
+
+
+class FakeEncoder:
+    """Encodes text "n" as [n]; records each call and can hold the worker."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, texts, cache):
+        self.calls.append((len(texts), cache))
+        self.release.wait(5)
+        return np.array([[float(t)] for t in texts], dtype=np.float32).reshape(len(texts), 1)
+
+
+def test_empty_requests_resolve_without_queueing():
+    encoder = FakeEncoder()
+    dispatcher = EmbeddingDispatcher(encoder, max_batch=4, dimension=1)
+    assert dispatcher.encode([], cache=False).shape == (0, 1)
+    assert asyncio.run(dispatcher.encode_async([])).shape == (0, 1)
+    assert encoder.calls == []
+
+
+def test_empty_request_behind_a_full_bulk_chunk():
+    encoder = FakeEncoder()
+    dispatcher = EmbeddingDispatcher(encoder, max_batch=4, max_wait_ms=50, dimension=1)
+    bulk = dispatcher.submit([str(i) for i in range(4)], cache=False)
+    empty = dispatcher.submit([], cache=False)
+    assert empty.result(timeout=1).shape == (0, 1)
+    assert bulk.result(timeout=1)[:, 0].tolist() == [0, 1, 2, 3]
+
+
+def test_bulk_requests_are_chunked_and_reassembled():
+    encoder = FakeEncoder()
+    dispatcher = EmbeddingDispatcher(encoder, max_batch=4, max_wait_ms=20, dimension=1)
+    first = dispatcher.submit([str(i) for i in range(10)], cache=False)
+    second = dispatcher.submit(["100", "101"], cache=False)
+    assert first.result(timeout=1)[:, 0].tolist() == list(range(10))
+    assert second.result(timeout=1)[:, 0].tolist() == [100, 101]
+    assert max(n for n, _ in encoder.calls) <= 4
+
+
+def test_queries_are_served_between_bulk_chunks():
+    encoder = FakeEncoder()
+    dispatcher = EmbeddingDispatcher(encoder, max_batch=4, max_wait_ms=1, dimension=1)
+    encoder.release.clear()
+    bulk = dispatcher.submit([str(i) for i in range(40)], cache=False)
+    time.sleep(0.05)
+    query = dispatcher.submit(["7"])
+    encoder.release.set()
+    assert query.result(timeout=1).tolist() == [[7.0]]
+    assert bulk.result(timeout=1)[:, 0].tolist() == list(range(40))
+    # The query went out after the first chunk, long before the bulk finished
+    assert encoder.calls.index((1, True)) <= 2
+
+
+def test_encode_errors_reach_every_caller():
+    def failing(texts, cache):
+        raise ValueError("model unavailable")
+
+    dispatcher = EmbeddingDispatcher(failing, max_batch=2, dimension=1)
+    future = dispatcher.submit(["a", "b", "c"], cache=False)
+    try:
+        future.result(timeout=1)
+        raise AssertionError("expected the encode error")
+    except ValueError:
+        pass
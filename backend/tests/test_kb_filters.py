@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from app.services.kb_filters import KBFilter, PostingIndex, attribute_keys, to_timestamp
+
+ITEMS = {
+    0: {'category': 'Certifications', 'tags': ['iso', 'security'], 'source': 'policies.pdf',
+        'updated_at': '2024-01-10T00:00:00Z'},
+    1: {'category': 'Certifications', 'tags': ['iso'], 'source_file': 'certs.docx',
+        'updated_at': '2024-06-01T00:00:00Z'},
+    2: {'category': 'Past Performance', 'tags': 'security, cloud', 'source': 'policies.pdf',
+        'created_at': '2023-03-01T00:00:00Z'},
+    3: {'category': 'Team', 'tags': []},
+}
+
+
+def make_index() -> PostingIndex:
+    index = PostingIndex()
+    index.update(ITEMS)
+    return index
+
+
+def labels(index: PostingIndex, filters: dict) -> list:
+    return index.mask(KBFilter.from_dict(filters), len(ITEMS)).nonzero()[0].tolist()
+
+
+def test_from_dict_normalizes_values():
+    flt = KBFilter.from_dict({'category': 'Certifications, Team', 'tags': [' ISO '], 'source': []})
+    assert flt.categories == ['certifications', 'team']
+    assert flt.tags == ['iso']
+    assert flt.sources is None
+    assert KBFilter.from_dict(None).is_empty()
+    assert not flt.is_empty()
+
+
+def test_attribute_keys_falls_back_to_source_file():
+    assert attribute_keys(ITEMS[1]) == [('category', 'certifications'), ('tags', 'iso'), ('source', 'certs.docx')]
+
+
+def test_category_matches_any_listed_value():
+    index = make_index()
+    assert labels(index, {'category': ['certifications', 'team']}) == [0, 1, 3]
+
+
+def test_tags_must_all_be_present():
+    index = make_index()
+    assert labels(index, {'tags': ['iso']}) == [0, 1]
+    assert labels(index, {'tags': ['iso', 'security']}) == [0]
+    assert labels(index, {'tags': ['iso', 'cloud']}) == []
+
+
+def test_clauses_are_combined():
+    index = make_index()
+    assert labels(index, {'tags': ['security'], 'source': 'policies.pdf'}) == [0, 2]
+    assert labels(index, {'tags': ['security'], 'category': 'past performance'}) == [2]
+
+
+def test_updated_after():
+    index = make_index()
+    assert labels(index, {'updated_after': '2024-01-01'}) == [0, 1]
+    assert labels(index, {'updated_after': datetime(2024, 3, 1)}) == [1]
+    assert to_timestamp('2024-01-01') == to_timestamp('2024-01-01T00:00:00+00:00')
+
+
+def test_update_and_discard():
+    index = make_index()
+    index.update({1: {'category': 'Team', 'tags': ['security']}})
+    assert labels(index, {'tags': ['iso']}) == [0]
+    assert labels(index, {'category': 'team'}) == [1, 3]
+    index.discard(0)
+    assert labels(index, {'tags': ['security']}) == [1, 2]
+
+
+def test_mask_beyond_indexed_labels():
+    index = make_index()
+    mask = index.mask(KBFilter.from_dict({'tags': ['iso']}), 6)
+    assert mask.tolist() == [True, True, False, False, False, False]
@@ -0,0 +1,109 @@
+import numpy as np
+
+from app.services.lexical import (
+    LexicalIndex, identifier_phrases, identifier_terms, is_exact_match, rrf_fuse, tokenize
+)
+
+
+def test_indian_digit_grouping():
+    assert '5000000' in tokenize('Turnover of 50,00,000')
+    assert '5000000' in tokenize('Turnover of 5,000,000')
+
+
+def test_currency_normalization():
+    for text in ('₹50 crore', 'Rs. 50 crore', 'Rs 50 crore', 'INR 50 crore'):
+        assert 'inr 50' in tokenize(text), text
+
+
+def test_tokenizer_keeps_compounds_and_parts():
+    terms = tokenize('ISO/IEC 27001:2013 certified')
+    assert {'iso/iec', '27001:2013', 'iso', 'iec', '27001', '2013'} <= set(terms)
+    assert {'iso/iec 27001:2013', 'iso/iec 27001'} <= set(terms)
+
+
+def test_tokenizer_drops_stopwords_and_adds_bigrams():
+    terms = tokenize('The bidder shall have CMMI Level 5')
+    assert 'the' not in terms and 'shall' not in terms
+    assert {'cmmi level', 'level 5'} <= set(terms)
+
+
+def test_identifier_terms():
+    assert identifier_terms('CMMI Level 5 and ISO 27001') == {'level 5', 'iso 27001', '27001', '5'}
+    assert identifier_terms('Valid GST registration') == set()
+
+
+def test_is_exact_match():
+    assert is_exact_match('ISO 27001 certification', 'We hold ISO 27001:2013 certification')
+    assert not is_exact_match('ISO 27001 certification', 'We hold ISO 9001 certification')
+    assert is_exact_match('Turnover above ₹50,00,000', 'Annual turnover INR 5000000')
+    # Nothing to pin down: never an exact match
+    assert not is_exact_match('Valid GST registration', 'Valid GST registration')
+
+
+def test_identifier_phrases():
+    assert identifier_phrases('Bidder must be CMMI Level 5') == [('cmmi', 'level', '5')]
+    assert identifier_phrases('Turnover above ₹50,00,000') == [('inr', '5000000')]
+    assert identifier_phrases('Supply of Servers with ISO 27001') == [('iso', '27001')]
+
+
+def test_exact_match_needs_the_whole_identifier_in_one_clause():
+    # "level 5" alone, next to a different CMMI level, is not CMMI Level 5
+    assert not is_exact_match('CMMI Level 5', 'CMMI Level 3 appraised; level 5 roadmap')
+    assert not is_exact_match('CMMI Level 5', 'CMMI Level 3 appraised. Targeting level 5 next year.')
+    assert is_exact_match('CMMI Level 5', 'Appraised at CMMI Level 5 in 2023.')
+    assert is_exact_match('Certificate No. 1234', 'BIS Certificate No. 1234 is valid.')
+
+
+def test_exact_match_ignores_hedged_or_negated_mentions():
+    assert not is_exact_match('ISO 27001', 'ISO 27001 audit planned')
+    assert not is_exact_match('CMMI Level 5', 'We do not hold CMMI Level 5.')
+    assert is_exact_match('ISO 27001', 'ISO 27001 audit planned. ISO 27001:2013 certified since 2019.')
+
+
+def make_index() -> LexicalIndex:
+    index = LexicalIndex()
+    index.update({
+        0: 'ISO 9001 quality management certification',
+        1: 'ISO 27001 information security certification',
+        2: 'CMMI Level 5 appraisal for software development',
+        3: 'Annual turnover of INR 50 crore for three years',
+    })
+    return index
+
+
+def test_bm25_ranks_exact_identifier_first():
+    labels, scores = make_index().search('ISO 27001 certified', top_k=2)
+    assert labels.tolist() == [1, 0]
+    assert scores[0] > scores[1] > 0
+
+
+def test_bm25_mask_and_discard():
+    index = make_index()
+    mask = np.array([True, False, True, True])
+    labels, _ = index.search('ISO 27001', top_k=5, mask=mask)
+    assert labels.tolist() == [0]
+
+    index.discard(1)
+    labels, _ = index.search('27001', top_k=5)
+    assert labels.tolist() == []
+    assert index.stats()['passages'] == 3
+
+
+def test_bm25_reindex_replaces_terms():
+    index = make_index()
+    index.update({2: 'CMMI Level 3 appraisal'})
+    assert index.search('5', top_k=5)[0].tolist() == []
+    assert index.search('3', top_k=5)[0].tolist() == [2]
+
+
+def test_coverage_weights_missing_words():
+    index = make_index()
+    assert index.coverage('ISO 27001', 1) == 1.0
+    assert 0 < index.coverage('ISO 27001', 0) < 0.5
+    assert index.coverage('ISO 27001', 2) == 0.0
+
+
+def test_rrf_fuse():
+    fused = rrf_fuse([np.array([1, 2, 3]), np.array([3, 1, 4])], k=60)
+    assert fused[0] == 1
+    assert set(fused) == {1, 2, 3, 4}
@@ -0,0 +1,76 @@
+import pytest
+
+from support import run_child
+
+pytest.importorskip("faiss")
+
+SETUP = '''
+import time, asyncio, threading
+from app.services.matcher import VectorMatcher
+
+matcher = VectorMatcher()
+matcher.add_items([
+    {"id": f"item{i}", "content": f"item {i} iso {i % 7} cloud hosting turnover", "tenant_id": "t1" if i % 2 else None}
+    for i in range(400)
+])
+'''
+
+
+def test_search_waits_for_in_place_index_update(tmp_path):
+    result = run_child(str(tmp_path), SETUP, '''
+    results = []
+    search = threading.Thread(target=lambda: results.append(asyncio.run(matcher.search_batch(["iso cloud"], top_k=3))))
+    with matcher._index_lock.write():
+        search.start()
+        time.sleep(0.3)
+        assert search.is_alive(), "search ran during an index update"
+    search.join(10)
+    assert len(results[0][0]) == 3
+    ''')
+    assert result.returncode == 0, result.stderr
+
+
+def test_concurrent_writes_and_searches(tmp_path):
+    # FAISS can crash when an index changes mid-search: a crash fails the child
+    result = run_child(str(tmp_path), SETUP, '''
+    stop = threading.Event()
+    errors = []
+    found = []
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            matcher.add_items([{"id": f"w{i}-{j}", "content": f"written {i} {j} iso cloud", "tenant_id": "t1"} for j in range(20)])
+            if i >= 2:
+                for j in range(20):
+                    matcher.remove_item(f"w{i - 2}-{j}")
+            i += 1
+
+    def reader(k):
+        async def run():
+            n = 0
+            while not stop.is_set():
+                rows = await matcher.search_batch(
+                    [f"iso cloud {j}" for j in range(16)], top_k=5, tenant_id="t1" if (n + k) % 2 else None
+                )
+                # Hits removed between search and hydration are dropped, so a
+                # row may come back short (or empty)
+                assert all(len(row) <= 5 for row in rows)
+                found.extend(len(row) for row in rows)
+                n += 1
+        try:
+            asyncio.run(run())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(k,)) for k in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(4)
+    stop.set()
+    for thread in threads:
+        thread.join(60)
+    assert not errors, errors
+    assert sum(found) > 0
+    ''', INDEX_FLUSH_INTERVAL_SECONDS=1000, INDEX_FLUSH_MAX_PENDING=1000000)
+    assert result.returncode == 0, result.stderr[-2000:]
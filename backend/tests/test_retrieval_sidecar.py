@@ -0,0 +1,81 @@
+import os
+import time
+import signal
+
+import pytest
+
+from support import run_child, start_child
+
+pytest.importorskip("faiss")
+
+SIDECAR = '''
+import asyncio
+from app.services.matcher import VectorMatcher
+from app.services.retrieval.server import serve
+
+VectorMatcher().add_items([
+    {{"id": f"item{{i}}", "content": f"item {{i}} iso {{i % 7}} cloud hosting turnover"}} for i in range(400)
+])
+asyncio.run(serve({socket!r}))
+'''
+
+
+@pytest.fixture
+def sidecar(tmp_path):
+    socket_path = str(tmp_path / "retrieval.sock")
+    process = start_child(str(tmp_path), SIDECAR.format(socket=socket_path))
+    deadline = time.time() + 60
+    while not os.path.exists(socket_path):
+        assert process.poll() is None, process.communicate()[1]
+        assert time.time() < deadline, "sidecar did not start"
+        time.sleep(0.1)
+    yield process, socket_path
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+    process.communicate(timeout=30)
+
+
+def test_concurrent_mutations_and_searches_over_socket(tmp_path, sidecar):
+    # Mutations run on sidecar worker threads while searches run on its loop;
+    # a FAISS crash would kill the sidecar and fail the client calls
+    process, socket_path = sidecar
+    result = run_child(str(tmp_path), f'''
+    import time, asyncio, threading
+    from app.services.retrieval.client import RemoteMatcher
+
+    matcher = RemoteMatcher({socket_path!r}, timeout=30)
+    stop = threading.Event()
+    errors = []
+
+    def writer(k):
+        try:
+            i = 0
+            while not stop.is_set():
+                matcher.add_items([{{"id": f"w{{k}}-{{i}}-{{j}}", "content": f"written {{i}} {{j}} iso cloud"}} for j in range(20)])
+                if i >= 2:
+                    for j in range(20):
+                        matcher.remove_item(f"w{{k}}-{{i - 2}}-{{j}}")
+                i += 1
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            while not stop.is_set():
+                rows = asyncio.run(matcher.search_batch([f"iso cloud {{j}}" for j in range(16)], top_k=5))
+                assert all(len(row) <= 5 for row in rows)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(2)] + [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(4)
+    stop.set()
+    for thread in threads:
+        thread.join(60)
+    assert not errors, errors
+    assert matcher.stats()["remote"] == {socket_path!r}
+    ''')
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert process.poll() is None, "sidecar exited"
@@ -0,0 +1,88 @@
+import time
+import threading
+
+from app.services.rwlock import ReadWriteLock
+
+
+def run(target) -> threading.Thread:
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=2)
+
+    def reader():
+        with lock.read():
+            inside.wait()  # all three readers hold the lock at once
+
+    threads = [run(reader) for _ in range(3)]
+    for thread in threads:
+        thread.join(2)
+        assert not thread.is_alive()
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def reader():
+        with lock.read():
+            events.append("read")
+
+    with lock.write():
+        thread = run(reader)
+        time.sleep(0.1)
+        assert events == []
+    thread.join(2)
+    assert events == ["read"]
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    order = []
+    release = threading.Event()
+
+    def first_reader():
+        with lock.read():
+            release.wait(2)
+        order.append("first reader")
+
+    def writer():
+        with lock.write():
+            order.append("writer")
+
+    def late_reader():
+        with lock.read():
+            order.append("late reader")
+
+    threads = [run(first_reader)]
+    time.sleep(0.05)
+    threads.append(run(writer))
+    time.sleep(0.05)
+    threads.append(run(late_reader))
+    time.sleep(0.05)
+    assert order == []
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert order == ["first reader", "writer", "late reader"]
+
+
+def test_write_side_is_reentrant_and_may_read():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    acquired = threading.Event()
+
+    def writer():
+        with lock.write():
+            acquired.set()
+
+    # Fully released: another thread can write
+    run(writer)
+    assert acquired.wait(2)
@@ -0,0 +1,62 @@
+from app.services.segmenter import iter_page_sentences, iter_sentence_spans
+
+
+def sentences(text: str) -> list:
+    return [text[start:end] for start, end in iter_sentence_spans(text)]
+
+
+def test_terminators_split_sentences():
+    assert sentences("The bidder must be registered. EMD is mandatory! Is GST required? Yes") == [
+        "The bidder must be registered.", "EMD is mandatory!", "Is GST required?", "Yes",
+    ]
+
+
+def test_single_level_list_markers_are_dropped():
+    text = "Eligibility:\n1. Valid GST registration\n2) PAN card\n• ISO 9001\n- MSME certificate"
+    assert sentences(text) == [
+        "Eligibility:", "Valid GST registration", "PAN card", "ISO 9001", "MSME certificate",
+    ]
+
+
+def test_multi_level_clause_numbers_are_one_marker():
+    text = "Scope of work.\n2.2 The bidder shall deploy staff.\n3.1.4 Uptime of 99.5% is required.\n4.1. Submit reports monthly."
+    assert sentences(text) == [
+        "Scope of work.",
+        "The bidder shall deploy staff.",
+        "Uptime of 99.5% is required.",
+        "Submit reports monthly.",
+    ]
+
+
+def test_numbers_starting_a_line_are_not_markers():
+    assert sentences("Turnover in\n2023 exceeded INR 50 crore.") == ["Turnover in\n2023 exceeded INR 50 crore."]
+
+
+def test_abbreviations_do_not_end_sentences():
+    text = "Turnover above Rs. 50 crore is required. Quote GeM bid No. 123 e.g. in the cover letter. Done."
+    assert sentences(text) == [
+        "Turnover above Rs. 50 crore is required.",
+        "Quote GeM bid No. 123 e.g. in the cover letter.",
+        "Done.",
+    ]
+
+
+def test_question_labels_stay_with_their_question():
+    text = "Annexure B.\nQ1. Does the bidder hold ISO 27001?\nQuestion 2. Describe your support model.\nQ 3.1. List key staff."
+    assert sentences(text) == [
+        "Annexure B.",
+        "Q1. Does the bidder hold ISO 27001?",
+        "Question 2. Describe your support model.",
+        "Q 3.1. List key staff.",
+    ]
+
+
+def test_spans_index_the_original_text():
+    text = "  First point.\n1. Second point  "
+    spans = list(iter_sentence_spans(text))
+    assert [text[s:e] for s, e in spans] == ["First point.", "Second point"]
+
+
+def test_page_sentences_carry_page_numbers():
+    pages = [{"page_num": 1, "content": "A is needed. B is needed."}, {"page_num": 2, "content": "C."}]
+    assert list(iter_page_sentences(pages)) == [(1, "A is needed."), (1, "B is needed."), (2, "C.")]
@@ -0,0 +1,6 @@
+-- Near-duplicate requirement collapsing
+-- Variants of a repeated clause are stored on the canonical requirement
+-- (as [{text, page_number}]) instead of as separate rows, so they share
+-- its match results and response.
+ALTER TABLE requirements
+ADD COLUMN IF NOT EXISTS duplicate_refs JSONB DEFAULT '[]';
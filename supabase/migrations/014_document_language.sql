@@ -0,0 +1,8 @@
+-- Document-level language detection
+-- Detected once during processing and reused by the composer and humanizer
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS language VARCHAR(10);
+
+-- Per-requirement language (page language for mixed-language tenders)
+ALTER TABLE requirements
+ADD COLUMN IF NOT EXISTS language VARCHAR(10);
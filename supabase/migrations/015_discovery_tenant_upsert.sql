@@ -0,0 +1,11 @@
+-- Tenant-scoped tender dedupe for bulk discovery upserts
+-- Each tenant keeps its own copy of a portal tender, so the natural key
+-- includes tenant_id; scans upsert a whole batch on it in one statement.
+ALTER TABLE discovered_tenders
+DROP CONSTRAINT IF EXISTS discovered_tenders_external_ref_id_source_portal_key;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_discovered_tenders_ref_portal_tenant
+ON discovered_tenders(external_ref_id, source_portal, tenant_id);
+
+-- Bulk attachment replacement deletes by tender_id IN (...)
+CREATE INDEX IF NOT EXISTS idx_tender_attachments_tender_id ON tender_attachments(tender_id);
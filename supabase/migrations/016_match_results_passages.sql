@@ -0,0 +1,4 @@
+-- Matched KB passages per match result (best first)
+-- Composition reads them back instead of re-extracting from matched_content
+ALTER TABLE match_results
+ADD COLUMN IF NOT EXISTS passages JSONB NOT NULL DEFAULT '[]'::jsonb;
@@ -0,0 +1,4 @@
+-- Lexical coverage of each match (IDF-weighted share of the requirement's
+-- words found in the best passage); high coverage lets composition skip LLM refinement
+ALTER TABLE match_results
+ADD COLUMN IF NOT EXISTS lexical_coverage REAL NOT NULL DEFAULT 0;